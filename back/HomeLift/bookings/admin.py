@@ -30,7 +30,7 @@ class BookingAdmin(admin.ModelAdmin):
         'phone',
     )
     ordering = ('-created_at',)
-    readonly_fields = ('created_at', 'updated_at', 'advance')
+    readonly_fields = ('created_at', 'updated_at', 'advance', 'amount_paid', 'is_fully_paid', 'scheduled_start', 'scheduled_end')
 
     fieldsets = (
         ('Booking Details', {
@@ -52,12 +52,14 @@ class BookingAdmin(admin.ModelAdmin):
         ('Appointment', {
             'fields': (
                 ('booking_date', 'booking_time'),
+                ('scheduled_start', 'scheduled_end'),
             )
         }),
         ('Payment', {
             'fields': (
                 'price',
                 'advance',
+                ('amount_paid', 'is_fully_paid'),
             )
         }),
         ('Timestamps', {
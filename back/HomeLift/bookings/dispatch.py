@@ -0,0 +1,61 @@
+"""
+bookings/dispatch.py
+Real-time job dispatch to providers.
+
+When a booking's advance is paid (Stripe webhook or WalletPay) the job is
+pushed as a `job_available` event to every provider eligible to accept it,
+read from the service -> providers index (providers/service_index.py). When
+a provider accepts it, the others get `job_taken` so their clients can drop
+it. Both pushes run after commit through one batched fan-out, so provider
+clients no longer need to poll ProviderBookingsView.
+"""
+import logging
+
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def job_payload(booking):
+    """Compact job description sent to providers."""
+    return {
+        'booking_id': booking.pk,
+        'service_id': booking.service_id,
+        'service_name': getattr(booking.service, 'name', None),
+        'booking_date': booking.booking_date.isoformat() if booking.booking_date else None,
+        'booking_time': booking.booking_time.isoformat() if booking.booking_time else None,
+        'city': getattr(booking.address, 'city', None),
+        'price': str(booking.price) if booking.price is not None else None,
+    }
+
+
+def _push_to_providers(booking, event_type, payload, exclude=()):
+    from notifications.fanout import fan_out_sync, user_group
+    from providers.service_index import eligible_provider_ids
+
+    excluded = {booking.user_id, *exclude}
+    event = {'type': event_type, 'payload': payload}
+    try:
+        fan_out_sync(
+            (user_group(provider_id), event)
+            for provider_id in eligible_provider_ids(booking.service_id)
+            if provider_id not in excluded
+        )
+    except Exception:
+        logger.exception("Failed to push %s for booking pk=%s", event_type, booking.pk)
+
+
+def announce_new_job(booking):
+    """Push a newly paid, unassigned booking to eligible providers once committed."""
+    if booking.status != 'pending' or booking.provider_id is not None or not booking.is_advance_paid:
+        return
+    payload = job_payload(booking)
+    transaction.on_commit(lambda: _push_to_providers(booking, 'job_available', payload))
+
+
+def announce_job_taken(booking):
+    """Tell the other eligible providers that `booking` has been accepted."""
+    payload = {'booking_id': booking.pk, 'service_id': booking.service_id}
+    transaction.on_commit(
+        lambda: _push_to_providers(booking, 'job_taken', payload, exclude=(booking.provider_id,))
+    )
@@ -0,0 +1,65 @@
+"""
+bookings/expiry.py
+Scheduled expiry of pending bookings whose start time has already passed.
+
+Run by the `expire_bookings` management command (cron or `--interval` loop),
+so the booking list views no longer do any expiry work on the request path.
+"""
+import logging
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import stats
+from .models import Booking
+from .signals import handle_booking_cancelled
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def expired_pending_bookings(now=None):
+    """Pending bookings whose scheduled start is before `now` (range scan on booking_expiry_idx)."""
+    return Booking.objects.filter(status='pending', scheduled_start__lt=now or timezone.now())
+
+
+def expire_pending_bookings(now=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Cancel expired pending bookings in batches of `batch_size`.
+
+    Each batch is locked (skipping rows another worker already holds), flipped
+    to 'cancelled' with a single UPDATE, and then run through the same refund
+    and notification side effects as a regular cancellation. Returns the number
+    of bookings cancelled.
+    """
+    total = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                expired_pending_bookings(now)
+                .select_for_update(skip_locked=True, of=('self',))
+                .select_related('service', 'user')
+                .order_by('pk')[:batch_size]
+            )
+            if not batch:
+                break
+
+            before = [stats.snapshot(b) for b in batch]
+            Booking.objects.filter(pk__in=[b.pk for b in batch]).update(
+                status='cancelled', updated_at=timezone.now()
+            )
+            for booking in batch:
+                booking.status = 'cancelled'
+                try:
+                    handle_booking_cancelled(booking)
+                except Exception:
+                    logger.exception("Expiry side effects failed for booking pk=%s", booking.pk)
+            stats.record_changes(zip(before, (stats.snapshot(b) for b in batch)))
+
+        total += len(batch)
+        logger.info("Expired %s pending bookings (running total %s)", len(batch), total)
+
+        if len(batch) < batch_size:
+            break
+    return total
@@ -0,0 +1,39 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from bookings.expiry import DEFAULT_BATCH_SIZE, expire_pending_bookings
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Cancel pending bookings whose scheduled start time has passed (refunds + notifications included)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help="Number of bookings cancelled per transaction."
+        )
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help="Keep running and sweep every N seconds. 0 (default) runs a single sweep, for cron."
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        interval = options['interval']
+
+        while True:
+            try:
+                count = expire_pending_bookings(batch_size=batch_size)
+                self.stdout.write(f"Expired {count} pending booking(s).")
+            except Exception as e:
+                logger.exception("expire_bookings sweep failed: %s", e)
+                if not interval:
+                    raise
+
+            if not interval:
+                return
+            time.sleep(interval)
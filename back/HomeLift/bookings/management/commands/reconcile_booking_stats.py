@@ -0,0 +1,39 @@
+import logging
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bookings import stats
+from bookings.models import Booking
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Rebuild the daily booking stats rollup from the bookings table (run nightly)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=2,
+            help="Number of days to rebuild, ending today (default 2: yesterday and today)."
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help="Rebuild every day since the first booking."
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        if options['all']:
+            first = Booking.objects.order_by('created_at').values_list('created_at', flat=True).first()
+            start = timezone.localdate(first) if first else today
+        else:
+            start = today - timedelta(days=max(options['days'], 1) - 1)
+
+        try:
+            cells = stats.reconcile(start, today)
+        except Exception as e:
+            logger.exception("reconcile_booking_stats failed: %s", e)
+            raise
+        self.stdout.write(f"Rebuilt booking stats for {start} → {today}: {cells} cell(s).")
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0009_booking_discount_amount_booking_original_price_and_more'),
+        ('core', '0004_ticket'),
+        ('services', '0004_alter_service_description'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'booking_date', 'booking_time'], name='booking_expiry_idx'),
+        ),
+    ]
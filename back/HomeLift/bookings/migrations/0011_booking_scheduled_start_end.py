@@ -0,0 +1,70 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:07
+
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_schedule(apps, schema_editor):
+    Booking = apps.get_model('bookings', 'Booking')
+    batch = []
+    qs = Booking.objects.filter(scheduled_start__isnull=True).select_related('service')
+    for booking in qs.iterator(chunk_size=1000):
+        if not (booking.booking_date and booking.booking_time):
+            continue
+        start = timezone.make_aware(datetime.combine(booking.booking_date, booking.booking_time))
+        duration = getattr(booking.service, 'duration', None) or 60
+        booking.scheduled_start = start
+        booking.scheduled_end = start + timedelta(minutes=duration)
+        batch.append(booking)
+        if len(batch) >= 1000:
+            Booking.objects.bulk_update(batch, ['scheduled_start', 'scheduled_end'])
+            batch = []
+    if batch:
+        Booking.objects.bulk_update(batch, ['scheduled_start', 'scheduled_end'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0010_booking_expiry_idx'),
+        ('core', '0004_ticket'),
+        ('services', '0004_alter_service_description'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='booking_expiry_idx',
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='scheduled_end',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='scheduled_start',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_schedule, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'scheduled_start'], name='booking_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'provider', 'is_advance_paid', 'service'], name='booking_job_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['provider', 'status', 'scheduled_start'], name='booking_provider_sched_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'created_at'], name='booking_user_created_idx'),
+        ),
+    ]
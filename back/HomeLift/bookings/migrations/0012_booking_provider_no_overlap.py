@@ -0,0 +1,70 @@
+# Exclusion constraint preventing overlapping active bookings per provider.
+# PostgreSQL only (needs btree_gist); other backends rely on the locked range
+# query in bookings/scheduling.py.
+
+from django.db import migrations
+
+CREATE_SQL = """
+CREATE EXTENSION IF NOT EXISTS btree_gist;
+ALTER TABLE bookings_booking
+    ADD CONSTRAINT booking_provider_no_overlap
+    EXCLUDE USING gist (
+        provider_id WITH =,
+        tstzrange(scheduled_start, scheduled_end, '[)') WITH &&
+    )
+    WHERE (status IN ('confirmed', 'in_progress') AND provider_id IS NOT NULL);
+"""
+
+DROP_SQL = "ALTER TABLE bookings_booking DROP CONSTRAINT IF EXISTS booking_provider_no_overlap;"
+
+
+def check_no_overlaps(apps, schema_editor):
+    """
+    Stop before adding the constraint if existing bookings already violate it,
+    listing the overlapping pairs. Which booking gives way is a decision for
+    support (and the customers involved), not for a schema migration.
+    """
+    Booking = apps.get_model('bookings', 'Booking')
+    active = (
+        Booking.objects.filter(status__in=('confirmed', 'in_progress'), provider__isnull=False,
+                               scheduled_start__isnull=False, scheduled_end__isnull=False)
+        .order_by('provider_id', 'scheduled_start', 'pk')
+        .values_list('pk', 'provider_id', 'scheduled_start', 'scheduled_end')
+    )
+    overlaps = []
+    open_bookings = []  # (pk, end) of the current provider's bookings not yet ended
+    current_provider = None
+    for pk, provider_id, start, end in active:
+        if provider_id != current_provider:
+            current_provider, open_bookings = provider_id, []
+        open_bookings = [(other, e) for other, e in open_bookings if e > start]
+        overlaps.extend((other, pk) for other, _ in open_bookings)
+        open_bookings.append((pk, end))
+
+    if overlaps:
+        raise RuntimeError(
+            "Providers have overlapping active bookings; reassign or cancel them before adding "
+            "booking_provider_no_overlap: " + ", ".join(f"#{a}/#{b}" for a, b in overlaps)
+        )
+
+
+def add_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_SQL)
+
+
+def drop_constraint(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0011_booking_scheduled_start_end'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_no_overlaps, migrations.RunPython.noop),
+        migrations.RunPython(add_constraint, drop_constraint),
+    ]
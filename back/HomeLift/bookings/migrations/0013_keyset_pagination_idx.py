@@ -0,0 +1,21 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0012_booking_provider_no_overlap'),
+        ('core', '0005_keyset_pagination_idx'),
+        ('services', '0004_alter_service_description'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['created_at', 'id'], name='booking_created_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:30
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_stats(apps, schema_editor):
+    """Build the rollup for every existing booking (see bookings/stats.py)."""
+    Booking = apps.get_model('bookings', 'Booking')
+    DailyBookingStats = apps.get_model('bookings', 'DailyBookingStats')
+    rows = (
+        Booking.objects.annotate(day=TruncDate('created_at'))
+        .values('day', 'service_id', 'provider_id', 'status')
+        .annotate(count=Count('id'), revenue=Sum('price'))
+        .order_by()
+    )
+    DailyBookingStats.objects.bulk_create(
+        (
+            DailyBookingStats(
+                day=row['day'], service_id=row['service_id'], provider_user_id=row['provider_id'] or 0,
+                status=row['status'], count=row['count'], revenue=row['revenue'] or Decimal('0'),
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0013_keyset_pagination_idx'),
+        ('services', '0004_alter_service_description'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBookingStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('provider_user_id', models.PositiveBigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('confirmed', 'Confirmed'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('service', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='services.service')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['provider_user_id', 'day'], name='daily_stats_provider_day_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'service', 'provider_user_id', 'status'), name='daily_booking_stats_cell_uniq')],
+            },
+        ),
+        migrations.RunPython(backfill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:39
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0014_daily_booking_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='amount_paid',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), help_text='Total of succeeded payments', max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='is_fully_paid',
+            field=models.BooleanField(default=False, help_text='Remaining balance paid (or nothing left to pay after the advance)'),
+        ),
+    ]
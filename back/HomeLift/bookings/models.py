@@ -1,10 +1,16 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
+from datetime import datetime, timedelta
 from decimal import Decimal
 from services.models import Service
 from core.models import Address  # ✅ Import Address from core app
 
 
+# Used when a service has no duration set
+DEFAULT_DURATION_MINUTES = 60
+
+
 class Booking(models.Model):
     STATUS_CHOICES = [
         ("pending", "Pending"),
@@ -52,6 +58,10 @@ class Booking(models.Model):
     # 🗓️ Appointment details
     booking_date = models.DateField(help_text="Date when the service is scheduled")
     booking_time = models.TimeField(help_text="Time when the service should start")
+    # Materialized from booking_date/booking_time + service.duration on save,
+    # so expiry and overlap checks can run as indexed range queries.
+    scheduled_start = models.DateTimeField(null=True, blank=True, editable=False)
+    scheduled_end = models.DateTimeField(null=True, blank=True, editable=False)
 
     # 💰 Price fields
     original_price = models.DecimalField(
@@ -79,17 +89,36 @@ class Booking(models.Model):
     is_advance_paid = models.BooleanField(default=False)
     is_provider_paid = models.BooleanField(default=False, help_text="Track if the provider has been credited for this booking")
     is_refunded = models.BooleanField(default=False, help_text="Track if the advance has been refunded to wallet upon cancellation")
+    # Payment state, kept by payments.services.settle_payment() when a payment succeeds
+    amount_paid = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'), help_text="Total of succeeded payments")
+    is_fully_paid = models.BooleanField(default=False, help_text="Remaining balance paid (or nothing left to pay after the advance)")
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    def compute_schedule(self):
+        """Set scheduled_start / scheduled_end from the appointment date, time and service duration."""
+        if not (self.booking_date and self.booking_time):
+            self.scheduled_start = self.scheduled_end = None
+            return
+        start = timezone.make_aware(datetime.combine(self.booking_date, self.booking_time))
+        duration = getattr(self.service, 'duration', None) or DEFAULT_DURATION_MINUTES
+        self.scheduled_start = start
+        self.scheduled_end = start + timedelta(minutes=duration)
+
     def save(self, *args, **kwargs):
-        """Automatically calculate advance before saving."""
+        """Automatically calculate advance and the scheduled window before saving."""
         if self.price:
             calculated_advance = self.price * Decimal('0.02')
             capped_advance = min(calculated_advance, Decimal('200.00'))
             # Stripe minimum is ₹50, but advance cannot exceed the total price
             self.advance = min(max(capped_advance, Decimal('50.00')), self.price)
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'booking_date', 'booking_time', 'service'} & set(update_fields):
+            self.compute_schedule()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'scheduled_start', 'scheduled_end'}
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -97,6 +126,18 @@ class Booking(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Expiry sweep: pending bookings whose start is in the past
+            models.Index(fields=['status', 'scheduled_start'], name='booking_expiry_idx'),
+            # Provider job feed: pending, unassigned, paid, for the provider's services
+            models.Index(fields=['status', 'provider', 'is_advance_paid', 'service'], name='booking_job_feed_idx'),
+            # Provider calendar / overlap checks
+            models.Index(fields=['provider', 'status', 'scheduled_start'], name='booking_provider_sched_idx'),
+            # "My bookings" list
+            models.Index(fields=['user', 'created_at'], name='booking_user_created_idx'),
+            # Keyset pagination of the admin booking list
+            models.Index(fields=['created_at', 'id'], name='booking_created_idx'),
+        ]
 
 class Review(models.Model):
     booking = models.OneToOneField(
@@ -122,3 +163,33 @@ class Review(models.Model):
 
     def __str__(self):
         return f"Review by {self.user.username} for {self.provider.username} ({self.rating}/5)"
+
+
+class DailyBookingStats(models.Model):
+    """
+    Dashboard rollup: number of bookings and their total price per
+    (day created, service, provider, current status). Maintained incrementally
+    by bookings/stats.py and rebuilt nightly by `reconcile_booking_stats`.
+    """
+    day = models.DateField()
+    service = models.ForeignKey(Service, on_delete=models.CASCADE, related_name="+")
+    # Plain id rather than a FK so "unassigned" (0) can be part of the unique key
+    provider_user_id = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+
+    count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['day', 'service', 'provider_user_id', 'status'], name='daily_booking_stats_cell_uniq'
+            ),
+        ]
+        indexes = [
+            # Provider dashboard: one provider over a date range
+            models.Index(fields=['provider_user_id', 'day'], name='daily_stats_provider_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} service={self.service_id} provider={self.provider_user_id} {self.status}: {self.count}"
@@ -0,0 +1,74 @@
+"""
+bookings/scheduling.py
+Provider schedule conflict detection.
+
+A provider cannot hold two 'confirmed' / 'in_progress' bookings whose
+[scheduled_start, scheduled_end) windows intersect.
+
+- Every check is a single indexed range query on booking_provider_sched_idx.
+- Writers serialize per provider by locking the provider's user row (which,
+  unlike their ProviderDetails, always exists), so two concurrent accepts by
+  the same provider cannot both pass the check.
+- On PostgreSQL the rule is also enforced by the `booking_provider_no_overlap`
+  exclusion constraint (migration 0012); a violation surfaces as ScheduleConflict.
+"""
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+
+from .models import Booking
+
+ACTIVE_STATUSES = ("confirmed", "in_progress")
+PROVIDER_OVERLAP_CONSTRAINT = "booking_provider_no_overlap"
+
+
+class ScheduleConflict(Exception):
+    """The provider already has an active booking overlapping the requested window."""
+
+
+def lock_provider_schedule(provider):
+    """
+    Take a row lock on the provider's user row (`provider` is a user or its
+    pk) for the rest of the transaction. Must be called inside
+    transaction.atomic().
+    """
+    User = get_user_model()
+    User.objects.select_for_update().only('pk').get(pk=getattr(provider, 'pk', provider))
+
+
+def find_conflict(provider, start, end, exclude_pk=None):
+    """Return the first active booking of `provider` overlapping [start, end), or None."""
+    qs = Booking.objects.filter(
+        provider=provider,
+        status__in=ACTIVE_STATUSES,
+        scheduled_start__lt=end,
+        scheduled_end__gt=start,
+    )
+    if exclude_pk is not None:
+        qs = qs.exclude(pk=exclude_pk)
+    return qs.only("id").first()
+
+
+def save_with_schedule_check(booking, update_fields):
+    """
+    Save `booking` after verifying its provider's calendar is free.
+
+    Bookings that are not active or have no provider are saved as-is. Raises
+    ScheduleConflict if the window collides with another active booking, either
+    from the range query or from the database constraint.
+    """
+    if (booking.provider_id is None or booking.status not in ACTIVE_STATUSES
+            or booking.scheduled_start is None):
+        booking.save(update_fields=update_fields)
+        return
+
+    lock_provider_schedule(booking.provider_id)
+    if find_conflict(booking.provider_id, booking.scheduled_start, booking.scheduled_end, exclude_pk=booking.pk):
+        raise ScheduleConflict()
+
+    try:
+        with transaction.atomic():
+            booking.save(update_fields=update_fields)
+    except IntegrityError as e:
+        if PROVIDER_OVERLAP_CONSTRAINT in str(e):
+            raise ScheduleConflict() from e
+        raise
@@ -33,7 +33,6 @@ class BookingSerializer(serializers.ModelSerializer):
     is_owner = serializers.SerializerMethodField(read_only=True)
     is_assigned_to_user = serializers.SerializerMethodField(read_only=True)
     remaining_payment = serializers.SerializerMethodField(read_only=True)
-    is_fully_paid = serializers.SerializerMethodField(read_only=True)
     review = serializers.SerializerMethodField()
 
     class Meta:
@@ -44,9 +43,9 @@ class BookingSerializer(serializers.ModelSerializer):
             'provider', 'provider_name',
             'full_name', 'phone',
             'address', 'address_details',
-            'notes', 'booking_date', 'booking_time',
+            'notes', 'booking_date', 'booking_time', 'scheduled_start', 'scheduled_end',
             'status', 'original_price', 'discount_amount', 'price', 'advance', 'remaining_payment',
-            'is_advance_paid', 'is_fully_paid', 'is_refunded',
+            'is_advance_paid', 'amount_paid', 'is_fully_paid', 'is_refunded',
             'created_at', 'updated_at',
             # UI helpers
             'is_owner', 'is_assigned_to_user',
@@ -55,7 +54,19 @@ class BookingSerializer(serializers.ModelSerializer):
             'provider_contact', 'user_email', 'customer_contact',
             'review',
         ]
-        read_only_fields = ('advance', 'created_at', 'updated_at', 'is_owner', 'is_assigned_to_user', 'is_refunded', 'remaining_payment', 'review')
+        read_only_fields = ('advance', 'scheduled_start', 'scheduled_end', 'created_at', 'updated_at', 'is_owner', 'is_assigned_to_user', 'is_refunded', 'amount_paid', 'is_fully_paid', 'remaining_payment', 'review')
+
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Load the related rows the serializer reads in the list query itself
+        (JOINs), so a page costs the same number of queries whatever its size.
+        Payment state is read from the booking's own columns.
+        """
+        return queryset.select_related(
+            'service__category', 'provider', 'address', 'user',
+            'review__user', 'review__provider',
+        )
 
     def validate(self, attrs):
         from django.utils import timezone
@@ -80,20 +91,6 @@ class BookingSerializer(serializers.ModelSerializer):
             return obj.price - obj.advance
         return obj.price or 0
 
-    def get_is_fully_paid(self, obj):
-        # 1. Check if price matches advance (edge case)
-        if obj.price and obj.advance and (obj.price - obj.advance) <= 0:
-             return obj.is_advance_paid
-        
-        # 2. Check if there's a successful payment of type 'remaining'
-        # We import here to avoid circular dependency
-        from payments.models import Payment
-        return Payment.objects.filter(
-            booking=obj, 
-            status='succeeded', 
-            metadata__payment_type='remaining'
-        ).exists()
-
     def get_is_owner(self, obj):
         request = self.context.get('request', None)
         if not request or not getattr(request, "user", None):
@@ -155,32 +152,24 @@ class BookingSerializer(serializers.ModelSerializer):
         service = validated_data.get('service')
         
         # Security: Always calculate final price on backend
-        from offers.models import Offer
-        from django.utils import timezone
-        from django.db.models import Q
+        from offers.resolver import best_offer_for
         from decimal import Decimal
         
-        now = timezone.localtime(timezone.now()).date()
         base_price = service.price
         
-        # Find best active offer (Service-specific > Global)
-        offer = Offer.objects.filter(
-            Q(service=service) | Q(service__isnull=True),
-            is_active=True,
-            start_date__lte=now,
-            end_date__gte=now
-        ).order_by('-discount_value').first()
+        # Find best active offer (Service-specific vs Global) from the cached offer map
+        offer = best_offer_for(service.id)
         
         final_price = base_price
         discount = Decimal('0.00')
 
         if offer:
-            if offer.discount_type == 'percentage':
-                discount = (base_price * Decimal(str(offer.discount_value))) / Decimal('100')
-                if offer.max_discount:
-                    discount = min(discount, offer.max_discount)
+            if offer['discount_type'] == 'percentage':
+                discount = (base_price * Decimal(str(offer['discount_value']))) / Decimal('100')
+                if offer['max_discount']:
+                    discount = min(discount, Decimal(str(offer['max_discount'])))
             else:  # fixed amount
-                discount = Decimal(str(offer.discount_value))
+                discount = Decimal(str(offer['discount_value']))
             
             final_price = base_price - discount
             
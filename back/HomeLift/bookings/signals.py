@@ -1,75 +1,71 @@
 # bookings/signals.py
 import logging
 from django.apps import apps
-from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
-from django.db import IntegrityError, transaction
-from django.db.models.signals import pre_save, post_save
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
 
+from . import stats
 from .models import Booking
-from notifications.models import Notification
-from notifications.utils import send_user_notification
+from notifications.outbox import safe_create_notification
 
 logger = logging.getLogger(__name__)
-User = apps.get_model(settings.AUTH_USER_MODEL)
 
 
-def get_system_user():
+def handle_booking_cancelled(instance, booking_ct=None):
     """
-    Return a fallback system/admin user to receive system notifications.
-    Prefer superuser, then staff user.
+    Side effects of a booking entering 'cancelled': notify the owner and refund
+    a paid advance to their wallet. Called from post_save and by the bulk
+    expiry sweep in bookings/expiry.py, which bypasses save().
     """
-    return User.objects.filter(is_superuser=True).first() or User.objects.filter(is_staff=True).first()
+    if booking_ct is None:
+        booking_ct = ContentType.objects.get_for_model(Booking)
 
+    # 1. Notify User
+    try:
+        service_name = getattr(instance.service, "name", "service")
+        title = "Booking Cancelled"
+        message = (
+            f"You have cancelled booking #{instance.pk} for {service_name} "
+            f"on {instance.booking_date} at {instance.booking_time}."
+        )
+
+        safe_create_notification(
+            recipient=instance.user,
+            sender=None,
+            type='booking',
+            title=title,
+            message=message,
+            content_type=booking_ct,
+            object_id=instance.pk
+        )
+    except Exception:
+        logger.exception("Failed to schedule cancellation notification for booking pk=%s", instance.pk)
 
-def safe_create_notification(recipient, **kwargs):
-    """
-    Create Notification only if recipient exists. If recipient doesn't exist,
-    send to system user instead. Use transaction.on_commit to ensure this runs
-    after the DB transaction successfully commits.
-    """
-    def _create():
+    # 2. Process Refund to Wallet
+    if instance.is_advance_paid and not instance.is_refunded:
         try:
-            # Validate recipient if provided
-            if recipient is not None:
-                if getattr(recipient, "pk", None) is None:
-                    raise ValueError("recipient has no PK")
-                if not User.objects.filter(pk=recipient.pk).exists():
-                    raise ValueError(f"recipient id={recipient.pk} does not exist")
-                Notification.objects.create(recipient=recipient, **kwargs)
-                # Trigger WebSocket notification
-                send_user_notification(recipient.id, kwargs.get('message', ''))
-                return
-
-            # If recipient is None, route to system user
-            system_user = get_system_user()
-            if system_user:
-                Notification.objects.create(recipient=system_user, **kwargs)
-                logger.info("Routed notification to system_user because recipient was None.")
-                return
-
-            logger.warning("No valid recipient found for notification; skipping. kwargs=%s", kwargs)
-
-        except (IntegrityError, ValueError) as exc:
-            logger.exception("Failed to create notification for recipient=%s: %s. Falling back to system user.", getattr(recipient, "pk", None), exc)
-            system_user = get_system_user()
-            if system_user:
-                try:
-                    Notification.objects.create(recipient=system_user, **kwargs)
-                    logger.info("Fallback notification created for system_user.")
-                except Exception:
-                    logger.exception("Failed to create fallback notification for system_user.")
-            else:
-                logger.error("No system_user available to receive fallback notification.")
+            # Lazy import to avoid circular dependencies
+            Wallet = apps.get_model('wallet', 'Wallet')
+            from wallet.services import post_entry
 
-    # schedule creation after the surrounding transaction commits
-    try:
-        transaction.on_commit(_create)
-    except Exception:
-        # If transaction infrastructure is not available, attempt immediate create (best effort)
-        logger.exception("transaction.on_commit failed; attempting immediate notification creation.")
-        _create()
+            with transaction.atomic():
+                # Mark as refunded first: only the caller that flips the flag credits the wallet
+                if not Booking.objects.filter(pk=instance.pk, is_refunded=False).update(is_refunded=True):
+                    instance.is_refunded = True
+                    return
+
+                wallet, _ = Wallet.objects.get_or_create(user=instance.user, wallet_type='user')
+                post_entry(wallet, instance.advance, 'credit', f"Refund for cancelled booking #{instance.pk}")
+                instance.is_refunded = True
+                
+            # Force set it again just in case update() didn't reflect in memory immediately
+            instance.is_refunded = True
+                
+            logger.info("Refunded advance of %s for booking %s to user %s wallet", instance.advance, instance.pk, instance.user.email)
+        except Exception:
+            logger.exception("Failed to refund advance for booking %s", instance.pk)
 
 
 @receiver(pre_save, sender=Booking)
@@ -77,17 +73,22 @@ def booking_pre_save(sender, instance, **kwargs):
     """
     Store previous status (if exists) on the instance as _pre_save_status so
     post_save can compare and detect transitions.
+    Also keeps the stored rollup cell as _pre_save_stats for the dashboard stats.
     """
     if not instance.pk:
         instance._pre_save_status = None
+        instance._pre_save_stats = None
         return
 
     try:
-        old = Booking.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
-        instance._pre_save_status = old
+        old = stats.stored_snapshot(instance.pk)
+        instance._pre_save_stats = old
+        instance._pre_save_status = old[0][3] if old else None
     except Exception:
         logger.exception("Could not fetch previous booking status for pk=%s", getattr(instance, "pk", None))
         instance._pre_save_status = None
+        # Unknown previous cell: leave the stats to the nightly reconcile
+        instance.__dict__.pop("_pre_save_stats", None)
 
 
 @receiver(post_save, sender=Booking)
@@ -96,65 +97,18 @@ def booking_post_save(sender, instance, created, **kwargs):
     Handle booking state transitions:
       - when status -> 'cancelled' : notify booking.user (system -> user)
       - when status -> 'confirmed' : notify booking.user (provider -> user) and provider (system -> provider)
-    Uses safe_create_notification which schedules creation after transaction commit.
+    Uses safe_create_notification, which queues them in the notification outbox.
     """
+    if created or hasattr(instance, "_pre_save_stats"):
+        stats.record_change(getattr(instance, "_pre_save_stats", None), stats.snapshot(instance))
+
     try:
         prev_status = getattr(instance, "_pre_save_status", None)
         booking_ct = ContentType.objects.get_for_model(instance)
 
         # ---------- cancelled ----------
         if instance.status == "cancelled" and prev_status != "cancelled":
-            # 1. Notify User
-            try:
-                service_name = getattr(instance.service, "name", "service")
-                title = "Booking Cancelled"
-                message = (
-                    f"You have cancelled booking #{instance.pk} for {service_name} "
-                    f"on {instance.booking_date} at {instance.booking_time}."
-                )
-
-                safe_create_notification(
-                    recipient=instance.user,
-                    sender=None,
-                    type='booking',
-                    title=title,
-                    message=message,
-                    content_type=booking_ct,
-                    object_id=instance.pk
-                )
-            except Exception:
-                logger.exception("Failed to schedule cancellation notification for booking pk=%s", instance.pk)
-
-            # 2. Process Refund to Wallet
-            if instance.is_advance_paid and not instance.is_refunded:
-                try:
-                    # Lazy import to avoid circular dependencies
-                    Wallet = apps.get_model('wallet', 'Wallet')
-                    WalletTransaction = apps.get_model('wallet', 'WalletTransaction')
-
-                    with transaction.atomic():
-                        wallet, _ = Wallet.objects.get_or_create(user=instance.user, wallet_type='user')
-                        wallet.balance += instance.advance
-                        wallet.save(update_fields=['balance'])
-
-                        WalletTransaction.objects.create(
-                            wallet=wallet,
-                            amount=instance.advance,
-                            transaction_type='credit',
-                            status='completed',
-                            description=f"Refund for cancelled booking #{instance.pk}"
-                        )
-                        
-                        # Mark as refunded to prevent duplicate refunds
-                        Booking.objects.filter(pk=instance.pk).update(is_refunded=True)
-                        instance.is_refunded = True
-                        
-                    # Force set it again just in case update() didn't reflect in memory immediately
-                    instance.is_refunded = True
-                        
-                    logger.info("Refunded advance of %s for booking %s to user %s wallet", instance.advance, instance.pk, instance.user.email)
-                except Exception:
-                    logger.exception("Failed to refund advance for booking %s", instance.pk)
+            handle_booking_cancelled(instance, booking_ct)
 
         # ---------- confirmed ----------
         if instance.status == "confirmed" and prev_status != "confirmed":
@@ -235,3 +189,9 @@ def booking_post_save(sender, instance, created, **kwargs):
 
     except Exception:
         logger.exception("Error while handling booking post_save for booking pk=%s", getattr(instance, "pk", None))
+
+
+@receiver(post_delete, sender=Booking)
+def booking_post_delete(sender, instance, **kwargs):
+    """Take a deleted booking out of the dashboard stats."""
+    stats.record_change(stats.snapshot(instance), None)
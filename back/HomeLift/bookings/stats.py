@@ -0,0 +1,130 @@
+"""
+bookings/stats.py
+Daily booking rollup (DailyBookingStats) behind the admin and provider dashboards.
+
+Each booking counts once in the cell (day created, service, provider, status)
+it currently belongs to, with its price added to that cell's revenue. When a
+booking is created, changes status/provider/service/price, or is deleted,
+the booking signals (and the bulk expiry sweep) move it between cells with
+`record_change`, in the same transaction as the booking write. Dashboards
+therefore read a few rows per day in range instead of scanning bookings.
+
+`reconcile` recomputes whole days from the bookings table; the nightly
+`reconcile_booking_stats` command runs it over the last days to repair any
+drift (e.g. raw SQL edits or a failed incremental update).
+"""
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Booking, DailyBookingStats
+
+logger = logging.getLogger(__name__)
+
+# Booking fields that decide a booking's cell and weight
+TRACKED_FIELDS = ('created_at', 'service_id', 'provider_id', 'status', 'price')
+
+
+def stats_key(created_at, service_id, provider_id, status):
+    """(day, service_id, provider_user_id, status) cell of a booking."""
+    return (timezone.localdate(created_at), service_id, provider_id or 0, status)
+
+
+def snapshot(booking):
+    """(cell, price) of a booking as it is now, or None if it isn't saved."""
+    if booking is None or booking.pk is None or booking.created_at is None:
+        return None
+    key = stats_key(booking.created_at, booking.service_id, booking.provider_id, booking.status)
+    return key, booking.price or Decimal('0')
+
+
+def stored_snapshot(pk):
+    """(cell, price) of a booking as currently stored in the database."""
+    row = Booking.objects.filter(pk=pk).values(*TRACKED_FIELDS).first()
+    if row is None:
+        return None
+    key = stats_key(row['created_at'], row['service_id'], row['provider_id'], row['status'])
+    return key, row['price'] or Decimal('0')
+
+
+def _apply(deltas):
+    """Add {cell: [count, revenue]} deltas to the rollup, creating missing cells."""
+    for (day, service_id, provider_user_id, status), (count, revenue) in deltas.items():
+        if not count and not revenue:
+            continue
+        cell = DailyBookingStats.objects.filter(
+            day=day, service_id=service_id, provider_user_id=provider_user_id, status=status
+        )
+        if cell.update(count=F('count') + count, revenue=F('revenue') + revenue):
+            continue
+        try:
+            with transaction.atomic():
+                DailyBookingStats.objects.create(
+                    day=day, service_id=service_id, provider_user_id=provider_user_id,
+                    status=status, count=count, revenue=revenue,
+                )
+        except IntegrityError:
+            # Created concurrently: the row exists now
+            cell.update(count=F('count') + count, revenue=F('revenue') + revenue)
+
+
+def record_changes(changes):
+    """
+    Move bookings between rollup cells. `changes` is an iterable of
+    (before, after) snapshots; None stands for "did not exist".
+    A failure is logged and left for the nightly reconcile.
+    """
+    deltas = defaultdict(lambda: [0, Decimal('0')])
+    for before, after in changes:
+        if before == after:
+            continue
+        if before is not None:
+            key, price = before
+            deltas[key][0] -= 1
+            deltas[key][1] -= price
+        if after is not None:
+            key, price = after
+            deltas[key][0] += 1
+            deltas[key][1] += price
+    if not deltas:
+        return
+    try:
+        with transaction.atomic():
+            _apply(deltas)
+    except Exception:
+        logger.exception("Booking stats update failed; the nightly reconcile will repair it.")
+
+
+def record_change(before, after):
+    record_changes([(before, after)])
+
+
+def reconcile(start_day, end_day=None):
+    """
+    Rebuild the rollup for days start_day..end_day (inclusive; end defaults to
+    today) from the bookings table. Returns the number of cells written.
+    """
+    end_day = end_day or timezone.localdate()
+    rows = (
+        Booking.objects.filter(created_at__date__gte=start_day, created_at__date__lte=end_day)
+        .annotate(day=TruncDate('created_at'))
+        .values('day', 'service_id', 'provider_id', 'status')
+        .annotate(count=Count('id'), revenue=Sum('price'))
+        .order_by()
+    )
+    cells = [
+        DailyBookingStats(
+            day=row['day'], service_id=row['service_id'], provider_user_id=row['provider_id'] or 0,
+            status=row['status'], count=row['count'], revenue=row['revenue'] or Decimal('0'),
+        )
+        for row in rows
+    ]
+    with transaction.atomic():
+        DailyBookingStats.objects.filter(day__gte=start_day, day__lte=end_day).delete()
+        DailyBookingStats.objects.bulk_create(cells)
+    return len(cells)
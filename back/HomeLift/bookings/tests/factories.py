@@ -0,0 +1,44 @@
+"""
+bookings/tests/factories.py
+Model factories shared by the test suites of several apps.
+"""
+import datetime
+from decimal import Decimal
+
+from bookings.models import Booking
+from services.models import Category, Service
+from users.models import CustomUser
+
+
+def create_user(username, **extra):
+    return CustomUser.objects.create_user(username=username, email=f"{username}@example.com", password="x", **extra)
+
+
+def create_service(price=Decimal("1000.00"), duration=60, name="Deep clean", category="Cleaning"):
+    category, _ = Category.objects.get_or_create(name=category)
+    return Service.objects.create(name=name, category=category, price=price, duration=duration)
+
+
+def create_booking(user, service, days_ahead=3, **fields):
+    """A booking of `service` for `user`, by default pending at 10:00 `days_ahead` days from today."""
+    values = {
+        "full_name": "Customer",
+        "phone": "9999999999",
+        "booking_date": datetime.date.today() + datetime.timedelta(days=days_ahead),
+        "booking_time": datetime.time(10, 0),
+        "price": service.price,
+    }
+    values.update(fields)
+    return Booking.objects.create(user=user, service=service, **values)
+
+
+class BookingFixtures:
+    """TestCase mixin: `self.user`, `self.service` and a pending `self.booking` of it."""
+
+    service_price = Decimal("1000.00")
+
+    def setUp(self):
+        super().setUp()
+        self.user = create_user("customer")
+        self.service = create_service(price=self.service_price)
+        self.booking = create_booking(self.user, self.service)
@@ -0,0 +1,347 @@
+import datetime
+import importlib
+import io
+from decimal import Decimal
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings.models import Booking, Review
+from bookings.scheduling import ScheduleConflict, save_with_schedule_check
+from core.models import Address
+from notifications.models import NotificationOutbox
+from payments.services import settle_payment
+from bookings.tests.factories import create_booking, create_service, create_user
+from wallet.models import Wallet
+
+
+class BookingListQueryCountTests(TestCase):
+    """Booking list endpoints must not issue per-row queries."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("customer")
+        cls.provider = create_user("pro", is_provider=True)
+        cls.admin = create_user("admin", is_staff=True)
+
+        service = create_service()
+        address = Address.objects.create(
+            user=cls.user, address_line="1 Main St", city="Kochi", state="Kerala", postal_code="682001"
+        )
+
+        start = datetime.date.today() + datetime.timedelta(days=7)
+        for i in range(30):
+            booking = create_booking(
+                cls.user, service, provider=cls.provider, address=address,
+                booking_date=start + datetime.timedelta(days=i),
+                status="completed", is_advance_paid=True,
+            )
+            if i % 2:
+                settle_payment(booking.id, f"pi_{i}", Decimal("980.00"), "remaining")
+            if i % 3 == 0:
+                Review.objects.create(booking=booking, user=cls.user, provider=cls.provider, rating=5)
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _count_queries(self, url, page_size):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, {"page_size": page_size})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), page_size)
+        return len(ctx.captured_queries)
+
+    def test_user_booking_list_query_count_is_constant(self):
+        self.client.force_authenticate(self.user)
+        url = reverse("booking-list-create")
+        small = self._count_queries(url, 5)
+        large = self._count_queries(url, 25)
+        self.assertEqual(small, large)
+        # COUNT(*) for the paginator + the page itself
+        self.assertEqual(large, 2)
+
+    def test_admin_booking_list_query_count_is_constant(self):
+        self.client.force_authenticate(self.admin)
+        url = reverse("admin-bookings")
+        self.assertEqual(self._count_queries(url, 5), self._count_queries(url, 25))
+
+    def test_list_reports_payment_and_review_state(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.get(reverse("booking-list-create"), {"page_size": 30})
+        rows = response.data["results"]
+        self.assertEqual(sum(1 for r in rows if r["is_fully_paid"]), 15)
+        self.assertEqual(sum(1 for r in rows if r["review"]), 10)
+        self.assertTrue(all(r["category_name"] == "Cleaning" for r in rows))
+
+
+class ExpireBookingsTests(TestCase):
+    """The expiry sweep cancels stale pending bookings like a regular cancellation."""
+
+    def setUp(self):
+        self.user = create_user("customer")
+        self.service = create_service()
+
+    def test_only_stale_pending_bookings_are_expired(self):
+        stale = create_booking(self.user, self.service, days_ahead=-1, is_advance_paid=True)
+        upcoming = create_booking(self.user, self.service)
+        started = create_booking(self.user, self.service, days_ahead=-1, status="confirmed")
+
+        call_command("expire_bookings", stdout=io.StringIO())
+
+        stale.refresh_from_db()
+        self.assertEqual((stale.status, stale.is_refunded), ("cancelled", True))
+        self.assertEqual(Booking.objects.get(pk=upcoming.pk).status, "pending")
+        self.assertEqual(Booking.objects.get(pk=started.pk).status, "confirmed")
+
+        # Advance refunded to the wallet and the owner told, once
+        self.assertEqual(Wallet.objects.get(user=self.user, wallet_type="user").balance, stale.advance)
+        self.assertEqual(NotificationOutbox.objects.filter(object_id=stale.pk, title="Booking Cancelled").count(), 1)
+
+        call_command("expire_bookings", stdout=io.StringIO())
+        self.assertEqual(Wallet.objects.get(user=self.user, wallet_type="user").balance, stale.advance)
+
+    def test_sweep_runs_in_batches(self):
+        for _ in range(5):
+            create_booking(self.user, self.service, days_ahead=-2)
+
+        out = io.StringIO()
+        with self.assertLogs("bookings.expiry", "INFO") as logs:
+            call_command("expire_bookings", batch_size=2, stdout=out)
+
+        self.assertEqual(len(logs.records), 3)
+        self.assertIn("Expired 5 pending booking(s).", out.getvalue())
+        self.assertFalse(Booking.objects.filter(status="pending").exists())
+
+
+class BookingScheduleTests(TestCase):
+    """scheduled_start/scheduled_end follow the appointment date, time and service duration."""
+
+    def setUp(self):
+        self.user = create_user("customer")
+        self.service = create_service(duration=90)
+
+    def _window(self, booking):
+        booking.refresh_from_db()
+        return booking.scheduled_start, booking.scheduled_end
+
+    def test_window_is_computed_on_save(self):
+        booking = create_booking(self.user, self.service, booking_time=datetime.time(9, 30))
+        start = timezone.make_aware(datetime.datetime.combine(booking.booking_date, datetime.time(9, 30)))
+        self.assertEqual(self._window(booking), (start, start + datetime.timedelta(minutes=90)))
+
+        # A partial save that moves the appointment carries the window with it
+        booking.booking_time = datetime.time(14, 0)
+        booking.save(update_fields=["booking_time"])
+        start = start.replace(hour=14, minute=0)
+        self.assertEqual(self._window(booking), (start, start + datetime.timedelta(minutes=90)))
+
+    def test_migration_backfills_existing_bookings(self):
+        from django.apps import apps
+        migration = importlib.import_module("bookings.migrations.0011_booking_scheduled_start_end")
+        booking = create_booking(self.user, self.service)
+        expected = self._window(booking)
+        Booking.objects.update(scheduled_start=None, scheduled_end=None)
+
+        migration.backfill_schedule(apps, None)
+
+        self.assertEqual(self._window(booking), expected)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class JobDispatchTests(TestCase):
+    """New jobs are pushed only to providers who could accept them."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        from providers.models import ProviderDetails, ProviderService
+        cache.clear()
+        self.service = create_service()
+        other_service = create_service(name="Plumbing", category="Repairs")
+
+        def provider(username, service, is_active=True, is_provider=True):
+            user = create_user(username, is_provider=is_provider)
+            details = ProviderDetails.objects.create(user=user, is_active=is_active)
+            ProviderService.objects.create(provider=details, service=service)
+            return user
+
+        self.eligible = [provider("pro1", self.service), provider("pro2", self.service)]
+        provider("blocked", self.service, is_active=False)
+        provider("demoted", self.service, is_provider=False)
+        provider("plumber", other_service)
+        # A provider booking a service they offer is not sent their own job
+        self.user = provider("customer", self.service)
+
+    def _pushed(self, announce, booking):
+        with mock.patch("notifications.fanout.fan_out_sync") as fan_out, \
+                self.captureOnCommitCallbacks(execute=True):
+            announce(booking)
+        return {
+            (group, event["type"]) for call in fan_out.call_args_list for group, event in call.args[0]
+        }
+
+    def test_new_job_reaches_only_eligible_providers(self):
+        from bookings.dispatch import announce_new_job
+        booking = create_booking(self.user, self.service, is_advance_paid=True)
+
+        self.assertEqual(
+            self._pushed(announce_new_job, booking),
+            {(f"user_{p.id}", "job_available") for p in self.eligible},
+        )
+
+    def test_unpaid_or_assigned_jobs_are_not_announced(self):
+        from bookings.dispatch import announce_new_job
+        unpaid = create_booking(self.user, self.service)
+        assigned = create_booking(self.user, self.service, is_advance_paid=True, provider=self.eligible[0])
+
+        self.assertEqual(self._pushed(announce_new_job, unpaid), set())
+        self.assertEqual(self._pushed(announce_new_job, assigned), set())
+
+    def test_taken_job_is_withdrawn_from_the_others(self):
+        from bookings.dispatch import announce_job_taken
+        booking = create_booking(self.user, self.service, is_advance_paid=True, provider=self.eligible[0])
+
+        self.assertEqual(
+            self._pushed(announce_job_taken, booking), {(f"user_{self.eligible[1].id}", "job_taken")}
+        )
+
+
+class BookingStatsTests(TestCase):
+    """The daily rollup always agrees with aggregates computed from the bookings table."""
+
+    def setUp(self):
+        self.user = create_user("customer")
+        self.provider = create_user("pro", is_provider=True)
+        self.service = create_service()
+
+    def _live(self):
+        """{cell: (count, revenue)} straight from the bookings table."""
+        live = {}
+        for b in Booking.objects.all():
+            key = (timezone.localdate(b.created_at), b.service_id, b.provider_id or 0, b.status)
+            count, revenue = live.get(key, (0, Decimal("0")))
+            live[key] = (count + 1, revenue + b.price)
+        return live
+
+    def _rollup(self):
+        from bookings.models import DailyBookingStats
+        return {
+            (c.day, c.service_id, c.provider_user_id, c.status): (c.count, c.revenue)
+            for c in DailyBookingStats.objects.filter(count__gt=0)
+        }
+
+    def test_rollup_follows_booking_changes(self):
+        accepted = create_booking(self.user, self.service)
+        cancelled = create_booking(self.user, self.service, price=Decimal("750.00"))
+        deleted = create_booking(self.user, self.service)
+        create_booking(self.user, self.service, days_ahead=-1)
+
+        accepted.provider, accepted.status = self.provider, "confirmed"
+        accepted.save()
+        cancelled.status = "cancelled"
+        cancelled.save()
+        deleted.delete()
+        call_command("expire_bookings", stdout=io.StringIO())
+
+        self.assertEqual(self._rollup(), self._live())
+
+    def test_reconcile_repairs_drift(self):
+        for _ in range(3):
+            create_booking(self.user, self.service)
+        # Raw edits bypass the signals that keep the rollup current
+        Booking.objects.update(status="completed", provider=self.provider)
+        self.assertNotEqual(self._rollup(), self._live())
+
+        out = io.StringIO()
+        call_command("reconcile_booking_stats", stdout=out)
+
+        self.assertEqual(self._rollup(), self._live())
+        self.assertIn("1 cell(s)", out.getvalue())
+
+
+class ProviderScheduleConflictTests(TestCase):
+    """A provider can't hold two active bookings whose windows overlap."""
+
+    def setUp(self):
+        self.user = create_user("customer")
+        self.provider = create_user("pro", is_provider=True)
+        self.service = create_service(duration=120)
+
+    def _accept(self, booking):
+        booking.provider = self.provider
+        booking.status = "confirmed"
+        with transaction.atomic():
+            save_with_schedule_check(booking, update_fields=["provider", "status", "updated_at"])
+
+    def test_second_overlapping_accept_is_refused(self):
+        first = create_booking(self.user, self.service, booking_time=datetime.time(10, 0))
+        second = create_booking(self.user, self.service, booking_time=datetime.time(11, 0))
+        later = create_booking(self.user, self.service, booking_time=datetime.time(12, 0))
+
+        self._accept(first)
+        with self.assertRaises(ScheduleConflict):
+            self._accept(second)
+        self._accept(later)  # starts when the first one ends
+
+        second.refresh_from_db()
+        self.assertEqual((second.status, second.provider_id), ("pending", None))
+
+    def test_migration_stops_on_existing_overlaps(self):
+        from django.apps import apps
+        migration = importlib.import_module("bookings.migrations.0012_booking_provider_no_overlap")
+        kept = create_booking(self.user, self.service, provider=self.provider, status="in_progress")
+        clashing = create_booking(self.user, self.service, provider=self.provider, status="confirmed")
+        create_booking(self.user, self.service, days_ahead=4, provider=self.provider, status="confirmed")
+
+        with self.assertRaisesMessage(RuntimeError, f"#{kept.pk}/#{clashing.pk}"):
+            migration.check_no_overlaps(apps, None)
+
+        # Nothing is changed for them
+        clashing.refresh_from_db()
+        self.assertEqual((clashing.status, clashing.provider_id), ("confirmed", self.provider.pk))
+
+        clashing.status = "cancelled"
+        clashing.save()
+        migration.check_no_overlaps(apps, None)
+
+
+class ProviderAssignedOrderTests(TestCase):
+    """The provider's assigned list is ordered by appointment, paged or not."""
+
+    def setUp(self):
+        from providers.models import ProviderDetails
+        user = create_user("customer")
+        self.provider = create_user("pro", is_provider=True)
+        ProviderDetails.objects.create(user=self.provider)
+        service = create_service()
+        # Created in a different order than they are scheduled
+        for days_ahead in (5, 2, 9, 2, 7, 1):
+            create_booking(user, service, days_ahead=days_ahead, provider=self.provider, status="confirmed")
+        self.client = APIClient()
+        self.client.force_authenticate(self.provider)
+        self.url = reverse("provider-my-appointments")
+
+    def _ids(self, response):
+        self.assertEqual(response.status_code, 200)
+        data = response.data
+        return [row["id"] for row in (data if isinstance(data, list) else data["results"])]
+
+    def test_cursor_and_unpaginated_orders_match(self):
+        expected = self._ids(self.client.get(self.url, {"no_pagination": "true"}))
+        starts = list(Booking.objects.filter(pk__in=expected).order_by("-scheduled_start", "-id").values_list("pk", flat=True))
+        self.assertEqual(expected, starts)
+
+        first = self.client.get(self.url, {"page_size": 3})
+        by_cursor = self._ids(first) + self._ids(self.client.get(first.data["next"]))
+        self.assertEqual(by_cursor, expected)
+
+    def test_page_numbers_are_ignored(self):
+        # Shipped clients send ?page=; they still get keyset pages and links
+        response = self.client.get(self.url, {"page": 2, "page_size": 3})
+        self.assertEqual(self._ids(response), self._ids(self.client.get(self.url, {"page_size": 3})))
+        self.assertIn("cursor=", response.data["next"])
@@ -11,6 +11,8 @@ from .models import Booking
 
 logger = logging.getLogger(__name__)
 from .serializers import BookingSerializer
+from .dispatch import announce_job_taken
+from .scheduling import ScheduleConflict, save_with_schedule_check
 from core.permissions import IsProviderUser, IsAdminUserCustom
 from datetime import datetime, timedelta, date
 
@@ -19,26 +21,6 @@ from providers.models import ProviderService
 from django.utils import timezone
 
 
-def cancel_expired_pending_bookings():
-    """
-    Lazy evaluation: find all 'pending' bookings whose booking_date + booking_time
-    is in the past, and cancel them. The post_save signal handles the refund.
-    """
-    now = timezone.now()
-    pending_bookings = Booking.objects.filter(status='pending')
-    for booking in pending_bookings:
-        if booking.booking_date and booking.booking_time:
-            booking_dt_naive = datetime.combine(booking.booking_date, booking.booking_time)
-            try:
-                booking_dt_aware = timezone.make_aware(booking_dt_naive)
-                if booking_dt_aware < now:
-                    booking.status = 'cancelled'
-                    booking.save(update_fields=['status', 'updated_at'])
-            except Exception as e:
-                logger.error(f"Error checking expiration for booking {booking.id}: {e}")
-
-
-
 # ---------------------------------------------------------------------------
 # Helper permission (provider OR admin)
 # ---------------------------------------------------------------------------
@@ -63,10 +45,9 @@ class BookingListCreateView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        cancel_expired_pending_bookings()
         from core.pagination import LargeResultsSetPagination
         user = request.user
-        qs = Booking.objects.filter(user=user).select_related("service", "provider", "address", "user")
+        qs = BookingSerializer.setup_eager_loading(Booking.objects.filter(user=user))
 
         # Basic filtering
         status_param = request.query_params.get('status')
@@ -148,7 +129,6 @@ class ProviderBookingsView(APIView):
     permission_classes = [IsProviderUser]
 
     def get(self, request):
-        cancel_expired_pending_bookings()
         provider = request.user
 
         # ensure provider profile exists
@@ -168,7 +148,8 @@ class ProviderBookingsView(APIView):
             is_advance_paid=True  # Only show paid bookings to providers
         ).exclude(
             user=provider
-        ).select_related("service", "provider", "address", "user").order_by("-created_at")
+        ).order_by("-created_at")
+        qs = BookingSerializer.setup_eager_loading(qs)
 
         # Filtering
         service_filter = request.query_params.get('service')
@@ -222,48 +203,23 @@ class ProviderAcceptBookingView(APIView):
         if not provider_details.services.filter(service_id=booking.service_id).exists():
             return Response({"error": "You are not approved to accept this service."}, status=status.HTTP_403_FORBIDDEN)
 
-        # ✅ Overlap Check
-        # Generate the start and end datetime for the incoming booking
-        if not booking.booking_date or not booking.booking_time:
+        if not booking.scheduled_start or not booking.scheduled_end:
             return Response({"error": "Booking is missing date or time."}, status=status.HTTP_400_BAD_REQUEST)
 
-        incoming_start = datetime.combine(booking.booking_date, booking.booking_time)
-        try:
-            # Service duration is assumed to be in minutes
-            incoming_duration = booking.service.duration
-            incoming_end = incoming_start + timedelta(minutes=incoming_duration)
-        except AttributeError:
-            # Fallback if service doesn't have a duration
-            incoming_end = incoming_start + timedelta(minutes=60)
-
-        # Fetch existing confirmed/in_progress bookings for the provider on the same date
-        existing_bookings = Booking.objects.filter(
-            provider=provider,
-            booking_date=booking.booking_date,
-            status__in=["confirmed", "in_progress"]
-        ).select_related("service")
-
-        for existing in existing_bookings:
-            if not existing.booking_time:
-                continue
-            
-            existing_start = datetime.combine(existing.booking_date, existing.booking_time)
-            try:
-                existing_duration = existing.service.duration
-                existing_end = existing_start + timedelta(minutes=existing_duration)
-            except AttributeError:
-                existing_end = existing_start + timedelta(minutes=60)
-            
-            # Check for overlap: new_start < existing_end AND new_end > existing_start
-            if incoming_start < existing_end and incoming_end > existing_start:
-                return Response(
-                    {"error": "You already have a confirmed or in-progress booking at this time."},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-
+        # ✅ Overlap Check: one indexed range query under a per-provider lock
+        # (plus the exclusion constraint on PostgreSQL), see bookings/scheduling.py
         booking.provider = provider
         booking.status = "confirmed"
-        booking.save(update_fields=["provider", "status", "updated_at"])
+        try:
+            save_with_schedule_check(booking, update_fields=["provider", "status", "updated_at"])
+        except ScheduleConflict:
+            return Response(
+                {"error": "You already have a confirmed or in-progress booking at this time."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Let the other eligible providers drop this job
+        announce_job_taken(booking)
 
         return Response({"message": "Booking accepted.", "data": BookingSerializer(booking, context={"request": request}).data}, status=status.HTTP_200_OK)
 
@@ -279,9 +235,9 @@ class ProviderAssignedBookingsView(APIView):
         provider = request.user
         from django.db.models import Q
         
-        qs = Booking.objects.filter(
-            provider=provider
-        ).select_related("service", "address", "user").order_by("-booking_date", "-booking_time")
+        qs = BookingSerializer.setup_eager_loading(
+            Booking.objects.filter(provider=provider)
+        ).order_by("-scheduled_start", "-id")
 
         search_query = request.query_params.get('search')
         if search_query:
@@ -305,8 +261,9 @@ class ProviderAssignedBookingsView(APIView):
             serializer = BookingSerializer(qs, many=True, context={"request": request})
             return Response(serializer.data, status=status.HTTP_200_OK)
 
-        from core.pagination import LargeResultsSetPagination
-        paginator = LargeResultsSetPagination()
+        from core.pagination import KeysetPagination
+        # Same order with and without no_pagination
+        paginator = KeysetPagination(cursor_fields=('scheduled_start', 'id'))
         result_page = paginator.paginate_queryset(qs, request)
         serializer = BookingSerializer(result_page, many=True, context={"request": request})
         return paginator.get_paginated_response(serializer.data)
@@ -320,11 +277,10 @@ class AdminBookingsView(APIView):
     permission_classes = [IsAdminUserCustom]
 
     def get(self, request):
-        cancel_expired_pending_bookings()
-        from core.pagination import LargeResultsSetPagination
+        from core.pagination import KeysetPagination
         from django.db.models import Q
         
-        qs = Booking.objects.all().select_related("service", "provider", "address", "user").order_by("-created_at")
+        qs = BookingSerializer.setup_eager_loading(Booking.objects.all()).order_by("-created_at")
 
         # Search
         search_query = request.query_params.get('search')
@@ -349,7 +305,7 @@ class AdminBookingsView(APIView):
         if date_to:
             qs = qs.filter(created_at__date__lte=date_to)
 
-        paginator = LargeResultsSetPagination()
+        paginator = KeysetPagination()
         result_page = paginator.paginate_queryset(qs, request)
         serializer = BookingSerializer(result_page, many=True, context={"request": request})
         return paginator.get_paginated_response(serializer.data)
@@ -430,8 +386,11 @@ class BookingStatusUpdateView(APIView):
 
         if new_status == "completed" and booking.status != "completed":
             # 💰 Credit provider's wallet
-            if booking.provider and not getattr(booking, 'is_provider_paid', False):
-                from wallet.models import Wallet, WalletTransaction
+            # Only the request that flips is_provider_paid credits the provider
+            if booking.provider and not getattr(booking, 'is_provider_paid', False) and \
+                    Booking.objects.filter(pk=booking.pk, is_provider_paid=False).update(is_provider_paid=True):
+                from wallet.models import Wallet
+                from wallet.services import post_entry
                 from decimal import Decimal
                 
                 # Calculate platform commission (7% capped at ₹500)
@@ -440,16 +399,7 @@ class BookingStatusUpdateView(APIView):
                 provider_earnings = price_dec - commission
                 
                 wallet, _ = Wallet.objects.get_or_create(user=booking.provider, wallet_type='provider')
-                wallet.balance = Decimal(str(wallet.balance)) + provider_earnings
-                wallet.save()
-                
-                WalletTransaction.objects.create(
-                    wallet=wallet,
-                    amount=provider_earnings,
-                    transaction_type='credit',
-                    description=f"Earnings for Booking #{booking.id} (after platform fee)",
-                    status='completed'
-                )
+                post_entry(wallet, provider_earnings, 'credit', f"Earnings for Booking #{booking.id} (after platform fee)")
                 
                 booking.is_provider_paid = True
                 # Note: we save below with update_fields, including status
@@ -469,8 +419,12 @@ class BookingStatusUpdateView(APIView):
 
         if hasattr(booking, 'is_provider_paid') and booking.is_provider_paid:
             save_fields.append("is_provider_paid")
-            
-        booking.save(update_fields=save_fields)
+
+        try:
+            save_with_schedule_check(booking, update_fields=save_fields)
+        except ScheduleConflict:
+            transaction.set_rollback(True)
+            return Response({"error": "The provider already has a confirmed or in-progress booking at this time."}, status=status.HTTP_400_BAD_REQUEST)
         booking.refresh_from_db()
 
         return Response({"message": f"Status updated to {new_status}. Provider credited: {provider_earnings if 'provider_earnings' in locals() else 'N/A'}", "data": BookingSerializer(booking, context={"request": request}).data}, status=status.HTTP_200_OK)
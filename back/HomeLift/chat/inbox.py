@@ -0,0 +1,118 @@
+"""
+chat/inbox.py
+Maintains the denormalized inbox state on ChatRoom.
+
+Every path that stores messages calls `record_messages`, which moves the
+room's last-message pointer forward and bumps the recipient's unread counter
+with one UPDATE per room. Only messages past the recipient's read watermark
+are counted, so a batch stored after the reader has already seen it (chat
+messages are broadcast before they are stored, see chat/writer.py) adds no
+phantom unread. Opening a room calls `mark_room_read`, which moves the
+reader's watermark to the last message (or to the last one their socket
+delivered, if that is newer) and resets their counter. The inbox and read
+receipts then read everything from the ChatRoom rows.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import BigIntegerField, Case, F, Q, Value, When
+
+from .models import ChatRoom
+
+
+def unread_field(room, user_id):
+    """Name of the unread counter belonging to participant `user_id`."""
+    return 'user_unread_count' if user_id == room.user_id else 'provider_unread_count'
+
+
+def _is_unread(message, watermark):
+    """Whether `message` is past a (last_read_at, last_read_message_id) watermark."""
+    at, message_id = watermark
+    return at is None or (message.created_at, message.id) > (at, message_id or 0)
+
+
+def _before(role, created_at, message_id):
+    """Rows where `role`'s read watermark is older than (created_at, message_id)."""
+    at, last_id = f'{role}_last_read_at', f'{role}_last_read_message_id'
+    return (
+        Q(**{f'{at}__isnull': True})
+        | Q(**{f'{at}__lt': created_at})
+        | Q(**{at: created_at, f'{last_id}__lt': message_id})
+    )
+
+
+def record_messages(messages):
+    """Update inbox state for newly stored messages (each with `room` loaded)."""
+    by_room = defaultdict(list)
+    for message in messages:
+        by_room[message.room_id].append(message)
+
+    with transaction.atomic():
+        # Locked so a concurrent mark-read can't move a watermark between
+        # counting against it and applying the increment
+        watermarks = {
+            pk: {'user': (user_at, user_id), 'provider': (provider_at, provider_id)}
+            for pk, user_at, user_id, provider_at, provider_id in (
+                ChatRoom.objects.select_for_update().filter(pk__in=by_room).values_list(
+                    'pk', 'user_last_read_at', 'user_last_read_message_id',
+                    'provider_last_read_at', 'provider_last_read_message_id',
+                )
+            )
+        }
+
+        for room_id, room_messages in by_room.items():
+            if room_id not in watermarks:
+                continue
+            room = room_messages[0].room
+            latest = max(room_messages, key=lambda m: (m.created_at, m.id))
+            to_provider = sum(
+                1 for m in room_messages
+                if m.sender_id == room.user_id and _is_unread(m, watermarks[room_id]['provider'])
+            )
+            to_user = sum(
+                1 for m in room_messages
+                if m.sender_id != room.user_id and _is_unread(m, watermarks[room_id]['user'])
+            )
+
+            # Only move the pointer forward, in case batches land out of order
+            is_newer = Q(last_message_at__isnull=True) | Q(last_message_at__lte=latest.created_at)
+            ChatRoom.objects.filter(pk=room_id).update(
+                last_message_id=Case(
+                    When(is_newer, then=Value(latest.id)), default=F('last_message_id'), output_field=BigIntegerField()
+                ),
+                last_message_at=Case(When(is_newer, then=Value(latest.created_at)), default=F('last_message_at')),
+                user_unread_count=F('user_unread_count') + to_user,
+                provider_unread_count=F('provider_unread_count') + to_provider,
+            )
+
+
+def mark_room_read(room, user_id, seen=None):
+    """
+    Move participant `user_id`'s read watermark up to the room's last message
+    and reset their unread counter: one single-row UPDATE, however many
+    messages were unread. `seen` is the (created_at, id) of the newest message
+    the reader was delivered; if that one isn't stored yet, the watermark
+    moves up to it instead. Returns True if anything was unread (i.e. a read
+    receipt is due).
+    """
+    role = 'user' if user_id == room.user_id else 'provider'
+    unread = Q(**{f'{role}_unread_count__gt': 0})
+    read_at, read_id = F('last_message_at'), F('last_message_id')
+    if seen is not None:
+        seen_at, seen_id = seen
+        unread |= _before(role, seen_at, seen_id)
+        seen_is_newer = (
+            Q(last_message_at__isnull=True)
+            | Q(last_message_at__lt=seen_at)
+            | Q(last_message_at=seen_at, last_message_id__lt=seen_id)
+        )
+        read_at = Case(When(seen_is_newer, then=Value(seen_at)), default=read_at)
+        read_id = Case(When(seen_is_newer, then=Value(seen_id)), default=read_id, output_field=BigIntegerField())
+
+    return bool(
+        ChatRoom.objects.filter(unread, pk=room.pk).update(**{
+            f'{role}_last_read_message_id': read_id,
+            f'{role}_last_read_at': read_at,
+            f'{role}_unread_count': 0,
+        })
+    )
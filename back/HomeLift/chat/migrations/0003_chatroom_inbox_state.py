@@ -0,0 +1,65 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_inbox_state(apps, schema_editor):
+    ChatRoom = apps.get_model('chat', 'ChatRoom')
+    ChatMessage = apps.get_model('chat', 'ChatMessage')
+
+    rooms = ChatRoom.objects.annotate(
+        unread_for_user=Count('messages', filter=Q(messages__is_read=False) & ~Q(messages__sender=models.F('user'))),
+        unread_for_provider=Count('messages', filter=Q(messages__is_read=False) & ~Q(messages__sender=models.F('provider'))),
+    )
+    for room in rooms.iterator():
+        last = ChatMessage.objects.filter(room=room).order_by('-created_at', '-id').first()
+        ChatRoom.objects.filter(pk=room.pk).update(
+            last_message=last,
+            last_message_at=last.created_at if last else None,
+            user_unread_count=room.unread_for_user,
+            provider_unread_count=room.unread_for_provider,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0013_keyset_pagination_idx'),
+        ('chat', '0002_merge_duplicate_rooms'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat.chatmessage'),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='provider_unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='user_unread_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='chatroom',
+            index=models.Index(fields=['user', '-last_message_at'], name='chatroom_user_activity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='chatroom',
+            index=models.Index(fields=['provider', '-last_message_at'], name='chatroom_provider_activity_idx'),
+        ),
+        migrations.RunPython(backfill_inbox_state, migrations.RunPython.noop),
+    ]
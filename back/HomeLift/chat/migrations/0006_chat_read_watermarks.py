@@ -0,0 +1,60 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_read_watermarks(apps, schema_editor):
+    """Each participant's watermark is the newest message from the other side they had read."""
+    ChatRoom = apps.get_model('chat', 'ChatRoom')
+    ChatMessage = apps.get_model('chat', 'ChatMessage')
+
+    for room in ChatRoom.objects.iterator():
+        updates = {}
+        for role, reader_id in (('user', room.user_id), ('provider', room.provider_id)):
+            last_read = (
+                ChatMessage.objects.filter(room=room, is_read=True)
+                .exclude(sender_id=reader_id)
+                .order_by('-created_at', '-id')
+                .first()
+            )
+            if last_read:
+                updates[f'{role}_last_read_message'] = last_read
+                updates[f'{role}_last_read_at'] = last_read.created_at
+        if updates:
+            ChatRoom.objects.filter(pk=room.pk).update(**updates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0005_chatmessage_created_at_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='provider_last_read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='provider_last_read_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat.chatmessage'),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='user_last_read_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='user_last_read_message',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat.chatmessage'),
+        ),
+        migrations.RunPython(backfill_read_watermarks, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='chatmessage',
+            name='is_read',
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Full-text search over chat messages (see core/search.py).
+# PostgreSQL only: a stored generated tsvector column plus a GIN index.
+# Other backends fall back to icontains matching.
+
+from django.db import migrations
+
+CREATE_SQL = """
+ALTER TABLE chat_chatmessage
+    ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', coalesce(content, ''))) STORED;
+CREATE INDEX chatmsg_search_vector_idx ON chat_chatmessage USING gin (search_vector);
+"""
+
+DROP_SQL = """
+DROP INDEX IF EXISTS chatmsg_search_vector_idx;
+ALTER TABLE chat_chatmessage DROP COLUMN IF EXISTS search_vector;
+"""
+
+
+def add_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_SQL)
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0006_chat_read_watermarks'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_vector, drop_search_vector),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class ChatRoom(models.Model):
@@ -25,14 +26,62 @@ class ChatRoom(models.Model):
     )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Denormalized inbox state, maintained by chat/inbox.py
+    last_message = models.ForeignKey(
+        'ChatMessage',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    user_unread_count = models.PositiveIntegerField(default=0)
+    provider_unread_count = models.PositiveIntegerField(default=0)
+
+    # Read watermarks: the last message each participant has seen, and its timestamp.
+    # A message is read by the recipient when (created_at, id) <= their watermark.
+    user_last_read_message = models.ForeignKey(
+        'ChatMessage',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    user_last_read_at = models.DateTimeField(null=True, blank=True)
+    provider_last_read_message = models.ForeignKey(
+        'ChatMessage',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    provider_last_read_at = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         # A user and provider pair should only have one chat room globally
         unique_together = ('user', 'provider')
         ordering = ['-created_at']
+        indexes = [
+            # Inbox: a participant's rooms by last activity
+            models.Index(fields=['user', '-last_message_at'], name='chatroom_user_activity_idx'),
+            models.Index(fields=['provider', '-last_message_at'], name='chatroom_provider_activity_idx'),
+        ]
 
     def __str__(self):
         return f"Chat: {self.user.username} ↔ {self.provider.username}"
 
+    def unread_count_for(self, user_id):
+        """Unread messages waiting for participant `user_id`."""
+        return self.user_unread_count if user_id == self.user_id else self.provider_unread_count
+
+    def read_watermark_for(self, user_id):
+        """(last_read_at, last_read_message_id) of participant `user_id`, or None."""
+        if user_id == self.user_id:
+            at, message_id = self.user_last_read_at, self.user_last_read_message_id
+        else:
+            at, message_id = self.provider_last_read_at, self.provider_last_read_message_id
+        return (at, message_id) if at is not None else None
+
 
 class ChatMessage(models.Model):
     room = models.ForeignKey(ChatRoom, on_delete=models.CASCADE, related_name='messages')
@@ -42,11 +91,21 @@ class ChatMessage(models.Model):
         related_name='sent_messages'
     )
     content = models.TextField()
-    is_read = models.BooleanField(default=False)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Not auto_now_add: socket messages get their timestamp when broadcast (chat/writer.py)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # History pages: newest-first per room, "before" cursor on (created_at, id)
+            models.Index(fields=['room', 'created_at', 'id'], name='chatmsg_room_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.sender.username}: {self.content[:40]}"
+
+    def is_read_in(self, room):
+        """Whether the participant who did not send this message has read it."""
+        recipient_id = room.provider_id if self.sender_id == room.user_id else room.user_id
+        watermark = room.read_watermark_for(recipient_id)
+        return watermark is not None and (self.created_at, self.id) <= watermark
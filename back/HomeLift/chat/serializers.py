@@ -7,30 +7,37 @@ class ChatMessageSerializer(serializers.ModelSerializer):
     sender_name = serializers.CharField(source='sender.get_full_name', read_only=True)
     sender_username = serializers.CharField(source='sender.username', read_only=True)
     sender_id = serializers.IntegerField(source='sender.id', read_only=True)
+    is_read = serializers.SerializerMethodField()
 
     class Meta:
         model = ChatMessage
         fields = ['id', 'sender_id', 'sender_name', 'sender_username', 'content', 'is_read', 'created_at']
 
+    def get_is_read(self, obj):
+        # Derived from the recipient's read watermark on the room (pass `room` in context)
+        room = self.context.get('room')
+        return obj.is_read_in(room) if room else False
+
 
 class ChatRoomSerializer(serializers.ModelSerializer):
     other_user_name = serializers.SerializerMethodField()
     other_user_id = serializers.SerializerMethodField()
     last_message = serializers.SerializerMethodField()
     unread_count = serializers.SerializerMethodField()
+    other_user_online = serializers.SerializerMethodField()
     booking_id = serializers.IntegerField(source='booking.id', read_only=True, allow_null=True)
     service_name = serializers.CharField(source='booking.service.name', read_only=True, allow_null=True)
 
     class Meta:
         model = ChatRoom
-        fields = ['id', 'other_user_name', 'other_user_id', 'last_message', 'unread_count', 'booking_id', 'service_name', 'created_at']
+        fields = ['id', 'other_user_name', 'other_user_id', 'other_user_online', 'last_message', 'unread_count', 'booking_id', 'service_name', 'created_at']
 
     def get_other_user_name(self, obj):
         request = self.context.get('request')
         if not request:
             return None
         me = request.user
-        other = obj.provider if obj.user == me else obj.user
+        other = obj.provider if obj.user_id == me.id else obj.user
         return other.get_full_name() or other.username
 
     def get_other_user_id(self, obj):
@@ -38,11 +45,16 @@ class ChatRoomSerializer(serializers.ModelSerializer):
         if not request:
             return None
         me = request.user
-        other = obj.provider if obj.user == me else obj.user
-        return other.id
+        return obj.provider_id if obj.user_id == me.id else obj.user_id
+
+    def get_other_user_online(self, obj):
+        # Batch presence lookup done by the view (`online_user_ids` in context)
+        online = self.context.get('online_user_ids')
+        other_id = self.get_other_user_id(obj)
+        return bool(online is not None and other_id in online)
 
     def get_last_message(self, obj):
-        msg = obj.messages.last()
+        msg = obj.last_message
         if msg:
             return {'content': msg.content, 'created_at': msg.created_at}
         return None
@@ -51,4 +63,4 @@ class ChatRoomSerializer(serializers.ModelSerializer):
         request = self.context.get('request')
         if not request:
             return 0
-        return obj.messages.filter(is_read=False).exclude(sender=request.user).count()
+        return obj.unread_count_for(request.user.id)
@@ -0,0 +1,304 @@
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.db import OperationalError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings.tests.factories import create_user
+from chat import writer
+from chat.inbox import mark_room_read, record_messages
+from chat.models import ChatMessage, ChatRoom
+from chat.writer import persist_each, persist_messages
+
+
+class ChatRoomFixtures:
+    """TestCase mixin: a room between `self.customer` and `self.provider`, and buffered messages."""
+
+    def setUp(self):
+        super().setUp()
+        self.customer = create_user("customer")
+        self.provider = create_user("provider", is_provider=True)
+        self.room = ChatRoom.objects.create(user=self.customer, provider=self.provider)
+        self.next_id = 1000
+
+    def _buffered(self, count=1):
+        """Messages from the provider as the writer builds them: id and timestamp set, not stored."""
+        messages = []
+        for _ in range(count):
+            self.next_id += 1
+            messages.append(ChatMessage(
+                id=self.next_id, room=self.room, sender=self.provider, content="hi",
+                created_at=timezone.now() + timedelta(microseconds=self.next_id),
+            ))
+        return messages
+
+    def _unread(self):
+        self.room.refresh_from_db()
+        return self.room.user_unread_count
+
+
+class WriteBehindInboxTests(ChatRoomFixtures, TestCase):
+    """Unread counters stay right when a flush is replayed or lands after a mark-read."""
+
+    def test_replayed_flush_counts_messages_once(self):
+        batch = self._buffered(3)
+        persist_messages(batch)
+        persist_messages(batch)
+        persist_messages(batch + self._buffered())
+
+        self.assertEqual(ChatMessage.objects.filter(room=self.room).count(), 4)
+        self.assertEqual(self._unread(), 4)
+
+    def test_mark_read_before_flush_leaves_no_phantom_unread(self):
+        persist_messages(self._buffered())
+        batch = self._buffered(2)
+        # The customer's socket delivered the batch and they read it before it was stored
+        newest = batch[-1]
+        self.assertTrue(mark_room_read(self.room, self.customer.id, seen=(newest.created_at, newest.id)))
+
+        persist_messages(batch)
+        self.assertEqual(self._unread(), 0)
+        self.assertTrue(batch[0].is_read_in(self.room))
+
+        persist_messages(self._buffered())
+        self.assertEqual(self._unread(), 1)
+
+
+@override_settings(CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}})
+class MessageHistoryViewTests(ChatRoomFixtures, TestCase):
+    """History pages walk back with ?before= and only the newest page marks the room read."""
+
+    def setUp(self):
+        super().setUp()
+        self.messages = self._buffered(5)
+        persist_messages(self.messages)
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+        self.url = f"/chat/rooms/{self.room.id}/messages/"
+
+    def _ids(self, response):
+        return [m['id'] for m in response.data['results']]
+
+    def test_before_pages_back_through_history(self):
+        ids = [m.id for m in self.messages]
+
+        newest = self.client.get(self.url, {'limit': 2})
+        self.assertEqual(self._ids(newest), ids[3:])
+        self.assertTrue(newest.data['has_more'])
+        self.assertEqual(newest.data['next_before'], ids[3])
+
+        older = self.client.get(self.url, {'limit': 2, 'before': newest.data['next_before']})
+        self.assertEqual(self._ids(older), ids[1:3])
+        self.assertEqual(older.data['next_before'], ids[1])
+
+        oldest = self.client.get(self.url, {'limit': 2, 'before': older.data['next_before']})
+        self.assertEqual(self._ids(oldest), ids[:1])
+        self.assertFalse(oldest.data['has_more'])
+        self.assertIsNone(oldest.data['next_before'])
+
+    def test_older_pages_leave_read_state_alone(self):
+        response = self.client.get(self.url, {'before': self.messages[-1].id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._unread(), 5)
+
+        self.client.get(self.url)
+        self.assertEqual(self._unread(), 0)
+
+    def test_before_must_be_a_message_id(self):
+        response = self.client.get(self.url, {'before': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+)
+class ChatInboxViewTests(ChatRoomFixtures, TestCase):
+    """The inbox reads unread counts and last messages kept on the rooms by send and read."""
+
+    def setUp(self):
+        super().setUp()
+        self.quiet_room = ChatRoom.objects.create(user=self.customer, provider=create_user("other", is_provider=True))
+        self.customer_client = self._client(self.customer)
+        self.provider_client = self._client(self.provider)
+
+    def _client(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client
+
+    def _send(self, client, content):
+        response = client.post(f"/chat/rooms/{self.room.id}/messages/", {'content': content})
+        self.assertEqual(response.status_code, 201)
+
+    def _inbox(self, client):
+        response = client.get("/chat/rooms/")
+        self.assertEqual(response.status_code, 200)
+        return [(r['id'], r['unread_count'], (r['last_message'] or {}).get('content')) for r in response.data]
+
+    def test_unread_counts_follow_send_and_read(self):
+        self._send(self.provider_client, "On my way")
+        self._send(self.provider_client, "Running late")
+
+        self.assertEqual(self._inbox(self.customer_client), [
+            (self.room.id, 2, "Running late"), (self.quiet_room.id, 0, None),
+        ])
+        self.assertEqual(self._inbox(self.provider_client), [(self.room.id, 0, "Running late")])
+
+        self.customer_client.get(f"/chat/rooms/{self.room.id}/messages/")
+        self._send(self.customer_client, "No problem")
+
+        self.assertEqual(self._inbox(self.customer_client)[0], (self.room.id, 0, "No problem"))
+        self.assertEqual(self._inbox(self.provider_client), [(self.room.id, 1, "No problem")])
+
+    def test_inbox_query_count_does_not_grow_with_messages(self):
+        self._send(self.provider_client, "hi")
+        with self.assertNumQueries(1):
+            self._inbox(self.customer_client)
+        for _ in range(5):
+            self._send(self.provider_client, "hi")
+        with self.assertNumQueries(1):
+            self._inbox(self.customer_client)
+
+
+class ReadWatermarkTests(ChatRoomFixtures, TestCase):
+    """Read state is one watermark per participant, moved forward only."""
+
+    def _read_flags(self):
+        self.room.refresh_from_db()
+        return [m.is_read_in(self.room) for m in self.room.messages.order_by('created_at', 'id')]
+
+    def test_reading_marks_everything_up_to_the_watermark(self):
+        persist_messages(self._buffered(2))
+        self.assertEqual(self._read_flags(), [False, False])
+
+        self.assertTrue(mark_room_read(self.room, self.customer.id))
+        persist_messages(self._buffered())
+        self.assertEqual(self._read_flags(), [True, True, False])
+        self.assertEqual(self._unread(), 1)
+
+    def test_watermark_never_moves_back(self):
+        batch = self._buffered(3)
+        persist_messages(batch)
+        mark_room_read(self.room, self.customer.id)
+
+        # A late receipt for an older message, e.g. from a second tab
+        oldest = batch[0]
+        self.assertFalse(mark_room_read(self.room, self.customer.id, seen=(oldest.created_at, oldest.id)))
+        self.assertEqual(self._read_flags(), [True, True, True])
+        self.assertEqual(self.room.read_watermark_for(self.customer.id), (batch[-1].created_at, batch[-1].id))
+
+    def test_own_messages_do_not_count_as_unread(self):
+        reply = ChatMessage(room=self.room, sender=self.customer, content="thanks", created_at=timezone.now())
+        reply.save()
+        record_messages([reply])
+
+        self.assertEqual(self._unread(), 0)
+        self.assertEqual(self.room.provider_unread_count, 1)
+        self.assertFalse(mark_room_read(self.room, self.customer.id))
+
+
+class ChatMessageSearchTests(ChatRoomFixtures, TestCase):
+    """Staff search over chat messages: every word must match, optionally within one room."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(create_user("admin", is_staff=True))
+        other_room = ChatRoom.objects.create(user=create_user("other"), provider=self.provider)
+        self.leak = self._message(self.room, "The kitchen sink is leaking again")
+        self.refund = self._message(self.room, "When will my refund arrive?")
+        self.other_leak = self._message(other_room, "Small leak under the bathroom sink")
+
+    def _message(self, room, content):
+        return ChatMessage.objects.create(room=room, sender=self.provider, content=content)
+
+    def _search(self, q, **params):
+        response = self.client.get("/chat/admin/search/", {"q": q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [m["id"] for m in response.data["results"]]
+
+    def test_all_words_must_match(self):
+        self.assertEqual(self._search("kitchen sink"), [self.leak.id])
+        self.assertEqual(self._search("REFUND"), [self.refund.id])
+        self.assertEqual(self._search("refund sink"), [])
+
+    def test_room_filter(self):
+        self.assertEqual(set(self._search("sink")), {self.leak.id, self.other_leak.id})
+        self.assertEqual(self._search("sink", room=self.room.id), [self.leak.id])
+
+    def test_query_is_required(self):
+        response = self.client.get("/chat/admin/search/", {"q": "  "})
+        self.assertEqual(response.status_code, 400)
+
+    @unittest.skipUnless(connection.vendor == "postgresql", "stemming and ranking need PostgreSQL full-text search")
+    def test_stemmed_ranked_websearch(self):
+        repeated = self._message(self.room, "leak leak leak, the sink leaks everywhere")
+        # "leaks" finds "leaking"/"leak"; the message using the words most ranks first
+        results = self._search("leaks sink")
+        self.assertEqual(results[0], repeated.id)
+        self.assertEqual(set(results), {repeated.id, self.leak.id, self.other_leak.id})
+        self.assertEqual(self._search('leak -kitchen -everywhere'), [self.other_leak.id])
+        self.assertEqual(self._search('"bathroom sink"'), [self.other_leak.id])
+
+
+class FailingFlushTests(ChatRoomFixtures, TransactionTestCase):
+    """A batch that keeps failing is written message by message; rejected messages are dropped."""
+
+    def test_message_for_deleted_room_is_dropped(self):
+        gone = ChatRoom.objects.create(user=create_user("other"), provider=self.provider)
+        orphan = ChatMessage(
+            id=999, room_id=gone.pk, sender=self.provider, content="lost", created_at=timezone.now()
+        )
+        gone.delete()
+        batch = self._buffered() + [orphan] + self._buffered()
+
+        with self.assertLogs("chat.writer", "ERROR") as logs:
+            self.assertEqual(persist_each(batch), [])
+        self.assertIn("Dropping chat message 999", logs.output[0])
+        self.assertEqual(ChatMessage.objects.count(), 2)
+        self.assertEqual(self._unread(), 2)
+
+    def test_unavailable_database_keeps_the_rest(self):
+        batch = self._buffered(3)
+        with mock.patch("chat.writer.persist_messages", side_effect=[None, OperationalError("down")]), \
+                self.assertLogs("chat.writer", "ERROR"):
+            self.assertEqual(persist_each(batch), batch[1:])
+
+    @mock.patch("chat.writer.RETRY_BACKOFF", (0, 0))
+    def test_flush_falls_back_after_max_attempts(self):
+        message_writer = writer.MessageWriter()
+        message_writer._buffer = self._buffered(2)
+        with mock.patch("chat.writer.persist_messages", side_effect=OperationalError("boom")) as persist, \
+                mock.patch("chat.writer.persist_each", return_value=[]) as each, \
+                self.assertLogs("chat.writer", "ERROR"):
+            async_to_sync(message_writer.flush)()
+        self.assertEqual(persist.call_count, writer.MAX_BATCH_ATTEMPTS)
+        self.assertEqual(each.call_count, 1)
+
+
+@unittest.skipUnless(connection.vendor == "postgresql", "write-behind needs a PostgreSQL sequence")
+class MessageWriterTests(ChatRoomFixtures, TransactionTestCase):
+    """Socket messages get their ids up front and are stored by the next flush."""
+
+    def test_submitted_messages_are_stored_once(self):
+        message_writer = writer.MessageWriter()
+
+        async def send():
+            first = await message_writer.submit(self.room, self.provider, "one")
+            second = await message_writer.submit(self.room, self.provider, "two")
+            await message_writer.flush()
+            return first, second
+
+        first, second = async_to_sync(send)()
+        self.assertLess(first.id, second.id)
+        self.assertEqual(
+            list(ChatMessage.objects.filter(room=self.room).values_list("id", "content")),
+            [(first.id, "one"), (second.id, "two")],
+        )
+        persist_messages([first, second])
+        self.assertEqual(self._unread(), 2)
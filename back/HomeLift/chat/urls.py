@@ -1,7 +1,8 @@
 from django.urls import path
-from .views import ChatRoomListView, ChatMessageListView
+from .views import ChatRoomListView, ChatMessageListView, ChatMessageSearchView
 
 urlpatterns = [
     path('rooms/', ChatRoomListView.as_view(), name='chat-rooms'),
     path('rooms/<int:room_id>/messages/', ChatMessageListView.as_view(), name='chat-messages'),
+    path('admin/search/', ChatMessageSearchView.as_view(), name='chat-admin-search'),
 ]
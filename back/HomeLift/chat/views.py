@@ -5,12 +5,19 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 
+from django.db.models import F, Q, Subquery
+
+from .inbox import mark_room_read, record_messages
 from .models import ChatRoom, ChatMessage
 from .serializers import ChatRoomSerializer, ChatMessageSerializer
 from bookings.models import Booking
+from core.permissions import IsAdminUserCustom
 
 logger = logging.getLogger(__name__)
 
+HISTORY_PAGE_SIZE = 50
+MAX_HISTORY_PAGE_SIZE = 200
+
 
 class ChatRoomListView(APIView):
     """
@@ -22,11 +29,22 @@ class ChatRoomListView(APIView):
 
     def get(self, request):
         try:
-            rooms = (
-                ChatRoom.objects.filter(user=request.user) |
-                ChatRoom.objects.filter(provider=request.user)
-            ).distinct().order_by('-created_at').prefetch_related('messages')
-            serializer = ChatRoomSerializer(rooms, many=True, context={'request': request})
+            # Inbox state is denormalized on ChatRoom (chat/inbox.py): one query,
+            # independent of how many messages the rooms hold
+            rooms = ChatRoom.objects.filter(
+                Q(user=request.user) | Q(provider=request.user)
+            ).select_related(
+                'user', 'provider', 'booking__service', 'last_message'
+            ).order_by(F('last_message_at').desc(nulls_last=True), '-created_at')
+
+            from notifications.presence import online_user_ids
+            rooms = list(rooms)
+            online = online_user_ids(
+                room.provider_id if room.user_id == request.user.id else room.user_id for room in rooms
+            )
+            serializer = ChatRoomSerializer(
+                rooms, many=True, context={'request': request, 'online_user_ids': online}
+            )
             return Response(serializer.data)
         except Exception as e:
             logger.exception("ChatRoomListView.get failed for user %s: %s", request.user.id, e)
@@ -81,6 +99,9 @@ class ChatRoomListView(APIView):
                 provider=provider_in_room,
                 defaults={'booking': booking}
             )
+            if created:
+                # Let open sockets of both participants learn about the room
+                self._broadcast_room_created(room)
             serializer = ChatRoomSerializer(room, context={'request': request})
             return Response(
                 serializer.data,
@@ -94,9 +115,28 @@ class ChatRoomListView(APIView):
             )
 
 
+    @staticmethod
+    def _broadcast_room_created(room):
+        try:
+            from notifications.fanout import fan_out_sync, user_group
+            event = {
+                "type": "chat_room_created",
+                "payload": {
+                    "room_id": room.id,
+                    "user_id": room.user_id,
+                    "provider_id": room.provider_id,
+                }
+            }
+            fan_out_sync((user_group(pid), event) for pid in [room.user_id, room.provider_id])
+        except Exception as e:
+            logger.warning("Failed to broadcast room creation for room %s: %s", room.id, e)
+
+
 class ChatMessageListView(APIView):
     """
-    GET  /chat/rooms/<room_id>/messages/  → get message history & mark as read
+    GET  /chat/rooms/<room_id>/messages/  → newest page of history & mark as read
+         ?before=<message_id>             → the page of messages older than that one (read state untouched)
+         ?limit=<n>                       → page size (default 50, max 200)
     POST /chat/rooms/<room_id>/messages/  → send a message (REST fallback)
     """
     permission_classes = [IsAuthenticated]
@@ -117,19 +157,49 @@ class ChatMessageListView(APIView):
             if err:
                 return err
 
-            # Mark messages from the other participant as read
-            updated = room.messages.filter(
-                is_read=False
-            ).exclude(sender=request.user).update(is_read=True)
+            try:
+                limit = min(max(int(request.query_params.get('limit', HISTORY_PAGE_SIZE)), 1), MAX_HISTORY_PAGE_SIZE)
+            except ValueError:
+                return Response({'detail': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+            before = request.query_params.get('before')
+
+            # Opening the room moves this participant's read watermark to the newest
+            # message; scrolling back through older pages leaves it alone
+            updated = (
+                not before
+                and room.unread_count_for(request.user.id)
+                and mark_room_read(room, request.user.id)
+            )
 
             # Broadcast read receipt to the other participant so their UI updates
             if updated:
                 other_user = room.provider if room.user == request.user else room.user
                 self._broadcast_read_receipt(room.id, request.user.id, other_user.id)
 
-            messages = room.messages.select_related('sender').all()
-            serializer = ChatMessageSerializer(messages, many=True)
-            return Response(serializer.data)
+            messages = room.messages.select_related('sender')
+            if before:
+                if not before.isdigit():
+                    return Response({'detail': 'before must be a message id.'}, status=status.HTTP_400_BAD_REQUEST)
+                # Strictly older than the anchor message, ordered by (created_at, id)
+                anchor = Subquery(room.messages.filter(pk=before).values('created_at')[:1])
+                messages = messages.filter(
+                    Q(created_at__lt=anchor) | Q(created_at=anchor, id__lt=before)
+                )
+
+            # Newest page first from the (room, created_at, id) index, returned oldest → newest
+            page = list(messages.order_by('-created_at', '-id')[:limit + 1])
+            has_more = len(page) > limit
+            page = page[:limit][::-1]
+
+            if updated:
+                # Pick up the watermark just written (is_read of received messages)
+                room.refresh_from_db()
+            serializer = ChatMessageSerializer(page, many=True, context={'room': room})
+            return Response({
+                'results': serializer.data,
+                'has_more': has_more,
+                'next_before': page[0].id if has_more else None,
+            })
 
         except Exception as e:
             logger.exception("ChatMessageListView.get failed for room %s, user %s: %s",
@@ -150,6 +220,7 @@ class ChatMessageListView(APIView):
                 return Response({'detail': 'Content is required.'}, status=status.HTTP_400_BAD_REQUEST)
 
             message = ChatMessage.objects.create(room=room, sender=request.user, content=content)
+            record_messages([message])
             serializer = ChatMessageSerializer(message)
 
             # Broadcast message via Channels to both participants
@@ -179,25 +250,18 @@ class ChatMessageListView(APIView):
     @staticmethod
     def _broadcast_chat_message(room, payload):
         try:
-            from channels.layers import get_channel_layer
-            from asgiref.sync import async_to_sync
-            channel_layer = get_channel_layer()
-            for pid in [room.user_id, room.provider_id]:
-                async_to_sync(channel_layer.group_send)(
-                    f"user_{pid}",
-                    {"type": "chat_message", "payload": payload}
-                )
+            from notifications.fanout import fan_out_sync, user_group
+            event = {"type": "chat_message", "payload": payload}
+            fan_out_sync((user_group(pid), event) for pid in [room.user_id, room.provider_id])
         except Exception as e:
             logger.warning("Failed to broadcast chat message for room %s: %s", room.id, e)
 
     @staticmethod
     def _broadcast_read_receipt(room_id, reader_id, other_user_id):
         try:
-            from channels.layers import get_channel_layer
-            from asgiref.sync import async_to_sync
-            channel_layer = get_channel_layer()
-            async_to_sync(channel_layer.group_send)(
-                f"user_{other_user_id}",
+            from notifications.fanout import fan_out_sync, user_group
+            fan_out_sync([(
+                user_group(other_user_id),
                 {
                     "type": "read_receipt",
                     "payload": {
@@ -205,6 +269,45 @@ class ChatMessageListView(APIView):
                         "reader_id": reader_id,
                     }
                 }
-            )
+            )])
         except Exception as e:
             logger.warning("Failed to broadcast read receipt for room %s: %s", room_id, e)
+
+
+class ChatMessageSearchView(APIView):
+    """
+    GET /chat/admin/search/?q=<words>   → support staff: ranked full-text search
+                                          over all chat messages (core/search.py)
+         &room=<room_id>                → only within one room
+         &limit=<n>                     → number of results (default 50, max 200)
+    """
+    permission_classes = [IsAdminUserCustom]
+
+    def get(self, request):
+        from core.search import full_text_search
+
+        query = (request.query_params.get('q') or '').strip()
+        if not query:
+            return Response({'detail': 'q is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(max(int(request.query_params.get('limit', HISTORY_PAGE_SIZE)), 1), MAX_HISTORY_PAGE_SIZE)
+        except ValueError:
+            return Response({'detail': 'limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        messages = ChatMessage.objects.all()
+        room_id = request.query_params.get('room')
+        if room_id:
+            if not room_id.isdigit():
+                return Response({'detail': 'room must be a room id.'}, status=status.HTTP_400_BAD_REQUEST)
+            messages = messages.filter(room_id=room_id)
+
+        results = list(
+            full_text_search(messages, query, ['content'])
+            .select_related('sender')
+            .order_by('-search_rank', '-created_at', '-id')[:limit]
+        )
+        data = ChatMessageSerializer(results, many=True).data
+        for item, message in zip(data, results):
+            item['room_id'] = message.room_id
+            item['rank'] = message.search_rank
+        return Response({'results': data})
@@ -0,0 +1,188 @@
+"""
+chat/writer.py
+Write-behind persistence for chat messages sent over the socket.
+
+MainConsumer hands each message to the process-wide MessageWriter, which
+gives it its final primary key (pre-allocated in blocks from the
+chat_chatmessage id sequence) and timestamp right away, so the message can
+be broadcast immediately. Buffered messages are written in micro-batches, one
+INSERT plus one inbox update per room in a single transaction, once
+FLUSH_SIZE messages are waiting or FLUSH_INTERVAL seconds after the first.
+
+Durability guarantees:
+
+- A message is broadcast *before* it is durable. It reaches the database
+  within FLUSH_INTERVAL in normal operation. A history fetch in that window
+  may not include it yet.
+- A failed flush is retried with backoff, so every message accepted by a
+  live process is persisted at least once. After MAX_BATCH_ATTEMPTS failures
+  the batch is written one message at a time: a message the database
+  rejects outright (e.g. its room was deleted) is logged with its content
+  and dropped, so it can't block the writer, and the rest keep being
+  retried. Replays are
+  idempotent: ids are pre-assigned, the INSERT skips ids already stored,
+  and only the rows it actually inserted (RETURNING id) reach the inbox
+  counters.
+- Consumers flush on disconnect. Messages still buffered when a worker
+  process dies hard are lost: at most one batch (FLUSH_SIZE messages or
+  FLUSH_INTERVAL worth).
+- Batches go in order on a single flusher, so a room's messages are stored
+  in the order they were broadcast.
+
+Pre-allocating ids needs a database sequence, so write-behind is only used on
+PostgreSQL. On other databases `enabled()` is False and the consumer writes
+synchronously.
+"""
+import asyncio
+import logging
+import weakref
+from collections import deque
+
+from channels.db import database_sync_to_async
+from django.db import DataError, IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .inbox import record_messages
+from .models import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+FLUSH_SIZE = 100
+FLUSH_INTERVAL = 0.02  # seconds
+ID_BLOCK_SIZE = 200
+RETRY_BACKOFF = (0.1, 5.0)  # initial, max seconds
+MAX_BATCH_ATTEMPTS = 3
+
+
+def enabled():
+    return connection.vendor == 'postgresql'
+
+
+def allocate_message_ids(count):
+    """Reserve `count` ChatMessage primary keys from the table's sequence."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, 'id')) FROM generate_series(1, %s)",
+            [ChatMessage._meta.db_table, count],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def insert_messages(messages):
+    """
+    INSERT pre-built messages, skipping ids that are already stored. Returns
+    the ids actually inserted.
+    """
+    fields = [f for f in ChatMessage._meta.concrete_fields if not f.generated]
+    quote = connection.ops.quote_name
+    row = f"({', '.join(['%s'] * len(fields))})"
+    params = [
+        f.get_db_prep_save(getattr(message, f.attname), connection)
+        for message in messages for f in fields
+    ]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {quote(ChatMessage._meta.db_table)} ({', '.join(quote(f.column) for f in fields)}) "
+            f"VALUES {', '.join([row] * len(messages))} "
+            f"ON CONFLICT ({quote(ChatMessage._meta.pk.column)}) DO NOTHING "
+            f"RETURNING {quote(ChatMessage._meta.pk.column)}",
+            params,
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+
+def persist_messages(messages):
+    """Store a batch of pre-built messages and update the rooms' inbox state."""
+    with transaction.atomic():
+        inserted = insert_messages(messages)
+        # A replayed batch was (partly) stored already: count only the new rows
+        record_messages([m for m in messages if m.id in inserted])
+
+
+def persist_each(messages):
+    """
+    Store messages one at a time, after their batch kept failing. Messages
+    the database rejects are logged and dropped. Returns the messages still
+    to store if the database failed for another reason (e.g. it is down).
+    """
+    for index, message in enumerate(messages):
+        try:
+            persist_messages([message])
+        except (IntegrityError, DataError):
+            logger.error(
+                "Dropping chat message %s (room %s, sender %s, sent %s): %r",
+                message.id, message.room_id, message.sender_id, message.created_at.isoformat(),
+                message.content, exc_info=True,
+            )
+        except Exception:
+            logger.exception("Chat message %s could not be stored", message.id)
+            return messages[index:]
+    return []
+
+
+class MessageWriter:
+    """Buffers messages of one event loop and flushes them in batches."""
+
+    def __init__(self):
+        self._buffer = []
+        self._ids = deque()
+        self._flush_handle = None
+        self._flush_lock = asyncio.Lock()
+
+    async def submit(self, room, sender, content):
+        """Return a ChatMessage with id and created_at set; it is persisted shortly after."""
+        if not self._ids:
+            self._ids.extend(await database_sync_to_async(allocate_message_ids)(ID_BLOCK_SIZE))
+
+        message = ChatMessage(
+            id=self._ids.popleft(), room=room, sender=sender,
+            content=content, created_at=timezone.now(),
+        )
+        self._buffer.append(message)
+
+        if len(self._buffer) >= FLUSH_SIZE:
+            asyncio.ensure_future(self.flush())
+        elif self._flush_handle is None:
+            loop = asyncio.get_running_loop()
+            self._flush_handle = loop.call_later(FLUSH_INTERVAL, lambda: asyncio.ensure_future(self.flush()))
+        return message
+
+    async def flush(self):
+        """Persist everything buffered so far, retrying until it is stored (or dropped as invalid)."""
+        async with self._flush_lock:
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+                self._flush_handle = None
+
+            batch, self._buffer = self._buffer, []
+            if not batch:
+                return
+
+            delay, max_delay = RETRY_BACKOFF
+            failures = 0
+            while True:
+                if failures < MAX_BATCH_ATTEMPTS:
+                    try:
+                        await database_sync_to_async(persist_messages)(batch)
+                        return
+                    except Exception:
+                        logger.exception("Chat flush of %s message(s) failed; retrying in %ss", len(batch), delay)
+                else:
+                    batch = await database_sync_to_async(persist_each)(batch)
+                    if not batch:
+                        return
+                failures += 1
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, max_delay)
+
+
+_writers = weakref.WeakKeyDictionary()
+
+
+def get_writer():
+    """The MessageWriter of the running event loop."""
+    loop = asyncio.get_running_loop()
+    writer = _writers.get(loop)
+    if writer is None:
+        writer = _writers[loop] = MessageWriter()
+    return writer
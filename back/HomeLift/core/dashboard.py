@@ -0,0 +1,151 @@
+"""
+core/dashboard.py
+Admin dashboard figures (AdminDashboardView) in four queries.
+
+- people: customers and providers, as conditional counts over one user scan,
+- bookings: status breakdown, completed revenue and the last-7-days series
+  as conditional sums over the daily rollup (bookings/stats.py) in range,
+- top services: one group-by on the rollup,
+- recent bookings: the five newest, from the created_at index.
+
+Results are cached in Redis for CACHE_TIMEOUT seconds per requested range, so
+a dashboard left open or several admins refreshing share one computation.
+`benchmark_dashboard` measures the query count and latency of this module.
+"""
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from bookings.models import Booking, DailyBookingStats
+from users.models import CustomUser
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "dashboard:admin"
+CACHE_TIMEOUT = 60  # seconds
+DAILY_SERIES_DAYS = 7
+# Assuming platform fee is 7% based on the History page logic
+PLATFORM_FEE = Decimal('0.07')
+
+
+def date_bounds(time_range='all_time', start_date=None, end_date=None, now=None):
+    """(start, end) datetimes of a dashboard range; either may be None (open)."""
+    now = now or timezone.now()
+    if start_date and end_date:
+        start = timezone.make_aware(datetime.strptime(start_date, '%Y-%m-%d'))
+        end = timezone.make_aware(datetime.strptime(end_date, '%Y-%m-%d')).replace(hour=23, minute=59, second=59)
+        return start, end
+    if time_range == 'this_week':
+        return (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0), None
+    if time_range == 'this_month':
+        return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0), None
+    if time_range == '2_months':
+        return now - timedelta(days=60), None
+    if time_range == '6_months':
+        return now - timedelta(days=180), None
+    if time_range == '1_year':
+        return now - timedelta(days=365), None
+    return None, None
+
+
+def compute_admin_dashboard(start=None, end=None, now=None):
+    """Build the dashboard payload for bookings/users created between start and end."""
+    now = now or timezone.now()
+
+    users_qs = CustomUser.objects.all()
+    # Booking figures come from the daily rollup: their cost depends on the
+    # number of days in range, not on total bookings. Ranges are applied at
+    # day granularity.
+    stats_qs = DailyBookingStats.objects.all()
+    if start:
+        users_qs = users_qs.filter(date_joined__gte=start)
+        stats_qs = stats_qs.filter(day__gte=timezone.localdate(start))
+    if end:
+        users_qs = users_qs.filter(date_joined__lte=end)
+        stats_qs = stats_qs.filter(day__lte=timezone.localdate(end))
+
+    # 🟢 General counts
+    people = users_qs.aggregate(
+        customers=Count('id', filter=Q(is_staff=False, is_provider=False)),
+        providers=Count('provider_details'),
+    )
+
+    # 🟢 Bookings breakdown, revenue and daily series in one pass
+    today = timezone.localdate(now)
+    days = [today - timedelta(days=offset) for offset in range(DAILY_SERIES_DAYS - 1, -1, -1)]
+    statuses = [value for value, _ in Booking.STATUS_CHOICES]
+    totals = stats_qs.aggregate(
+        revenue=Sum('revenue', filter=Q(status='completed')),
+        **{f'status_{s}': Sum('count', filter=Q(status=s)) for s in statuses},
+        **{f'day_{i}': Sum('count', filter=Q(day=day)) for i, day in enumerate(days)},
+    )
+    status_map = {s: totals[f'status_{s}'] for s in statuses if totals[f'status_{s}']}
+    total_revenue = totals['revenue'] or Decimal('0')
+
+    # 🟢 Top Services
+    top_services = list(
+        stats_qs.values('service__name').annotate(
+            count=Sum('count'),
+            revenue=Sum('revenue')
+        ).filter(count__gt=0).order_by('-count')[:5]
+    )
+
+    # 🟢 Recent Bookings
+    recent_data = [
+        {
+            "id": b.id,
+            "user": b.full_name,
+            "service": b.service.name,
+            "status": b.status,
+            "price": b.price,
+            "date": b.booking_date
+        }
+        for b in Booking.objects.select_related('service').order_by('-created_at')[:5]
+    ]
+
+    return {
+        "stats": {
+            "customers": people['customers'],
+            "providers": people['providers'],
+            "bookings": sum(status_map.values()),
+            "revenue": total_revenue,
+            "platform_revenue": total_revenue * PLATFORM_FEE,
+        },
+        "status_breakdown": status_map,
+        "recent_bookings": recent_data,
+        "top_services": top_services,
+        "daily_stats": [
+            {"date": day.strftime('%d %b'), "count": totals[f'day_{i}'] or 0}
+            for i, day in enumerate(days)
+        ],
+    }
+
+
+def cache_key(time_range='all_time', start_date=None, end_date=None, now=None):
+    day = timezone.localdate(now or timezone.now())
+    return ":".join([CACHE_KEY_PREFIX, time_range or '', start_date or '', end_date or '', day.isoformat()])
+
+
+def get_admin_dashboard(time_range='all_time', start_date=None, end_date=None):
+    """Dashboard payload for a requested range, served from cache when fresh."""
+    now = timezone.now()
+    key = cache_key(time_range, start_date, end_date, now)
+    try:
+        data = cache.get(key)
+    except Exception as e:
+        logger.warning("Dashboard cache read failed (%s); computing from the database.", e)
+        data = None
+    if data is not None:
+        return data
+
+    start, end = date_bounds(time_range, start_date, end_date, now)
+    data = compute_admin_dashboard(start, end, now)
+    try:
+        cache.set(key, data, CACHE_TIMEOUT)
+    except Exception as e:
+        logger.warning("Dashboard cache write failed: %s", e)
+    return data
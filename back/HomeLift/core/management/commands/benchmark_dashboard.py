@@ -0,0 +1,141 @@
+import logging
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from bookings import stats
+from bookings.models import Booking
+from core.dashboard import cache_key, compute_admin_dashboard, date_bounds, get_admin_dashboard
+from services.models import Category, Service
+from users.models import CustomUser
+
+logger = logging.getLogger(__name__)
+
+TIME_RANGES = ('all_time', '1_year', 'this_month', 'this_week')
+STATUSES = [value for value, _ in Booking.STATUS_CHOICES]
+
+
+class Rollback(Exception):
+    """Raised to roll the seeded dataset back."""
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic dataset and report query count and latency of the admin "
+        "dashboard (core/dashboard.py). Everything seeded is rolled back unless --keep."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=1_000_000, help="Bookings to seed (default 1M).")
+        parser.add_argument('--days', type=int, default=365, help="Spread bookings over this many days.")
+        parser.add_argument('--users', type=int, default=1000, help="Customers to seed.")
+        parser.add_argument('--providers', type=int, default=100, help="Provider accounts to seed.")
+        parser.add_argument('--repeat', type=int, default=5, help="Timed runs per range.")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per bulk insert.")
+        parser.add_argument('--keep', action='store_true', help="Commit the seeded data instead of rolling back.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options)
+                self.measure(options['repeat'])
+                if not options['keep']:
+                    raise Rollback
+        except Rollback:
+            self.stdout.write("Seeded data rolled back.")
+
+    # ---- dataset ----
+
+    def seed(self, options):
+        started = time.perf_counter()
+        tag = f"bench{int(time.time())}"
+        rng = random.Random(42)
+
+        category = Category.objects.create(name=f"{tag} category")
+        services = Service.objects.bulk_create(
+            Service(name=f"{tag} service {i}", category=category, price=Decimal('500.00'), duration=60)
+            for i in range(20)
+        )
+        customers = CustomUser.objects.bulk_create(
+            CustomUser(username=f"{tag}_u{i}", email=f"{tag}_u{i}@example.com") for i in range(options['users'])
+        )
+        providers = CustomUser.objects.bulk_create(
+            CustomUser(username=f"{tag}_p{i}", email=f"{tag}_p{i}@example.com", is_provider=True)
+            for i in range(options['providers'])
+        )
+
+        # bulk_create sets created_at to now (auto_now_add), so each day's
+        # bookings are inserted together and then moved to that day
+        today = timezone.localdate()
+        days = max(options['days'], 1)
+        per_day, extra = divmod(options['bookings'], days)
+        for offset in range(days):
+            day_start = timezone.make_aware(datetime.combine(today - timedelta(days=offset), datetime.min.time()))
+            remaining = per_day + (1 if offset < extra else 0)
+            while remaining > 0:
+                size = min(remaining, options['batch_size'])
+                created = Booking.objects.bulk_create(
+                    Booking(
+                        user=rng.choice(customers),
+                        service=rng.choice(services),
+                        provider=rng.choice(providers) if rng.random() < 0.8 else None,
+                        full_name="Benchmark", phone="9999999999",
+                        booking_date=day_start.date(), booking_time=datetime.min.time(),
+                        price=Decimal(rng.randrange(300, 5000)),
+                        status=rng.choice(STATUSES),
+                    )
+                    for _ in range(size)
+                )
+                ids = [b.pk for b in created]
+                Booking.objects.filter(pk__gte=min(ids), pk__lte=max(ids)).update(
+                    created_at=day_start + timedelta(hours=12)
+                )
+                remaining -= size
+
+        cells = stats.reconcile(today - timedelta(days=days - 1), today)
+        self.stdout.write(
+            f"Seeded {options['bookings']} bookings over {days} days "
+            f"({cells} rollup cells) in {time.perf_counter() - started:.1f}s."
+        )
+
+    # ---- measurements ----
+
+    def measure(self, repeat):
+        self.stdout.write(f"{'range':<12} {'queries':>7} {'min ms':>9} {'median ms':>10} {'cached ms':>10}")
+        for time_range in TIME_RANGES:
+            start, end = date_bounds(time_range)
+
+            timings = []
+            for _ in range(max(repeat, 1)):
+                with CaptureQueriesContext(connection) as ctx:
+                    began = time.perf_counter()
+                    compute_admin_dashboard(start, end)
+                    timings.append((time.perf_counter() - began) * 1000)
+            queries = len(ctx.captured_queries)
+
+            # Cached path: prime the entry, then time a hit
+            try:
+                get_admin_dashboard(time_range)
+                began = time.perf_counter()
+                get_admin_dashboard(time_range)
+                cached = f"{(time.perf_counter() - began) * 1000:.2f}"
+            except Exception as e:
+                logger.warning("Cached dashboard measurement failed: %s", e)
+                cached = "n/a"
+
+            self.stdout.write(
+                f"{time_range:<12} {queries:>7} {min(timings):>9.1f} {statistics.median(timings):>10.1f} {cached:>10}"
+            )
+        # Don't leave figures of the synthetic dataset in the shared cache
+        try:
+            cache.delete_many([cache_key(time_range) for time_range in TIME_RANGES])
+        except Exception as e:
+            logger.warning("Could not clear cached dashboard entries: %s", e)
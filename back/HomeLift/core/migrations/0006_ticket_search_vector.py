@@ -0,0 +1,41 @@
+# Full-text search over tickets (see core/search.py): subject weighted above
+# description. PostgreSQL only: a stored generated tsvector column plus a GIN
+# index. Other backends fall back to icontains matching.
+
+from django.db import migrations
+
+CREATE_SQL = """
+ALTER TABLE core_ticket
+    ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(subject, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'B')
+    ) STORED;
+CREATE INDEX ticket_search_vector_idx ON core_ticket USING gin (search_vector);
+"""
+
+DROP_SQL = """
+DROP INDEX IF EXISTS ticket_search_vector_idx;
+ALTER TABLE core_ticket DROP COLUMN IF EXISTS search_vector;
+"""
+
+
+def add_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_SQL)
+
+
+def drop_search_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_keyset_pagination_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_vector, drop_search_vector),
+    ]
@@ -51,5 +51,11 @@ class Ticket(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination of the admin ticket list
+            models.Index(fields=['created_at', 'id'], name='ticket_created_idx'),
+        ]
+
     def __str__(self):
         return f"[{self.status.upper()}] {self.subject} by {self.user.username}"
@@ -1,7 +1,15 @@
 """
 Custom pagination classes for the application.
 """
-from rest_framework.pagination import PageNumberPagination
+import base64
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class StandardResultsSetPagination(PageNumberPagination):
@@ -22,3 +30,117 @@ class LargeResultsSetPagination(PageNumberPagination):
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset (cursor) pagination on (created_at, id), newest first.
+
+    Each page is fetched with `WHERE (created_at, id) < <last row seen>` instead
+    of an OFFSET scan, so deep pages cost the same as the first one. Cursors are
+    opaque tokens returned in `next` / `previous`; pass them back as `?cursor=`.
+
+    - `?count=false` skips the COUNT(*) query and omits `count` from the response.
+    - There are no page numbers: `?page=` is ignored. Clients step through
+      pages with the `next` / `previous` links (frontend useCursorPages).
+    - Views sorting on another key pass `cursor_fields` (to the constructor or
+      as a view attribute); both fields must be non-null, the last unique.
+    """
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    # Descending sort key; the last field must be unique
+    cursor_fields = ('created_at', 'id')
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, cursor_fields=None):
+        if cursor_fields is not None:
+            self.cursor_fields = tuple(cursor_fields)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.cursor_fields = getattr(view, 'cursor_fields', self.cursor_fields)
+        self.page_size = self.get_page_size(request)
+        self.count = None
+        if request.query_params.get(self.count_query_param, 'true').lower() != 'false':
+            self.count = queryset.count()
+
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = bool(cursor and cursor['reverse'])
+        field, tiebreak = self.cursor_fields
+
+        if reverse:
+            queryset = queryset.order_by(field, tiebreak)
+        else:
+            queryset = queryset.order_by(f'-{field}', f'-{tiebreak}')
+
+        if cursor:
+            value, key = cursor['position']
+            op = 'gt' if reverse else 'lt'
+            queryset = queryset.filter(
+                Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'{tiebreak}__{op}': key})
+            )
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Forward: more rows after this page if we over-fetched; anything before it if we came via a cursor.
+        # Reverse (came via `previous`): the mirror image.
+        has_next = has_more if not reverse else True
+        has_previous = bool(cursor) if not reverse else has_more
+        self.next_position = self._position(rows[-1]) if rows and has_next else None
+        self.previous_position = self._position(rows[0]) if rows and has_previous else None
+        return rows
+
+    def get_paginated_response(self, data):
+        payload = {
+            'next': self.encode_cursor(self.next_position, reverse=False),
+            'previous': self.encode_cursor(self.previous_position, reverse=True),
+            'results': data,
+        }
+        if self.count is not None:
+            payload = {'count': self.count, **payload}
+        return Response(payload)
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    # ─── cursor encoding ──────────────────────────────────────────────────────
+
+    def _position(self, obj):
+        return tuple(getattr(obj, name) for name in self.cursor_fields)
+
+    def encode_cursor(self, position, reverse):
+        if position is None:
+            return None
+        value, key = position
+        token = json.dumps({'v': str(value), 'k': str(key), 'r': int(reverse)}, separators=(',', ':'))
+        encoded = base64.urlsafe_b64encode(token.encode()).decode().rstrip('=')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            token = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            field, tiebreak = (model._meta.get_field(name) for name in self.cursor_fields)
+            position = (field.to_python(token['v']), tiebreak.to_python(token['k']))
+            return {'position': position, 'reverse': bool(token.get('r'))}
+        except (TypeError, ValueError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class UserKeysetPagination(KeysetPagination):
+    """Keyset pagination for user lists, which have date_joined instead of created_at."""
+    cursor_fields = ('date_joined', 'id')
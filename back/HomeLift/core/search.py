@@ -0,0 +1,55 @@
+"""
+core/search.py
+Ranked full-text search over chat messages and tickets.
+
+PostgreSQL: each searchable table has a stored, generated `search_vector`
+tsvector column with a GIN index (chat 0007, core 0006 migrations), so it is
+always current without triggers or save hooks, including rows written with
+bulk_create. Queries use websearch_to_tsquery syntax ("quoted phrases",
+-exclusions, or) and are ranked with ts_rank.
+
+Other databases (SQLite for local testing): every word of the query must
+appear, case-insensitively, in one of the searched fields; rank is 0.
+The column is not declared on the models, so nothing else changes there.
+"""
+from django.db import connections
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'english'
+SEARCH_VECTOR_COLUMN = 'search_vector'
+
+
+def search_condition(queryset, query, fields):
+    """
+    Building blocks for callers that combine the text match with other filters.
+    Returns (queryset, condition, rank): filter the returned queryset on
+    `condition` (a Q object) and annotate it with `rank`.
+    `fields` are the text columns covered by the table's search vector; they
+    are only used by the non-PostgreSQL fallback.
+    """
+    if connections[queryset.db].vendor == 'postgresql':
+        from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+
+        table = queryset.model._meta.db_table
+        vector = RawSQL(f'"{table}"."{SEARCH_VECTOR_COLUMN}"', [], output_field=SearchVectorField())
+        ts_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+        return (
+            queryset.alias(_search_vector=vector),
+            Q(_search_vector=ts_query),
+            SearchRank(vector, ts_query),
+        )
+
+    condition = Q()
+    for term in query.split():
+        term_match = Q()
+        for field in fields:
+            term_match |= Q(**{f'{field}__icontains': term})
+        condition &= term_match
+    return queryset, condition, Value(0.0, output_field=FloatField())
+
+
+def full_text_search(queryset, query, fields):
+    """Filter `queryset` to rows matching `query`, annotated with `search_rank`."""
+    queryset, condition, rank = search_condition(queryset, query, fields)
+    return queryset.filter(condition).annotate(search_rank=rank)
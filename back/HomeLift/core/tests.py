@@ -1,3 +1,84 @@
-from django.test import TestCase
+import datetime
+from decimal import Decimal
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bookings.tests.factories import create_booking, create_service, create_user
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class AdminDashboardQueryCountTests(TestCase):
+    """The admin dashboard is a fixed handful of queries, whatever the data volume."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = create_user("admin", is_staff=True)
+        cls.user = create_user("customer")
+        cls.provider = create_user("pro", is_provider=True)
+
+        service = create_service()
+        start = datetime.date.today() + datetime.timedelta(days=7)
+        for i, status in enumerate(["completed", "completed", "pending", "cancelled"]):
+            create_booking(
+                cls.user, service, provider=cls.provider,
+                booking_date=start + datetime.timedelta(days=i), status=status,
+            )
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _get(self, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("admin-dashboard"), params)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_dashboard_query_count_and_figures(self):
+        response, queries = self._get(time_range="this_month")
+        # people counts, rollup aggregates, top services, recent bookings
+        self.assertEqual(queries, 4)
+        data = response.data
+        self.assertEqual(data["stats"]["bookings"], 4)
+        self.assertEqual(data["stats"]["customers"], 1)
+        self.assertEqual(data["stats"]["providers"], 0)
+        self.assertEqual(data["stats"]["revenue"], Decimal("2000.00"))
+        self.assertEqual(data["status_breakdown"], {"pending": 1, "completed": 2, "cancelled": 1})
+        self.assertEqual(data["daily_stats"][-1]["count"], 4)
+        self.assertEqual(data["top_services"][0]["count"], 4)
+
+    def test_repeat_requests_are_served_from_cache(self):
+        self._get(time_range="all_time")
+        _, queries = self._get(time_range="all_time")
+        self.assertEqual(queries, 0)
+
+
+class AdminTicketSearchTests(TestCase):
+    """Ticket search matches subject/description words or part of the owner's name or email."""
+
+    def setUp(self):
+        from core.models import Ticket
+        self.client = APIClient()
+        self.client.force_authenticate(create_user("admin", is_staff=True))
+        owner = create_user("priya.sharma")
+        self.leak = Ticket.objects.create(user=owner, subject="Water leak", description="Kitchen sink")
+        self.other = Ticket.objects.create(
+            user=create_user("rahul"), subject="Refund", description="Charged twice"
+        )
+
+    def _search(self, query):
+        response = self.client.get(reverse("admin-ticket-list"), {"search": query})
+        self.assertEqual(response.status_code, 200)
+        return [ticket["id"] for ticket in response.data["results"]]
+
+    def test_owner_fields_match_partially(self):
+        self.assertEqual(self._search("priya"), [self.leak.id])
+        self.assertEqual(self._search("sharma@example"), [self.leak.id])
+        self.assertEqual(self._search("sink"), [self.leak.id])
+        self.assertEqual(self._search("twice"), [self.other.id])
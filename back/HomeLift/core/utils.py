@@ -147,6 +147,8 @@ def generate_invoice_pdf(booking):
     payment_note = ""
     if booking.is_refunded:
         payment_note = "Note: The advance payment has been refunded to your wallet due to cancellation."
+    elif booking.is_fully_paid:
+        payment_note = "Payment received in full. Thank you!"
     elif booking.is_advance_paid:
         payment_note = "Advance payment received successfully. Remaining balance to be paid upon service completion."
     else:
@@ -184,16 +184,20 @@ class TicketDetailView(APIView):
 class AdminTicketListView(APIView):
     """
     GET  /core/admin/tickets/          → All tickets
+         ?search=<words>               → Full-text search on subject/description
+                                         or on the ticket owner (users/search.py),
+                                         best match first
     """
     permission_classes = [IsAdminUserCustom]
 
     def get(self, request):
-        from core.pagination import StandardResultsSetPagination
-        from django.db.models import Q
+        from core.pagination import KeysetPagination, StandardResultsSetPagination
+        from core.search import search_condition
+        from users.search import people_filter
         
         status_filter = request.query_params.get('status')
         type_filter   = request.query_params.get('ticket_type')
-        search        = request.query_params.get('search')
+        search        = (request.query_params.get('search') or '').strip()
         
         qs = Ticket.objects.all().order_by('-created_at')
         
@@ -202,14 +206,15 @@ class AdminTicketListView(APIView):
         if type_filter:
             qs = qs.filter(ticket_type=type_filter)
         if search:
-            qs = qs.filter(
-                Q(subject__icontains=search) |
-                Q(description__icontains=search) |
-                Q(user__username__icontains=search) |
-                Q(user__email__icontains=search)
-            )
-            
-        paginator = StandardResultsSetPagination()
+            # Ranked results can't be keyset-paged on created_at; page by number instead
+            qs, text_match, rank = search_condition(qs, search, ['subject', 'description'])
+            qs = qs.filter(text_match | people_filter(search, 'user__')).annotate(
+                search_rank=rank
+            ).order_by('-search_rank', '-created_at')
+            paginator = StandardResultsSetPagination()
+        else:
+            paginator = KeysetPagination()
+
         result_page = paginator.paginate_queryset(qs, request)
         serializer = TicketSerializer(result_page, many=True)
         return paginator.get_paginated_response(serializer.data)
@@ -237,104 +242,18 @@ class AdminTicketReplyView(APIView):
 
 class AdminDashboardView(APIView):
     """
-    GET /core/admin/dashboard/  → Stats for the admin dashboard
+    GET /core/admin/dashboard/  → Stats for the admin dashboard (core/dashboard.py)
     """
     permission_classes = [IsAdminUserCustom]
 
     def get(self, request):
-        now = timezone.now()
-        time_range = request.query_params.get('time_range', 'all_time')
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-        date_filter = None
-        end_date_filter = None
-
-        if start_date and end_date:
-            from datetime import datetime
-            date_filter = timezone.make_aware(datetime.strptime(start_date, '%Y-%m-%d'))
-            end_date_filter = timezone.make_aware(datetime.strptime(end_date, '%Y-%m-%d')).replace(hour=23, minute=59, second=59)
-        elif time_range == 'this_week':
-            date_filter = (now - timedelta(days=now.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
-        elif time_range == 'this_month':
-            date_filter = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        elif time_range == '2_months':
-            date_filter = now - timedelta(days=60)
-        elif time_range == '6_months':
-            date_filter = now - timedelta(days=180)
-        elif time_range == '1_year':
-            date_filter = now - timedelta(days=365)
-
-        users_qs = CustomUser.objects.filter(is_staff=False, is_provider=False)
-        providers_qs = ProviderDetails.objects.all()
-        bookings_qs = Booking.objects.all()
-
-        if date_filter:
-            users_qs = users_qs.filter(date_joined__gte=date_filter)
-            providers_qs = providers_qs.filter(user__date_joined__gte=date_filter)
-            bookings_qs = bookings_qs.filter(created_at__gte=date_filter)
-        if end_date_filter:
-            users_qs = users_qs.filter(date_joined__lte=end_date_filter)
-            providers_qs = providers_qs.filter(user__date_joined__lte=end_date_filter)
-            bookings_qs = bookings_qs.filter(created_at__lte=end_date_filter)
-        
-        # 🟢 General counts
-        total_customers = users_qs.count()
-        total_providers = providers_qs.count()
-        total_bookings = bookings_qs.count()
-        completed_bookings = bookings_qs.filter(status='completed')
-        
-        # 🟢 Financials
-        total_revenue = completed_bookings.aggregate(Sum('price'))['price__sum'] or Decimal('0')
-        # Assuming platform fee is 7% based on the History page logic
-        platform_revenue = total_revenue * Decimal('0.07')
-        
-        # 🟢 Bookings Breakdown
-        status_counts = bookings_qs.values('status').annotate(count=Count('status'))
-        status_map = {s['status']: s['count'] for s in status_counts}
-        
-        # 🟢 Recent Bookings
-        recent_bookings = Booking.objects.select_related('user', 'service', 'provider').order_by('-created_at')[:5]
-        recent_data = []
-        for b in recent_bookings:
-            recent_data.append({
-                "id": b.id,
-                "user": b.full_name,
-                "service": b.service.name,
-                "status": b.status,
-                "price": b.price,
-                "date": b.booking_date
-            })
-
-        # 🟢 Top Services
-        top_services = bookings_qs.values('service__name').annotate(
-            count=Count('id'), 
-            revenue=Sum('price')
-        ).order_by('-count')[:5]
-
-        # 🟢 Daily Bookings (Last 7 Days)
-        seven_days_ago = now.date() - timedelta(days=6)
-        daily_stats = []
-        for i in range(7):
-            day = seven_days_ago + timedelta(days=i)
-            day_count = bookings_qs.filter(created_at__date=day).count()
-            daily_stats.append({
-                "date": day.strftime('%d %b'),
-                "count": day_count
-            })
-
-        data = {
-            "stats": {
-                "customers": total_customers,
-                "providers": total_providers,
-                "bookings": total_bookings,
-                "revenue": total_revenue,
-                "platform_revenue": platform_revenue,
-            },
-            "status_breakdown": status_map,
-            "recent_bookings": recent_data,
-            "top_services": top_services,
-            "daily_stats": daily_stats,
-        }
+        from core.dashboard import get_admin_dashboard
+
+        data = get_admin_dashboard(
+            request.query_params.get('time_range', 'all_time'),
+            request.query_params.get('start_date'),
+            request.query_params.get('end_date'),
+        )
         return Response(data)
 
 
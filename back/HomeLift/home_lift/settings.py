@@ -65,6 +65,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
 
     'users',
     'admins',
@@ -264,6 +265,12 @@ STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY')
 
 STRIPE_WEBHOOK_SECRET = config('STRIPE_WEBHOOK_SECRET', default=None)
 
+# Stripe client used by checkout (payments/gateway.py). Set to
+# 'payments.gateway.FakeStripeGateway' to run without Stripe.
+STRIPE_GATEWAY = config('STRIPE_GATEWAY', default='payments.gateway.StripeGateway')
+STRIPE_TIMEOUT = config('STRIPE_TIMEOUT', default=10, cast=float)  # seconds
+STRIPE_MAX_NETWORK_RETRIES = config('STRIPE_MAX_NETWORK_RETRIES', default=2, cast=int)
+
 # ─── Logging ───────────────────────────────────────────────────────────────────
 # Logs directory: <project_root>/logs/  (created automatically if absent)
 LOGS_DIR = BASE_DIR / 'logs'
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Notification
+from .models import Notification, NotificationOutbox
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
@@ -33,3 +33,11 @@ class NotificationAdmin(admin.ModelAdmin):
 
     def sender(self, obj):
         return obj.sender.email if obj.sender else "System"
+
+
+
+@admin.register(NotificationOutbox)
+class NotificationOutboxAdmin(admin.ModelAdmin):
+    list_display = ('id', 'type', 'title', 'recipient_user_id', 'created_at')
+    list_filter = ('type',)
+    ordering = ('id',)
@@ -1,15 +1,35 @@
+import asyncio
 import json
 import logging
+import time
+from datetime import datetime
+from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 
+from . import presence
+from .fanout import ADMIN_GROUP, fan_out, user_group
+
 logger = logging.getLogger(__name__)
 
+# Minimum seconds between two typing events forwarded for the same room
+TYPING_INTERVAL = 2
+
 
 class MainConsumer(AsyncWebsocketConsumer):
     """
     Unified WebSocket consumer for notifications and real-time chat messages.
-    Everything is routed through the 'user_<id>' personal group.
+    Everything is routed through the 'user_<id>' personal group; staff
+    connections also join the admin group (payout progress).
+
+    Chat: the connection's room memberships are loaded once at connect into
+    `self.rooms` ({room_id: (user_id, provider_id)}) and kept current by
+    'chat_room_created' events, so routing a message costs no room lookups.
+
+    Presence: every open connection counts the user as online
+    (notifications/presence.py) and refreshes it from a heartbeat task.
+    Typing indicators are forwarded to the other participant at most once
+    per TYPING_INTERVAL per room.
     """
 
     async def connect(self):
@@ -21,13 +41,23 @@ class MainConsumer(AsyncWebsocketConsumer):
                 return
 
             self.user_id = self.user.id
-            self.group_name = f"user_{self.user_id}"
+            self.group_name = user_group(self.user_id)
+
+            self.rooms = await self.load_room_memberships()
+
+            self.typing_sent_at = {}
+            # room id -> (created_at, id) of the newest message delivered on this socket
+            self.latest_delivered = {}
+            await sync_to_async(presence.connected)(self.user_id)
+            self.heartbeat_task = asyncio.ensure_future(self.heartbeat_loop())
 
             await self.accept()
             logger.info("MainConsumer: Connected user %s", self.user_id)
 
             if self.channel_layer:
                 await self.channel_layer.group_add(self.group_name, self.channel_name)
+                if self.user.is_staff:
+                    await self.channel_layer.group_add(ADMIN_GROUP, self.channel_name)
             else:
                 logger.error("MainConsumer: Channel layer not configured!")
 
@@ -40,6 +70,17 @@ class MainConsumer(AsyncWebsocketConsumer):
                     getattr(self, 'user_id', 'unknown'), close_code)
         if hasattr(self, 'group_name') and self.channel_layer:
             await self.channel_layer.group_discard(self.group_name, self.channel_name)
+            if self.user.is_staff:
+                await self.channel_layer.group_discard(ADMIN_GROUP, self.channel_name)
+
+        if hasattr(self, 'heartbeat_task'):
+            self.heartbeat_task.cancel()
+            await sync_to_async(presence.disconnected)(self.user_id)
+
+        # Don't leave this connection's messages sitting in the write-behind buffer
+        from chat import writer
+        if writer.enabled():
+            await writer.get_writer().flush()
 
     # ─── Channel event handlers ───────────────────────────────────────────────
 
@@ -54,9 +95,19 @@ class MainConsumer(AsyncWebsocketConsumer):
 
     async def chat_message(self, event):
         """Handles: channel_layer.group_send(..., {'type': 'chat_message', ...})"""
+        payload = event.get('payload', {})
+        try:
+            delivered = (datetime.fromisoformat(payload['created_at']), int(payload['id']))
+            room_id = int(payload['room_id'])
+        except (KeyError, TypeError, ValueError):
+            pass
+        else:
+            current = self.latest_delivered.get(room_id)
+            if current is None or delivered > current:
+                self.latest_delivered[room_id] = delivered
         await self.send(text_data=json.dumps({
             'type': 'chat_message',
-            'payload': event.get('payload', {}),
+            'payload': payload,
         }))
 
     async def read_receipt(self, event):
@@ -66,6 +117,43 @@ class MainConsumer(AsyncWebsocketConsumer):
             'payload': event.get('payload', {}),
         }))
 
+    async def job_available(self, event):
+        """Handles: a newly paid booking this provider can accept (bookings/dispatch.py)"""
+        await self.send(text_data=json.dumps({
+            'type': 'job_available',
+            'payload': event.get('payload', {}),
+        }))
+
+    async def job_taken(self, event):
+        """Handles: a job previously offered to this provider was accepted by someone else"""
+        await self.send(text_data=json.dumps({
+            'type': 'job_taken',
+            'payload': event.get('payload', {}),
+        }))
+
+    async def payout_progress(self, event):
+        """Handles: progress of a payout batch, sent to staff connections (wallet/payouts.py)"""
+        await self.send(text_data=json.dumps({
+            'type': 'payout_progress',
+            'payload': event.get('payload', {}),
+        }))
+
+    async def chat_typing(self, event):
+        """Handles: the other participant of a room is typing"""
+        await self.send(text_data=json.dumps({
+            'type': 'typing',
+            'payload': event.get('payload', {}),
+        }))
+
+    async def chat_room_created(self, event):
+        """Handles: a room this user belongs to was created (chat/views.py)"""
+        payload = event.get('payload', {})
+        self.rooms[payload['room_id']] = (payload['user_id'], payload['provider_id'])
+        await self.send(text_data=json.dumps({
+            'type': 'chat_room_created',
+            'payload': payload,
+        }))
+
     # ─── Incoming from client ─────────────────────────────────────────────────
 
     async def receive(self, text_data):
@@ -79,22 +167,58 @@ class MainConsumer(AsyncWebsocketConsumer):
 
         if msg_type == 'chat_message':
             room_id = data.get('room_id')
-            content = data.get('content', '').strip()
+            content = (data.get('content') or '').strip()
             if room_id and content:
                 await self.handle_outbound_chat(room_id, content)
 
+        elif msg_type == 'read':
+            room_id = data.get('room_id')
+            if room_id:
+                await self.handle_read(room_id)
+
+        elif msg_type == 'typing':
+            room_id = data.get('room_id')
+            if room_id:
+                await self.handle_typing(room_id)
+
+        elif msg_type == 'heartbeat':
+            await sync_to_async(presence.heartbeat)(self.user_id)
+
+    async def heartbeat_loop(self):
+        """Keep this user's presence key alive while the socket is open."""
+        while True:
+            await asyncio.sleep(presence.HEARTBEAT_INTERVAL)
+            await sync_to_async(presence.heartbeat)(self.user_id)
+
+    async def get_participants(self, room_id):
+        """
+        (user_id, provider_id) of a room this user belongs to, or None.
+        Served from the per-connection map; a miss (e.g. a room created while
+        the room-created event was in flight) costs one membership query.
+        """
+        try:
+            room_id = int(room_id)
+        except (TypeError, ValueError):
+            return None
+        if room_id not in self.rooms:
+            participants = await self.load_room_membership(room_id)
+            if participants is None:
+                return None
+            self.rooms[room_id] = participants
+        return self.rooms[room_id]
+
     async def handle_outbound_chat(self, room_id, content):
         """Save message to DB and broadcast to both participants."""
         try:
-            room = await self.get_room(room_id)
-            if not room:
-                logger.warning("MainConsumer: Room %s not found for user %s", room_id, self.user_id)
+            participants = await self.get_participants(room_id)
+            if not participants:
+                logger.warning("MainConsumer: User %s is not a participant of room %s", self.user_id, room_id)
                 return
 
-            msg = await self.save_message(room, content)
+            msg = await self.save_message(int(room_id), participants, content)
             payload = {
                 'id': msg.id,
-                'room_id': room.id,
+                'room_id': msg.room_id,
                 'sender_id': self.user.id,
                 'sender_name': self.user.get_full_name() or self.user.username,
                 'content': msg.content,
@@ -102,26 +226,97 @@ class MainConsumer(AsyncWebsocketConsumer):
                 'is_read': False,
             }
 
-            for pid in [room.user_id, room.provider_id]:
-                await self.channel_layer.group_send(
-                    f"user_{pid}",
-                    {"type": "chat_message", "payload": payload}
-                )
+            event = {"type": "chat_message", "payload": payload}
+            await fan_out([(user_group(pid), event) for pid in participants], self.channel_layer)
         except Exception as e:
             logger.exception("MainConsumer.handle_outbound_chat failed for room %s user %s: %s",
                              room_id, self.user_id, e)
 
+    async def handle_read(self, room_id):
+        """Mark the room read for this user and send a receipt to the other participant."""
+        try:
+            participants = await self.get_participants(room_id)
+            if not participants:
+                return
+            if await self.mark_room_read(int(room_id), participants):
+                other_id = participants[1] if participants[0] == self.user_id else participants[0]
+                await fan_out([(user_group(other_id), {
+                    "type": "read_receipt",
+                    "payload": {"room_id": int(room_id), "reader_id": self.user_id},
+                })], self.channel_layer)
+        except Exception as e:
+            logger.exception("MainConsumer.handle_read failed for room %s user %s: %s",
+                             room_id, self.user_id, e)
+
+    async def handle_typing(self, room_id):
+        """Forward a typing indicator to the other participant, rate limited per room."""
+        participants = await self.get_participants(room_id)
+        if not participants:
+            return
+        room_id = int(room_id)
+        now = time.monotonic()
+        if now - self.typing_sent_at.get(room_id, 0) < TYPING_INTERVAL:
+            return
+        self.typing_sent_at[room_id] = now
+
+        other_id = participants[1] if participants[0] == self.user_id else participants[0]
+        await fan_out([(user_group(other_id), {
+            "type": "chat_typing",
+            "payload": {"room_id": room_id, "user_id": self.user_id},
+        })], self.channel_layer)
+
     # ─── DB helpers ───────────────────────────────────────────────────────────
 
     @database_sync_to_async
-    def get_room(self, room_id):
+    def load_room_memberships(self):
+        from django.db.models import Q
         from chat.models import ChatRoom
-        try:
-            return ChatRoom.objects.get(id=room_id)
-        except ChatRoom.DoesNotExist:
-            return None
+        rooms = ChatRoom.objects.filter(
+            Q(user_id=self.user_id) | Q(provider_id=self.user_id)
+        ).values_list('id', 'user_id', 'provider_id')
+        return {room_id: (user_id, provider_id) for room_id, user_id, provider_id in rooms}
+
+    @database_sync_to_async
+    def load_room_membership(self, room_id):
+        from django.db.models import Q
+        from chat.models import ChatRoom
+        return ChatRoom.objects.filter(
+            Q(user_id=self.user_id) | Q(provider_id=self.user_id), id=room_id
+        ).values_list('user_id', 'provider_id').first()
+
+    @staticmethod
+    def _room_ref(room_id, participants):
+        """Unsaved ChatRoom carrying just the ids, enough for saving messages and inbox updates."""
+        from chat.models import ChatRoom
+        return ChatRoom(id=room_id, user_id=participants[0], provider_id=participants[1])
+
+    async def save_message(self, room_id, participants, content):
+        """
+        Hand the message to the write-behind writer (id and timestamp assigned
+        now, stored in the next micro-batch); synchronous insert otherwise.
+        """
+        from chat import writer
+        room = self._room_ref(room_id, participants)
+        if writer.enabled():
+            return await writer.get_writer().submit(room, self.user, content)
+        return await self._save_message_now(room, content)
 
     @database_sync_to_async
-    def save_message(self, room, content):
+    def _save_message_now(self, room, content):
+        from chat.inbox import record_messages
         from chat.models import ChatMessage
-        return ChatMessage.objects.create(room=room, sender=self.user, content=content)
+        message = ChatMessage.objects.create(room=room, sender=self.user, content=content)
+        record_messages([message])
+        return message
+
+    @database_sync_to_async
+    def mark_room_read(self, room_id, participants):
+        """
+        Advance this user's read watermark, at least up to the newest message
+        this socket delivered (it may still be buffered in the writer). True if
+        anything was unread.
+        """
+        from chat.inbox import mark_room_read
+        return mark_room_read(
+            self._room_ref(room_id, participants), self.user_id, seen=self.latest_delivered.get(room_id)
+        )
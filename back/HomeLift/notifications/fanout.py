@@ -0,0 +1,166 @@
+"""
+notifications/fanout.py
+Batched channel-layer fan-out.
+
+`fan_out([(group, event), ...])` delivers many group events in one go:
+
+- RedisChannelLayer: memberships of every group are read with one pipeline
+  per Redis shard, then every message is written with one more pipeline per
+  shard (expiry trim + the same Lua send script group_send uses). A push to
+  thousands of users costs two round trips instead of ~4 per group.
+- Any other layer (e.g. InMemoryChannelLayer in tests): the group_send
+  calls are issued concurrently.
+
+Sync callers use `fan_out_sync`, which goes through a single async_to_sync
+bridge per call rather than one per recipient. Delivery is best effort:
+failures are logged, never raised.
+
+The Redis path reuses channels_redis internals (pinned in requirements.txt);
+if they change, it falls back to concurrent group_send.
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on (group, event) pairs per Redis pipeline.
+CHUNK_SIZE = 1000
+
+# Copied from channels_redis RedisChannelLayer.group_send.
+GROUP_SEND_LUA = """
+    local over_capacity = 0
+    local current_time = ARGV[#ARGV - 1]
+    local expiry = ARGV[#ARGV]
+    for i=1,#KEYS do
+        if redis.call('ZCOUNT', KEYS[i], '-inf', '+inf') < tonumber(ARGV[i + #KEYS]) then
+            redis.call('ZADD', KEYS[i], current_time, ARGV[i])
+            redis.call('EXPIRE', KEYS[i], expiry)
+        else
+            over_capacity = over_capacity + 1
+        end
+    end
+    return over_capacity
+"""
+
+
+# Group every staff MainConsumer connection also joins (admin-wide live updates)
+ADMIN_GROUP = "admins"
+
+
+def user_group(user_id):
+    """Personal group every MainConsumer connection joins."""
+    return f"user_{user_id}"
+
+
+def _supports_pipelined_send(layer):
+    try:
+        from channels_redis.core import RedisChannelLayer
+    except ImportError:
+        return False
+    return isinstance(layer, RedisChannelLayer) and all(
+        hasattr(layer, attr) for attr in ('_group_key', '_map_channel_keys_to_connection', 'consistent_hash', 'connection')
+    )
+
+
+async def _group_members(layer, groups):
+    """Channel names of each group, one pipeline per shard."""
+    by_shard = defaultdict(list)
+    for group in groups:
+        by_shard[layer.consistent_hash(group)].append(group)
+
+    members = {}
+    cutoff = int(time.time()) - layer.group_expiry
+
+    async def read_shard(index, shard_groups):
+        pipe = layer.connection(index).pipeline(transaction=False)
+        for group in shard_groups:
+            key = layer._group_key(group)
+            pipe.zremrangebyscore(key, min=0, max=cutoff)
+            pipe.zrange(key, 0, -1)
+        results = await pipe.execute()
+        for group, names in zip(shard_groups, results[1::2]):
+            members[group] = [name.decode("utf8") for name in names]
+
+    await asyncio.gather(*(read_shard(i, g) for i, g in by_shard.items()))
+    return members
+
+
+async def _redis_fan_out(layer, messages):
+    for group, _ in messages:
+        assert layer.require_valid_group_name(group), "Group name not valid"
+
+    members = await _group_members(layer, list(dict.fromkeys(group for group, _ in messages)))
+
+    # Per shard: parallel lists of channel keys, serialized messages and capacities
+    keys, payloads, capacities = defaultdict(list), defaultdict(list), defaultdict(list)
+    for group, event in messages:
+        conn_keys, key_to_message, key_to_capacity = layer._map_channel_keys_to_connection(members[group], event)
+        for index, channel_keys in conn_keys.items():
+            for key in channel_keys:
+                keys[index].append(key)
+                payloads[index].append(key_to_message[key])
+                capacities[index].append(key_to_capacity[key])
+
+    async def write_shard(index):
+        shard_keys = keys[index]
+        pipe = layer.connection(index).pipeline(transaction=False)
+        cutoff = int(time.time()) - int(layer.expiry)
+        for key in dict.fromkeys(shard_keys):
+            pipe.zremrangebyscore(key, min=0, max=cutoff)
+        pipe.eval(
+            GROUP_SEND_LUA, len(shard_keys), *shard_keys,
+            *payloads[index], *capacities[index], time.time(), layer.expiry
+        )
+        over_capacity = (await pipe.execute())[-1]
+        if over_capacity:
+            logger.info("%s of %s channel messages over capacity on shard %s", over_capacity, len(shard_keys), index)
+
+    await asyncio.gather(*(write_shard(index) for index in keys))
+
+
+async def _concurrent_fan_out(layer, messages):
+    results = await asyncio.gather(
+        *(layer.group_send(group, event) for group, event in messages),
+        return_exceptions=True,
+    )
+    for (group, _), result in zip(messages, results):
+        if isinstance(result, Exception):
+            logger.warning("group_send to %s failed: %s", group, result)
+
+
+async def fan_out(messages, channel_layer=None):
+    """Send each (group, event) pair over the channel layer, batched."""
+    messages = list(messages)
+    if not messages:
+        return
+
+    layer = channel_layer or get_channel_layer()
+    if layer is None:
+        logger.error("fan_out: channel layer not configured; dropping %s message(s)", len(messages))
+        return
+
+    pipelined = _supports_pipelined_send(layer)
+    for start in range(0, len(messages), CHUNK_SIZE):
+        chunk = messages[start:start + CHUNK_SIZE]
+        try:
+            if pipelined:
+                await _redis_fan_out(layer, chunk)
+            else:
+                await _concurrent_fan_out(layer, chunk)
+        except Exception as e:
+            logger.warning("fan_out failed for %s message(s): %s", len(chunk), e)
+
+
+_fan_out_sync = async_to_sync(fan_out)
+
+
+def fan_out_sync(messages, channel_layer=None):
+    """`fan_out` for sync code (views, signals, workers)."""
+    messages = list(messages)
+    if messages:
+        _fan_out_sync(messages, channel_layer)
@@ -0,0 +1,40 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import DEFAULT_BATCH_SIZE, dispatch_pending_notifications
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Deliver queued notifications from the outbox (bulk insert + WebSocket push)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help="Number of outbox rows delivered per transaction."
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help="Keep running and poll the outbox every N seconds. 0 (default) drains it once, for cron."
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        interval = options['interval']
+
+        while True:
+            try:
+                count = dispatch_pending_notifications(batch_size=batch_size)
+                if count or not interval:
+                    self.stdout.write(f"Dispatched {count} notification(s).")
+            except Exception as e:
+                logger.exception("dispatch_notifications run failed: %s", e)
+                if not interval:
+                    raise
+
+            if not interval:
+                return
+            time.sleep(interval)
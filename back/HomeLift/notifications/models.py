@@ -42,6 +42,36 @@ class Notification(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination of a user's notifications
+            models.Index(fields=['recipient', 'created_at', 'id'], name='notif_recipient_created_idx'),
+        ]
 
     def __str__(self):
         return f"[{self.type.upper()}] → {self.recipient.email}: {self.message[:40]}"
+
+
+class NotificationOutbox(models.Model):
+    """
+    A notification waiting to be delivered.
+
+    Rows are written inside the producer's transaction (see notifications/outbox.py)
+    and drained by the `dispatch_notifications` worker, which creates the real
+    Notification rows in bulk and pushes them over the channel layer. User ids
+    are stored as plain integers: recipient validation happens in the worker.
+    """
+    recipient_user_id = models.PositiveBigIntegerField(null=True, blank=True)
+    sender_user_id = models.PositiveBigIntegerField(null=True, blank=True)
+    content_type = models.ForeignKey(
+        ContentType, on_delete=models.CASCADE, null=True, blank=True
+    )
+    object_id = models.PositiveIntegerField(null=True, blank=True)
+
+    title = models.CharField(max_length=255, null=True, blank=True)
+    type = models.CharField(max_length=20, choices=Notification.NOTIFICATION_TYPES)
+    message = models.TextField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Outbox #{self.pk} [{self.type}] → {self.recipient_user_id or 'system'}"
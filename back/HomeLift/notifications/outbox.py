@@ -0,0 +1,123 @@
+"""
+notifications/outbox.py
+Transactional notification outbox.
+
+Producers (booking/provider signals) call `safe_create_notification`, which
+only inserts a NotificationOutbox row in the caller's transaction: no
+recipient lookups and no channel-layer round trip on the request path. If the
+transaction rolls back, the notification disappears with it.
+
+The `dispatch_notifications` worker drains the outbox in batches:
+validates recipients with one query, routes unknown/missing recipients to the
+system user (as the old inline helper did), bulk-creates the Notification
+rows, deletes the outbox rows and, once committed, pushes the WebSocket events
+to the recipients that are online.
+"""
+import logging
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+
+from .models import Notification, NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def get_system_user():
+    """
+    Return a fallback system/admin user to receive system notifications.
+    Prefer superuser, then staff user.
+    """
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    return User.objects.filter(is_superuser=True).first() or User.objects.filter(is_staff=True).first()
+
+
+def safe_create_notification(recipient, **kwargs):
+    """
+    Queue a notification for `recipient` (a user, or None for the system user).
+    Accepts the Notification fields: sender, type, title, message, content_type, object_id.
+
+    The insert runs in a savepoint so a failure never breaks the caller's transaction.
+    """
+    sender = kwargs.pop('sender', None)
+    content_type = kwargs.pop('content_type', None)
+    try:
+        with transaction.atomic():
+            NotificationOutbox.objects.create(
+                recipient_user_id=getattr(recipient, 'pk', None),
+                sender_user_id=getattr(sender, 'pk', None),
+                content_type=content_type,
+                **kwargs
+            )
+    except Exception:
+        logger.exception(
+            "Failed to queue notification for recipient=%s kwargs=%s",
+            getattr(recipient, 'pk', None), kwargs
+        )
+
+
+def dispatch_pending_notifications(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Deliver queued notifications in batches of `batch_size`. Concurrent workers
+    skip each other's locked rows. Returns the number of outbox rows processed.
+    """
+    from .presence import online_user_ids
+    from .utils import send_user_notifications
+
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    total = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                NotificationOutbox.objects.select_for_update(skip_locked=True).order_by('pk')[:batch_size]
+            )
+            if not batch:
+                break
+
+            user_ids = {row.recipient_user_id for row in batch} | {row.sender_user_id for row in batch}
+            user_ids.discard(None)
+            existing = set(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+
+            system_user = None
+            notifications, pushes = [], []
+            for row in batch:
+                recipient_id = row.recipient_user_id
+                if recipient_id in existing:
+                    pushes.append((recipient_id, row.message))
+                else:
+                    if recipient_id is not None:
+                        logger.warning("Recipient id=%s does not exist; routing outbox #%s to system user.", recipient_id, row.pk)
+                    system_user = system_user or get_system_user()
+                    if system_user is None:
+                        logger.warning("No valid recipient found for outbox #%s; skipping.", row.pk)
+                        continue
+                    recipient_id = system_user.pk
+
+                notifications.append(Notification(
+                    recipient_id=recipient_id,
+                    sender_id=row.sender_user_id if row.sender_user_id in existing else None,
+                    content_type_id=row.content_type_id,
+                    object_id=row.object_id,
+                    title=row.title,
+                    type=row.type,
+                    message=row.message,
+                ))
+
+            Notification.objects.bulk_create(notifications)
+            NotificationOutbox.objects.filter(pk__in=[row.pk for row in batch]).delete()
+
+            # Only push to users with an open socket; offline users find the
+            # stored Notification rows in their list on their next visit
+            online = online_user_ids(user_id for user_id, _ in pushes)
+            pushes = [(user_id, message) for user_id, message in pushes if user_id in online]
+            transaction.on_commit(lambda pushes=pushes: send_user_notifications(pushes))
+
+        total += len(batch)
+        logger.info("Dispatched %s notification(s) (running total %s)", len(batch), total)
+
+        if len(batch) < batch_size:
+            break
+    return total
@@ -0,0 +1,77 @@
+"""
+notifications/presence.py
+Who is online, tracked by MainConsumer connections.
+
+Each user has one Redis key, `presence:<user_id>`, holding their number of
+open sockets and a TTL. A connection increments it on connect, refreshes
+the TTL every HEARTBEAT_INTERVAL while open, and decrements it on disconnect.
+If a worker dies without disconnecting, its heartbeats stop and the key
+expires after PRESENCE_TTL.
+
+`online_user_ids()` answers "who of these is online?" with a single MGET.
+When Redis is unavailable, lookups fail open: everyone is reported online,
+so callers keep pushing as they did before.
+"""
+import logging
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "presence"
+HEARTBEAT_INTERVAL = 30  # seconds
+PRESENCE_TTL = HEARTBEAT_INTERVAL * 3
+
+
+def _key(user_id):
+    return f"{KEY_PREFIX}:{user_id}"
+
+
+def connected(user_id):
+    """Register one more open connection for `user_id`."""
+    key = _key(user_id)
+    try:
+        cache.add(key, 0, PRESENCE_TTL)
+        cache.incr(key)
+        cache.touch(key, PRESENCE_TTL)
+    except Exception as e:
+        logger.warning("Presence connect failed for user %s: %s", user_id, e)
+
+
+def heartbeat(user_id):
+    """Keep `user_id` online for another PRESENCE_TTL seconds."""
+    try:
+        if not cache.touch(_key(user_id), PRESENCE_TTL):
+            # Expired while connected (e.g. Redis restart): re-register
+            connected(user_id)
+    except Exception as e:
+        logger.warning("Presence heartbeat failed for user %s: %s", user_id, e)
+
+
+def disconnected(user_id):
+    """Drop one open connection for `user_id`."""
+    key = _key(user_id)
+    try:
+        if cache.decr(key) <= 0:
+            cache.delete(key)
+    except ValueError:
+        pass  # already expired
+    except Exception as e:
+        logger.warning("Presence disconnect failed for user %s: %s", user_id, e)
+
+
+def online_user_ids(user_ids):
+    """Subset of `user_ids` with at least one open connection (one round trip)."""
+    user_ids = set(user_ids)
+    if not user_ids:
+        return set()
+    try:
+        found = cache.get_many([_key(user_id) for user_id in user_ids])
+    except Exception as e:
+        logger.warning("Presence lookup failed (%s); treating users as online.", e)
+        return user_ids
+    return {user_id for user_id in user_ids if (found.get(_key(user_id)) or 0) > 0}
+
+
+def is_online(user_id):
+    return user_id in online_user_ids([user_id])
@@ -1,3 +1,231 @@
-from django.test import TestCase
+import io
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+from channels.layers import InMemoryChannelLayer
+from channels.testing import WebsocketCommunicator
+from channels_redis.core import RedisChannelLayer
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from bookings.tests.factories import create_user
+from chat.models import ChatMessage, ChatRoom
+from notifications import presence
+from notifications.consumers import MainConsumer
+from notifications.fanout import fan_out_sync, user_group
+from notifications.models import Notification, NotificationOutbox
+from notifications.outbox import safe_create_notification
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class NotificationOutboxTests(TestCase):
+    """Notifications are queued with the producer's transaction and delivered once by the worker."""
+
+    def setUp(self):
+        cache.clear()
+        self.online = create_user("online")
+        self.offline = create_user("offline")
+        self.admin = create_user("admin", is_staff=True, is_superuser=True)
+        presence.connected(self.online.id)
+
+    def _notify(self, recipient, title="Hello"):
+        safe_create_notification(recipient=recipient, sender=None, type='system', title=title, message=title)
+
+    def _dispatch(self):
+        with mock.patch("notifications.utils.send_user_notifications") as send, \
+                self.captureOnCommitCallbacks(execute=True):
+            call_command("dispatch_notifications", stdout=io.StringIO())
+        return [push for call in send.call_args_list for push in call.args[0]]
+
+    def test_rolled_back_producer_queues_nothing(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self._notify(self.online)
+            raise RuntimeError("booking failed")
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+    def test_queued_notifications_are_delivered_once(self):
+        self._notify(self.online, "Booked")
+        self._notify(self.offline, "Paid")
+        self._notify(None, "Provider removed")
+
+        pushes = self._dispatch()
+
+        recipients = Notification.objects.order_by('id').values_list('recipient_id', 'title')
+        self.assertEqual(list(recipients), [
+            (self.online.id, "Booked"), (self.offline.id, "Paid"), (self.admin.id, "Provider removed"),
+        ])
+        # Only users with an open socket get the live push
+        self.assertEqual(pushes, [(self.online.id, "Booked")])
+        self.assertFalse(NotificationOutbox.objects.exists())
+
+        self.assertEqual(self._dispatch(), [])
+        self.assertEqual(Notification.objects.count(), 3)
+
+
+class OldRedisChannelLayer(RedisChannelLayer):
+    """A RedisChannelLayer without one of the internals the pipelined path relies on."""
+
+    @property
+    def _map_channel_keys_to_connection(self):
+        raise AttributeError("_map_channel_keys_to_connection")
+
+
+class FanOutTests(SimpleTestCase):
+    """fan_out delivers every event, with plain group_send when it can't pipeline."""
+
+    def test_in_memory_layer_receives_every_event(self):
+        layer = InMemoryChannelLayer()
+        channels = {}
+        for user_id in (1, 2):
+            channels[user_id] = async_to_sync(layer.new_channel)()
+            async_to_sync(layer.group_add)(user_group(user_id), channels[user_id])
+
+        fan_out_sync([(user_group(user_id), {"type": "ping", "n": user_id}) for user_id in (1, 2)], layer)
+
+        for user_id, channel in channels.items():
+            self.assertEqual(async_to_sync(layer.receive)(channel), {"type": "ping", "n": user_id})
+
+    def test_redis_layer_without_internals_falls_back_to_group_send(self):
+        layer = OldRedisChannelLayer(hosts=["redis://localhost:6379/0"])
+        messages = [(user_group(user_id), {"type": "ping"}) for user_id in (1, 2, 3)]
+
+        with mock.patch.object(layer, "group_send", mock.AsyncMock(side_effect=[None, OSError("down"), None])) as send, \
+                self.assertLogs("notifications.fanout", "WARNING") as logs:
+            fan_out_sync(messages, layer)
+
+        self.assertEqual([call.args for call in send.await_args_list], messages)
+        self.assertIn("group_send to user_2 failed", logs.output[0])
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    CHANNEL_LAYERS={'default': {'BACKEND': 'channels.layers.InMemoryChannelLayer'}},
+)
+class MainConsumerTests(TransactionTestCase):
+    """Chat over the personal socket is routed by the connection's room memberships."""
+
+    def setUp(self):
+        cache.clear()
+        self.customer = create_user("customer")
+        self.provider = create_user("provider", is_provider=True)
+        self.room = ChatRoom.objects.create(user=self.customer, provider=self.provider)
+
+    async def _connect(self, user):
+        communicator = WebsocketCommunicator(MainConsumer.as_asgi(), f"/ws/socket/{user.id}/")
+        communicator.scope["user"] = user
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    async def test_message_reaches_both_participants(self):
+        customer = await self._connect(self.customer)
+        provider = await self._connect(self.provider)
+
+        await customer.send_json_to({"type": "chat_message", "room_id": self.room.id, "content": "Hello"})
+
+        for communicator in (customer, provider):
+            event = await communicator.receive_json_from()
+            self.assertEqual(event["type"], "chat_message")
+            self.assertEqual((event["payload"]["room_id"], event["payload"]["content"]), (self.room.id, "Hello"))
+        await customer.disconnect()
+        await provider.disconnect()
+
+        self.assertEqual(await ChatMessage.objects.filter(room=self.room).acount(), 1)
+
+    async def test_outsider_cannot_post_to_a_room(self):
+        outsider = await sync_to_async(create_user)("outsider")
+        intruder = await self._connect(outsider)
+        provider = await self._connect(self.provider)
+
+        with self.assertLogs("notifications.consumers", "WARNING"):
+            await intruder.send_json_to({"type": "chat_message", "room_id": self.room.id, "content": "spam"})
+            self.assertTrue(await provider.receive_nothing())
+        await intruder.disconnect()
+        await provider.disconnect()
+
+        self.assertFalse(await ChatMessage.objects.filter(room=self.room).aexists())
+
+    async def test_room_created_after_connect_is_routed(self):
+        customer = await self._connect(self.customer)
+        other = await sync_to_async(create_user)("other", is_provider=True)
+        room = await ChatRoom.objects.acreate(user=self.customer, provider=other)
+
+        await customer.send_json_to({"type": "chat_message", "room_id": room.id, "content": "Hi"})
+
+        event = await customer.receive_json_from()
+        self.assertEqual(event["payload"]["room_id"], room.id)
+        await customer.disconnect()
+
+    async def test_anonymous_connection_is_refused(self):
+        from django.contrib.auth.models import AnonymousUser
+        communicator = WebsocketCommunicator(MainConsumer.as_asgi(), "/ws/socket/0/")
+        communicator.scope["user"] = AnonymousUser()
+        with self.assertLogs("notifications.consumers", "WARNING"):
+            connected, _ = await communicator.connect()
+        self.assertFalse(connected)
+
+
+    async def test_socket_counts_its_user_online(self):
+        customer = await self._connect(self.customer)
+        self.assertTrue(await sync_to_async(presence.is_online)(self.customer.id))
+
+        await customer.disconnect()
+        self.assertFalse(await sync_to_async(presence.is_online)(self.customer.id))
+
+    async def test_typing_is_forwarded_at_most_once_per_interval(self):
+        from notifications import consumers
+        customer = await self._connect(self.customer)
+        provider = await self._connect(self.provider)
+        typing = {"type": "typing", "room_id": self.room.id}
+
+        # Only the consumer's clock: asyncio itself needs the real time.monotonic
+        with mock.patch.object(consumers, "time") as clock:
+            clock.monotonic.return_value = 1000.0
+            await customer.send_json_to(typing)
+            await customer.send_json_to(typing)
+            event = await provider.receive_json_from()
+            self.assertEqual(event, {"type": "typing", "payload": {"room_id": self.room.id, "user_id": self.customer.id}})
+            self.assertTrue(await provider.receive_nothing())
+
+            clock.monotonic.return_value += consumers.TYPING_INTERVAL
+            await customer.send_json_to(typing)
+            self.assertEqual((await provider.receive_json_from())["type"], "typing")
+
+        # The sender never gets their own indicator
+        self.assertTrue(await customer.receive_nothing())
+        await customer.disconnect()
+        await provider.disconnect()
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PresenceTests(SimpleTestCase):
+    """A user is online while at least one of their sockets is open."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_online_until_the_last_connection_closes(self):
+        presence.connected(1)
+        presence.connected(1)
+        presence.connected(2)
+        self.assertEqual(presence.online_user_ids([1, 2, 3]), {1, 2})
+
+        presence.disconnected(1)
+        self.assertTrue(presence.is_online(1))
+        presence.disconnected(1)
+        self.assertFalse(presence.is_online(1))
+
+        # A late disconnect after the key expired doesn't go negative
+        presence.disconnected(1)
+        presence.connected(1)
+        self.assertTrue(presence.is_online(1))
+
+    def test_heartbeat_reregisters_an_expired_user(self):
+        presence.heartbeat(4)
+        self.assertTrue(presence.is_online(4))
+
+    def test_unavailable_cache_reports_everyone_online(self):
+        with mock.patch.object(presence.cache, "get_many", side_effect=ConnectionError("down")), \
+                self.assertLogs("notifications.presence", "WARNING"):
+            self.assertEqual(presence.online_user_ids([1, 2]), {1, 2})
@@ -1,12 +1,27 @@
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
+import logging
+
+from .fanout import fan_out_sync, user_group
+
+logger = logging.getLogger(__name__)
+
+
+def _notification_event(message):
+    return {
+        "type": "send_notification",
+        "message": message,
+    }
+
 
 def send_user_notification(user_id, message):
-    channel_layer = get_channel_layer()
-    async_to_sync(channel_layer.group_send)(
-        f"user_{user_id}",
-        {
-            "type": "send_notification",
-            "message": message,
-        }
+    fan_out_sync([(user_group(user_id), _notification_event(message))])
+
+
+def send_user_notifications(notifications):
+    """
+    Push several (user_id, message) notifications in one batched fan-out.
+    Delivery is best effort: failures are logged, not raised.
+    """
+    fan_out_sync(
+        (user_group(user_id), _notification_event(message))
+        for user_id, message in notifications
     )
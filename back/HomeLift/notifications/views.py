@@ -7,7 +7,7 @@ from rest_framework.views import APIView
 
 from .models import Notification
 from .serializers import NotificationSerializer
-from core.pagination import StandardResultsSetPagination
+from core.pagination import KeysetPagination
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +16,7 @@ logger = logging.getLogger(__name__)
 class NotificationListView(generics.ListAPIView):
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
-    pagination_class = StandardResultsSetPagination
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return Notification.objects.filter(
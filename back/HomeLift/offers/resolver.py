@@ -0,0 +1,91 @@
+"""
+offers/resolver.py
+Resolves the best active offer for a service from one cached snapshot.
+
+All offers active today are loaded in a single query and reduced to:
+    {"global": <best global offer>, "services": {<service_id>: <best offer for that service>}}
+with each offer stored as OfferSerializer data. The map is cached in Redis
+under a per-day key and dropped whenever an Offer (or a Service it embeds)
+is saved or deleted, see offers/signals.py.
+
+"Best" keeps the original rule: the highest discount_value among the
+service's own offers and the global ones.
+"""
+import logging
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "offers:active"
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _today():
+    return timezone.localtime(timezone.now()).date()
+
+
+def _cache_key(day):
+    return f"{CACHE_KEY_PREFIX}:{day.isoformat()}"
+
+
+def build_offer_map(day=None):
+    """Build the offer map for `day` straight from the database (one query)."""
+    from .models import Offer
+    from .serializers import OfferSerializer
+
+    day = day or _today()
+    offers = Offer.objects.filter(
+        is_active=True,
+        start_date__lte=day,
+        end_date__gte=day,
+    ).select_related('service').order_by('-discount_value', '-id')
+
+    offer_map = {"global": None, "services": {}}
+    for offer in offers:
+        # Ordered best-first, so the first offer seen per slot wins
+        if offer.service_id is None:
+            if offer_map["global"] is None:
+                offer_map["global"] = OfferSerializer(offer).data
+        elif offer.service_id not in offer_map["services"]:
+            offer_map["services"][offer.service_id] = OfferSerializer(offer).data
+    return offer_map
+
+
+def get_offer_map(day=None):
+    """Return today's offer map, from Redis when possible."""
+    day = day or _today()
+    key = _cache_key(day)
+    try:
+        offer_map = cache.get(key)
+    except Exception as e:
+        logger.warning("Offer cache read failed (%s); resolving from the database.", e)
+        return build_offer_map(day)
+
+    if offer_map is None:
+        offer_map = build_offer_map(day)
+        try:
+            cache.set(key, offer_map, CACHE_TIMEOUT)
+        except Exception as e:
+            logger.warning("Offer cache write failed: %s", e)
+    return offer_map
+
+
+def best_offer_for(service_id, offer_map=None):
+    """Serialized best offer for a service (service-specific vs global), or None."""
+    offer_map = offer_map if offer_map is not None else get_offer_map()
+    specific = offer_map["services"].get(service_id)
+    fallback = offer_map["global"]
+    if specific and fallback:
+        return max(specific, fallback, key=lambda o: Decimal(str(o["discount_value"])))
+    return specific or fallback
+
+
+def invalidate_offer_cache():
+    """Drop today's cached map; the next read rebuilds it."""
+    try:
+        cache.delete(_cache_key(_today()))
+    except Exception as e:
+        logger.warning("Offer cache invalidation failed: %s", e)
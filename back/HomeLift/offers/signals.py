@@ -0,0 +1,17 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from services.models import Service
+from .models import Offer
+from .resolver import invalidate_offer_cache
+
+
+# Offers embed service name/price/icon, so service edits invalidate too.
+# A deleted service also turns its offers global (on_delete=SET_NULL).
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+def invalidate_active_offers(sender, instance, **kwargs):
+    transaction.on_commit(invalidate_offer_cache)
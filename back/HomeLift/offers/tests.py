@@ -1,3 +1,51 @@
-from django.test import TestCase
+import datetime
+from decimal import Decimal
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from bookings.tests.factories import create_service
+from offers.models import Offer
+from offers.resolver import best_offer_for, get_offer_map
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class OfferMapTests(TestCase):
+    """The cached offer map picks the best offer and is rebuilt after offers change."""
+
+    def setUp(self):
+        cache.clear()
+        self.service = create_service()
+        today = datetime.date.today()
+        self.window = {"start_date": today, "end_date": today + datetime.timedelta(days=7)}
+
+    def _offer(self, value, service=None, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Offer.objects.create(
+                title=f"{value} off", discount_value=Decimal(value), service=service,
+                **{**self.window, **fields}
+            )
+
+    def _best(self):
+        offer = best_offer_for(self.service.id)
+        return offer and offer["id"]
+
+    def test_best_of_service_and_global_offers(self):
+        self._offer("5", self.service)
+        best = self._offer("15")
+        self._offer("50", self.service, start_date=self.window["end_date"])  # not started yet
+        self.assertEqual(self._best(), best.id)
+
+    def test_map_is_cached_until_an_offer_is_saved(self):
+        offer = self._offer("10", self.service)
+        get_offer_map()
+        with self.assertNumQueries(0):
+            self.assertEqual(self._best(), offer.id)
+
+        offer.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            offer.save()
+        self.assertIsNone(self._best())
+
+        better = self._offer("20")
+        self.assertEqual(self._best(), better.id)
@@ -1,3 +1,12 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import StripeEvent
+
+
+@admin.register(StripeEvent)
+class StripeEventAdmin(admin.ModelAdmin):
+    list_display = ('event_id', 'type', 'status', 'attempts', 'next_attempt_at', 'received_at', 'processed_at')
+    list_filter = ('status', 'type')
+    search_fields = ('event_id',)
+    readonly_fields = ('event_id', 'type', 'payload', 'attempts', 'last_error', 'received_at', 'processed_at')
+    ordering = ('-received_at',)
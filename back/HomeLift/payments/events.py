@@ -0,0 +1,192 @@
+"""
+payments/events.py
+Processing of stored Stripe webhook events.
+
+The webhook view only verifies the signature and stores the event
+(StripeEvent, unique on the Stripe event id), then acks. The
+`process_stripe_events` worker drains due events in batches:
+- A batch is claimed in one short transaction, which counts the attempt and
+  leases the events for CLAIM_TIMEOUT so other workers skip them. A worker
+  that dies leaves them to be picked up again when the lease runs out.
+- Each event is then handled in its own transaction, together with marking
+  it processed. A failure is recorded and retried with exponential backoff
+  (RETRY_BACKOFF) up to MAX_ATTEMPTS, after which the event is left 'failed'
+  for inspection in the admin.
+
+Handlers are idempotent: payments are settled by intent id
+(payments/services.py), a booking's advance is only flipped to paid (and the
+job announced) once, and notifications are sent after commit.
+"""
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from bookings.models import Booking
+from .models import Payment, StripeEvent
+from .services import settle_payment
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+MAX_ATTEMPTS = 8
+RETRY_BACKOFF = (30, 60 * 60)  # first retry, max delay (seconds)
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+
+def store_event(event):
+    """Queue a verified event: one INSERT, ignored if this event id was already received."""
+    StripeEvent.objects.bulk_create(
+        [StripeEvent(event_id=event["id"], type=event["type"], payload=event)],
+        ignore_conflicts=True,
+    )
+
+
+# ---- handlers ----
+
+def handle_payment_succeeded(event):
+    intent = event["data"]["object"]
+    metadata = intent.get("metadata") or {}
+    booking_id = metadata.get("booking_id")
+    user_id = metadata.get("user_id")
+    payment_type = metadata.get("payment_type", "advance")
+    if not booking_id:
+        return
+
+    amount = Decimal(intent["amount"]) / 100
+    try:
+        booking, advance_now_paid = settle_payment(
+            booking_id, intent["id"], amount, payment_type,
+            currency=intent["currency"], metadata=metadata,
+        )
+    except Booking.DoesNotExist:
+        logger.error(f"❌ Webhook error: Booking #{booking_id} not found.")
+        return
+
+    if advance_now_paid:
+        # Push the now-paid job to eligible providers (once, even if Stripe retries)
+        from bookings.dispatch import announce_new_job
+        announce_new_job(booking)
+
+    logger.info(f"✅ Booking #{booking_id} marked as paid.")
+    if user_id:
+        from notifications.utils import send_user_notification
+        message = f"Payment of ₹{amount} was successful!"
+        transaction.on_commit(lambda: send_user_notification(user_id, message))
+
+
+def handle_payment_failed(event):
+    intent = event["data"]["object"]
+    error_message = (intent.get("last_payment_error") or {}).get("message", "Unknown error")
+    logger.error(f"❌ Payment failed for intent {intent['id']}: {error_message}")
+
+    metadata = intent.get("metadata") or {}
+    booking_id = metadata.get("booking_id")
+    if not booking_id:
+        logger.error(f"❌ Webhook error on failure: No booking_id in metadata for intent {intent['id']}")
+        return
+
+    try:
+        booking = Booking.objects.get(id=booking_id)
+    except Booking.DoesNotExist:
+        logger.error(f"❌ Webhook error on failure: Booking #{booking_id} not found.")
+        return
+
+    # A late failure event never downgrades a payment that already succeeded
+    if Payment.objects.filter(stripe_payment_intent_id=intent["id"], status="succeeded").exists():
+        return
+    Payment.objects.update_or_create(
+        stripe_payment_intent_id=intent["id"],
+        defaults={
+            "booking": booking,
+            "amount": Decimal(intent["amount"]) / 100,
+            "currency": intent["currency"],
+            "status": "failed",
+            "payment_type": metadata.get("payment_type", "advance"),
+            "metadata": metadata
+        }
+    )
+
+
+def handle_transfer_created(event):
+    # This handles the withdrawal to provider
+    transfer = event["data"]["object"]
+    logger.info(f"💰 Transfer Created: {transfer['id']} for {transfer['amount']/100.0}")
+
+
+HANDLERS = {
+    "payment_intent.succeeded": handle_payment_succeeded,
+    "payment_intent.payment_failed": handle_payment_failed,
+    "transfer.created": handle_transfer_created,
+}
+
+
+# ---- worker ----
+
+def _retry_delay(attempts):
+    first, maximum = RETRY_BACKOFF
+    return timedelta(seconds=min(first * 2 ** (attempts - 1), maximum))
+
+
+def _claim_batch(batch_size):
+    """Lease up to `batch_size` due events to this worker, counting the attempt."""
+    with transaction.atomic():
+        batch = list(
+            StripeEvent.objects.select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=timezone.now())
+            .order_by("next_attempt_at", "pk")[:batch_size]
+        )
+        StripeEvent.objects.filter(pk__in=[event.pk for event in batch]).update(
+            attempts=F("attempts") + 1, next_attempt_at=timezone.now() + CLAIM_TIMEOUT
+        )
+    for event in batch:
+        event.attempts += 1
+    return batch
+
+
+def _handle(event):
+    """Run the event's handler and mark it processed in one transaction; record a failure."""
+    handler = HANDLERS.get(event.type)
+    try:
+        with transaction.atomic():
+            if handler:
+                handler(event.payload)
+            StripeEvent.objects.filter(pk=event.pk).update(
+                status="processed", processed_at=timezone.now(), last_error=""
+            )
+    except Exception as e:
+        changes = {"last_error": repr(e)}
+        if event.attempts >= MAX_ATTEMPTS:
+            changes["status"] = "failed"
+            logger.exception("Stripe event %s (%s) failed for good after %s attempts",
+                             event.event_id, event.type, event.attempts)
+        else:
+            changes["next_attempt_at"] = timezone.now() + _retry_delay(event.attempts)
+            logger.warning("Stripe event %s (%s) failed (attempt %s), retrying at %s: %s",
+                           event.event_id, event.type, event.attempts, changes["next_attempt_at"], e)
+        StripeEvent.objects.filter(pk=event.pk).update(**changes)
+
+
+def process_pending_events(batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Handle due events in batches of `batch_size`. Concurrent workers claim
+    disjoint batches. Returns the number of events processed (including
+    failed attempts).
+    """
+    total = 0
+    while True:
+        batch = _claim_batch(batch_size)
+        if not batch:
+            break
+        for event in batch:
+            _handle(event)
+
+        total += len(batch)
+        logger.info("Processed %s Stripe event(s) (running total %s)", len(batch), total)
+
+        if len(batch) < batch_size:
+            break
+    return total
@@ -0,0 +1,139 @@
+"""
+payments/gateway.py
+Stripe API calls made by checkout and provider payouts, behind a swappable
+class.
+
+settings.STRIPE_GATEWAY names the class and `get_gateway()` builds it once
+per process. StripeGateway holds one StripeClient whose requests-based HTTP
+client keeps connections alive between calls (a pooled session per thread).
+It also retries network failures, which is safe because every write carries
+an idempotency key.
+
+FakeStripeGateway keeps intents and transfers in memory and records the calls
+it receives, for tests and for running locally without Stripe.
+"""
+import itertools
+import threading
+from functools import lru_cache
+
+import stripe
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+def get_gateway():
+    """The configured gateway, shared by every request in this process."""
+    return _build(settings.STRIPE_GATEWAY)
+
+
+@lru_cache(maxsize=None)
+def _build(path):
+    return import_string(path)()
+
+
+class StripeGateway:
+    def __init__(self):
+        self.client = stripe.StripeClient(
+            settings.STRIPE_SECRET_KEY,
+            http_client=stripe.RequestsClient(timeout=settings.STRIPE_TIMEOUT),
+            max_network_retries=settings.STRIPE_MAX_NETWORK_RETRIES,
+        )
+
+    def create_payment_intent(self, amount, currency, metadata, idempotency_key):
+        return self.client.v1.payment_intents.create(
+            params={
+                "amount": amount,
+                "currency": currency,
+                "automatic_payment_methods": {"enabled": True},
+                "metadata": metadata,
+            },
+            options={"idempotency_key": idempotency_key},
+        )
+
+    def retrieve_payment_intent(self, intent_id):
+        return self.client.v1.payment_intents.retrieve(intent_id)
+
+    def update_payment_intent(self, intent_id, amount, idempotency_key):
+        return self.client.v1.payment_intents.update(
+            intent_id,
+            params={"amount": amount},
+            options={"idempotency_key": idempotency_key},
+        )
+
+    def create_transfer(self, amount, currency, destination, description, idempotency_key=None):
+        # Without a key, the client generates one for its own network retries
+        return self.client.v1.transfers.create(
+            params={
+                "amount": amount,
+                "currency": currency,
+                "destination": destination,
+                "description": description,
+            },
+            options={"idempotency_key": idempotency_key} if idempotency_key else {},
+        )
+
+
+class FakeStripeGateway:
+    """In-memory stand-in for StripeGateway. `calls` lists the methods called."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.reset()
+
+    def reset(self):
+        """Forget every intent, transfer and call (between tests)."""
+        self.intents = {}
+        self.transfers = {}
+        self.calls = []
+        self._by_key = {}
+
+    def create_payment_intent(self, amount, currency, metadata, idempotency_key):
+        with self._lock:
+            self.calls.append("create_payment_intent")
+            if idempotency_key not in self._by_key:
+                intent_id = f"pi_fake_{next(self._ids)}"
+                self.intents[intent_id] = {
+                    "id": intent_id,
+                    "client_secret": f"{intent_id}_secret",
+                    "amount": amount,
+                    "currency": currency,
+                    "metadata": dict(metadata),
+                    "status": "requires_payment_method",
+                }
+                self._by_key[idempotency_key] = intent_id
+            return dict(self.intents[self._by_key[idempotency_key]])
+
+    def retrieve_payment_intent(self, intent_id):
+        with self._lock:
+            self.calls.append("retrieve_payment_intent")
+            return dict(self.intents[intent_id])
+
+    def update_payment_intent(self, intent_id, amount, idempotency_key):
+        with self._lock:
+            self.calls.append("update_payment_intent")
+            if self.intents[intent_id]["status"] in ("processing", "succeeded", "canceled"):
+                raise stripe.error.InvalidRequestError(
+                    f"This PaymentIntent's amount could not be updated because it has a status of "
+                    f"{self.intents[intent_id]['status']}.", "amount",
+                )
+            self.intents[intent_id]["amount"] = amount
+            return dict(self.intents[intent_id])
+
+    def create_transfer(self, amount, currency, destination, description, idempotency_key=None):
+        with self._lock:
+            self.calls.append("create_transfer")
+            if idempotency_key is None or idempotency_key not in self._by_key:
+                transfer_id = f"tr_fake_{next(self._ids)}"
+                self.transfers[transfer_id] = {
+                    "id": transfer_id,
+                    "amount": amount,
+                    "currency": currency,
+                    "destination": destination,
+                    "description": description,
+                }
+                if idempotency_key is not None:
+                    self._by_key[idempotency_key] = transfer_id
+            else:
+                transfer_id = self._by_key[idempotency_key]
+            return dict(self.transfers[transfer_id])
@@ -0,0 +1,140 @@
+"""
+payments/intents.py
+One reusable Stripe PaymentIntent per (booking, payment_type).
+
+`checkout_intent()` keeps reusing the same intent when checkout is opened
+again, instead of creating a new one each time:
+- The intent's id and amount live in the pending Payment row for the pair.
+  The webhook later marks the same row succeeded.
+- Its client_secret is cached in Redis, so a repeat checkout with an
+  unchanged amount makes no Stripe call.
+- If the amount changed, the intent is updated in place instead of being
+  replaced.
+- Creates and updates carry idempotency keys, so double clicks and network
+  retries can't produce a second intent.
+- An intent that is processing or already succeeded is never replaced:
+  checkout is refused with PaymentInProgress until the webhook settles it.
+  Only a canceled intent is replaced with a new one.
+"""
+import logging
+
+import stripe
+from django.core.cache import cache
+
+from .gateway import get_gateway
+from .models import Payment
+
+logger = logging.getLogger(__name__)
+
+SECRET_CACHE_TIMEOUT = 24 * 60 * 60  # seconds
+# Payment rows whose intent can still be paid (a failed attempt can be retried)
+REUSABLE_PAYMENT_STATUSES = ("pending", "failed")
+REUSABLE_INTENT_STATUSES = ("requires_payment_method", "requires_confirmation", "requires_action")
+
+
+class PaymentInProgress(Exception):
+    """The pair's intent is being (or has been) paid, so checkout can't open another."""
+
+
+def _secret_key(intent_id):
+    return f"payments:intent_secret:{intent_id}"
+
+
+def _cached_secret(intent_id):
+    try:
+        return cache.get(_secret_key(intent_id))
+    except Exception as e:
+        logger.warning("Intent secret cache read failed (%s); asking Stripe.", e)
+        return None
+
+
+def _cache_secret(intent):
+    try:
+        cache.set(_secret_key(intent["id"]), intent["client_secret"], SECRET_CACHE_TIMEOUT)
+    except Exception as e:
+        logger.warning("Intent secret cache write failed: %s", e)
+
+
+def _is_open(intent):
+    """
+    True if `intent` can still be paid, False if it was canceled. Raises
+    PaymentInProgress if it is processing or succeeded.
+    """
+    if intent["status"] in REUSABLE_INTENT_STATUSES:
+        return True
+    if intent["status"] == "canceled":
+        return False
+    raise PaymentInProgress("Payment already in progress.")
+
+
+def _reuse(gateway, payment, amount):
+    """client_secret of `payment`'s intent for `amount`, or None if it was canceled."""
+    intent_id = payment.stripe_payment_intent_id
+    if payment.amount == amount:
+        secret = _cached_secret(intent_id)
+        if secret:
+            return secret
+        intent = gateway.retrieve_payment_intent(intent_id)
+        if not _is_open(intent):
+            return None
+    else:
+        minor = int(amount * 100)
+        try:
+            intent = gateway.update_payment_intent(
+                intent_id, minor, idempotency_key=f"{intent_id}:amount:{minor}"
+            )
+        except stripe.error.InvalidRequestError as e:
+            # Stripe refuses updates once an intent is processing, paid or canceled
+            logger.info("PaymentIntent %s can't be updated (%s).", intent_id, e)
+            if _is_open(gateway.retrieve_payment_intent(intent_id)):
+                raise
+            return None
+        Payment.objects.filter(pk=payment.pk).update(amount=amount)
+
+    _cache_secret(intent)
+    return intent["client_secret"]
+
+
+def checkout_intent(booking, payment_type, amount):
+    """
+    client_secret of a PaymentIntent for paying `amount` (rupees) toward
+    `booking`'s `payment_type`, reusing the pair's open intent when possible.
+    Raises PaymentInProgress if that intent is processing or succeeded.
+    """
+    gateway = get_gateway()
+    payment = (
+        Payment.objects.filter(booking=booking, payment_type=payment_type, status__in=REUSABLE_PAYMENT_STATUSES)
+        .order_by("-created_at")
+        .first()
+    )
+    if payment:
+        secret = _reuse(gateway, payment, amount)
+        if secret:
+            return secret
+
+    # Concurrent checkouts see the same attempt number, hence the same key,
+    # and Stripe hands them all the same intent.
+    attempt = Payment.objects.filter(booking=booking, payment_type=payment_type).count()
+    minor = int(amount * 100)
+    metadata = {
+        "booking_id": booking.id,
+        "user_id": booking.user_id,
+        "payment_type": payment_type,
+    }
+    intent = gateway.create_payment_intent(
+        minor, "inr", metadata,
+        idempotency_key=f"booking-{booking.id}-{payment_type}-{minor}-{attempt}",
+    )
+    Payment.objects.get_or_create(
+        stripe_payment_intent_id=intent["id"],
+        defaults={
+            "booking": booking,
+            "amount": amount,
+            "currency": "inr",
+            "status": "pending",
+            "payment_type": payment_type,
+            "metadata": metadata,
+        }
+    )
+    _cache_secret(intent)
+    return intent["client_secret"]
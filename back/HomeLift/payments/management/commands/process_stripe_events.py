@@ -0,0 +1,40 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from payments.events import DEFAULT_BATCH_SIZE, process_pending_events
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Process stored Stripe webhook events (with retry and backoff)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help="Number of events handled per transaction."
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help="Keep running and poll for due events every N seconds. 0 (default) drains them once, for cron."
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        interval = options['interval']
+
+        while True:
+            try:
+                count = process_pending_events(batch_size=batch_size)
+                if count or not interval:
+                    self.stdout.write(f"Processed {count} Stripe event(s).")
+            except Exception as e:
+                logger.exception("process_stripe_events run failed: %s", e)
+                if not interval:
+                    raise
+
+            if not interval:
+                return
+            time.sleep(interval)
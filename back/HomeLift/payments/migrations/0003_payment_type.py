@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:39
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Case, DecimalField, Exists, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+
+def backfill_payment_state(apps, schema_editor):
+    """
+    Move payment_type out of the metadata JSON and derive each booking's
+    amount_paid / is_fully_paid from its succeeded payments.
+    """
+    Payment = apps.get_model('payments', 'Payment')
+    Booking = apps.get_model('bookings', 'Booking')
+    Payment.objects.filter(metadata__payment_type='remaining').update(payment_type='remaining')
+
+    succeeded = Payment.objects.filter(booking=OuterRef('pk'), status='succeeded')
+    Booking.objects.update(
+        amount_paid=Coalesce(
+            Subquery(succeeded.order_by().values('booking').annotate(total=Sum('amount')).values('total')),
+            Value(Decimal('0.00')),
+            output_field=DecimalField(max_digits=10, decimal_places=2),
+        ),
+        is_fully_paid=Case(
+            When(Exists(succeeded.filter(payment_type='remaining')), then=Value(True)),
+            When(is_advance_paid=True, price__lte=F('advance'), then=Value(True)),
+            default=Value(False),
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0015_booking_payment_state'),
+        ('payments', '0002_stripe_event'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='payment_type',
+            field=models.CharField(choices=[('advance', 'Advance'), ('remaining', 'Remaining')], default='advance', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['booking', 'payment_type', 'status'], name='payment_booking_type_idx'),
+        ),
+        migrations.RunPython(backfill_payment_state, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from bookings.models import Booking
 
 class Payment(models.Model):
@@ -8,6 +9,10 @@ class Payment(models.Model):
         ("failed", "Failed"),
         ("refunded", "Refunded"),
     ]
+    PAYMENT_TYPES = [
+        ("advance", "Advance"),
+        ("remaining", "Remaining"),
+    ]
 
     booking = models.ForeignKey(
         Booking,
@@ -15,6 +20,11 @@ class Payment(models.Model):
         related_name="payments"
     )
     stripe_payment_intent_id = models.CharField(max_length=255, unique=True)
+    payment_type = models.CharField(
+        max_length=20,
+        choices=PAYMENT_TYPES,
+        default="advance"
+    )
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     currency = models.CharField(max_length=10, default="inr")
     status = models.CharField(
@@ -28,3 +38,41 @@ class Payment(models.Model):
 
     def __str__(self):
         return f"Payment {self.stripe_payment_intent_id} - {self.status}"
+
+    class Meta:
+        indexes = [
+            # "Has this booking's advance / remaining balance been paid?"
+            models.Index(fields=['booking', 'payment_type', 'status'], name='payment_booking_type_idx'),
+        ]
+
+
+class StripeEvent(models.Model):
+    """
+    A received Stripe webhook event, stored as-is and processed by the
+    `process_stripe_events` worker (payments/events.py). The unique event id
+    makes repeated deliveries no-ops.
+    """
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("processed", "Processed"),
+        ("failed", "Failed"),
+    ]
+
+    event_id = models.CharField(max_length=255, unique=True)
+    type = models.CharField(max_length=100)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Worker queue: due pending events
+            models.Index(fields=["status", "next_attempt_at"], name="stripeevent_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.event_id} ({self.type}) - {self.status}"
@@ -0,0 +1,62 @@
+"""
+payments/services.py
+Settling booking payments.
+
+Booking.amount_paid and Booking.is_fully_paid summarise a booking's
+succeeded payments so that lists, serializers and the payment views read two
+columns instead of querying Payment. `settle_payment()` is the only writer:
+it records the payment and recomputes both fields under the booking's row
+lock, in one transaction.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from bookings.models import Booking
+from .models import Payment
+
+
+def refresh_payment_state(booking):
+    """
+    Recompute `amount_paid` / `is_fully_paid` on `booking` (in memory) from its
+    succeeded payments. The caller saves; one aggregate over the
+    (booking, payment_type, status) index.
+    """
+    totals = Payment.objects.filter(booking=booking, status="succeeded").aggregate(
+        paid=Sum("amount"),
+        remaining=Count("pk", filter=Q(payment_type="remaining")),
+    )
+    booking.amount_paid = totals["paid"] or Decimal("0.00")
+    nothing_left = bool(booking.price and booking.advance and booking.price - booking.advance <= 0)
+    booking.is_fully_paid = bool(totals["remaining"]) or (booking.is_advance_paid and nothing_left)
+
+
+def settle_payment(booking_id, intent_id, amount, payment_type, currency="inr", metadata=None):
+    """
+    Record payment `intent_id` as succeeded and update the booking's payment
+    state atomically. Safe to repeat for the same intent.
+
+    Returns (booking, advance_now_paid): the locked, updated booking and
+    whether this call is the one that marked its advance paid.
+    """
+    with transaction.atomic():
+        booking = Booking.objects.select_for_update().get(id=booking_id)
+        Payment.objects.update_or_create(
+            stripe_payment_intent_id=intent_id,
+            defaults={
+                "booking": booking,
+                "amount": amount,
+                "currency": currency,
+                "status": "succeeded",
+                "payment_type": payment_type,
+                "metadata": metadata,
+            }
+        )
+
+        advance_now_paid = payment_type == "advance" and not booking.is_advance_paid
+        if advance_now_paid:
+            booking.is_advance_paid = True
+        refresh_payment_state(booking)
+        booking.save(update_fields=["is_advance_paid", "amount_paid", "is_fully_paid", "updated_at"])
+    return booking, advance_now_paid
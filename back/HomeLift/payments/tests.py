@@ -1,3 +1,176 @@
-from django.test import TestCase
+import json
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bookings.tests.factories import BookingFixtures
+from payments import events
+from payments.gateway import get_gateway
+from payments.models import Payment, StripeEvent
+from payments.services import settle_payment
+
+
+class StripeWebhookQueueTests(BookingFixtures, TestCase):
+    """Webhooks are stored once and handled by the worker, with retries."""
+
+    def setUp(self):
+        super().setUp()
+        self.event = {
+            "id": "evt_1", "type": "payment_intent.succeeded",
+            "data": {"object": {
+                "id": "pi_1", "amount": 30000, "currency": "inr",
+                "metadata": {"booking_id": str(self.booking.id), "payment_type": "advance"},
+            }},
+        }
+
+    def _post(self, event):
+        return self.client.post(reverse("stripe-webhook"), json.dumps(event), content_type="application/json")
+
+    @mock.patch("bookings.dispatch.announce_new_job")
+    def test_redelivered_event_is_stored_and_handled_once(self, announce):
+        self.assertEqual(self._post(self.event).status_code, 200)
+        self.assertEqual(self._post(self.event).status_code, 200)
+        self.assertEqual(StripeEvent.objects.count(), 1)
+        self.booking.refresh_from_db()
+        self.assertFalse(self.booking.is_advance_paid)
+
+        self.assertEqual(events.process_pending_events(), 1)
+        self.assertEqual(events.process_pending_events(), 0)
+
+        self.booking.refresh_from_db()
+        self.assertTrue(self.booking.is_advance_paid)
+        self.assertEqual(Payment.objects.filter(stripe_payment_intent_id="pi_1").count(), 1)
+        self.assertEqual(announce.call_count, 1)
+        self.assertEqual(StripeEvent.objects.get().status, "processed")
+        self.assertEqual((self.booking.amount_paid, self.booking.is_fully_paid), (Decimal("300.00"), False))
+
+    def test_failed_event_is_retried_later(self):
+        events.store_event(self.event)
+        failing = mock.Mock(side_effect=RuntimeError("boom"))
+        with mock.patch.dict(events.HANDLERS, {"payment_intent.succeeded": failing}):
+            events.process_pending_events()
+            # Not due again until the backoff has passed
+            self.assertEqual(events.process_pending_events(), 0)
+
+        event = StripeEvent.objects.get()
+        self.assertEqual((event.status, event.attempts), ("pending", 1))
+        self.assertIn("boom", event.last_error)
+
+    def test_each_event_commits_on_its_own(self):
+        events.store_event(self.event)
+        events.store_event({"id": "evt_2", "type": "transfer.created", "data": {"object": {}}})
+        with mock.patch("bookings.dispatch.announce_new_job"):
+            self.assertEqual(events.process_pending_events(), 2)
+
+        statuses = dict(StripeEvent.objects.values_list("event_id", "status"))
+        # The broken transfer event failed alone; the payment was still settled
+        self.assertEqual(statuses, {"evt_1": "processed", "evt_2": "pending"})
+        self.booking.refresh_from_db()
+        self.assertTrue(self.booking.is_advance_paid)
+
+    def test_claimed_events_are_leased(self):
+        events.store_event(self.event)
+        claimed = events._claim_batch(10)
+        self.assertEqual([event.attempts for event in claimed], [1])
+        # A second worker finds nothing due until the lease runs out
+        self.assertEqual(events._claim_batch(10), [])
+
+
+class BookingPaymentStateTests(BookingFixtures, TestCase):
+    """Booking.amount_paid / is_fully_paid follow the booking's succeeded payments."""
+
+    def test_settling_advance_then_remaining(self):
+        booking, advance_now_paid = settle_payment(self.booking.id, "pi_a", Decimal("50.00"), "advance")
+        self.assertTrue(advance_now_paid)
+        self.assertEqual((booking.amount_paid, booking.is_fully_paid), (Decimal("50.00"), False))
+
+        # Replays of the same intent change nothing
+        _, advance_now_paid = settle_payment(self.booking.id, "pi_a", Decimal("50.00"), "advance")
+        self.assertFalse(advance_now_paid)
+
+        settle_payment(self.booking.id, "pi_r", Decimal("950.00"), "remaining")
+        self.booking.refresh_from_db()
+        self.assertEqual((self.booking.amount_paid, self.booking.is_fully_paid), (Decimal("1000.00"), True))
+        self.assertEqual(Payment.objects.filter(booking=self.booking, payment_type="remaining").count(), 1)
+
+
+@override_settings(
+    STRIPE_GATEWAY="payments.gateway.FakeStripeGateway",
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+)
+class CheckoutIntentReuseTests(BookingFixtures, TestCase):
+    """Opening checkout again reuses the booking's PaymentIntent."""
+
+    service_price = Decimal("5000.00")
+
+    def setUp(self):
+        super().setUp()
+        from django.core.cache import cache
+        cache.clear()
+        self.gateway = get_gateway()
+        self.gateway.reset()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def _checkout(self):
+        response = self.client.post(reverse("create-payment-intent"), {"booking_id": self.booking.id})
+        self.assertEqual(response.status_code, 200)
+        return response.data["client_secret"]
+
+    def test_repeat_checkout_makes_no_stripe_calls(self):
+        secret = self._checkout()
+        self.assertEqual(self.gateway.calls, ["create_payment_intent"])
+
+        self.assertEqual(self._checkout(), secret)
+        self.assertEqual(self._checkout(), secret)
+        self.assertEqual(self.gateway.calls, ["create_payment_intent"])
+        self.assertEqual(Payment.objects.get(booking=self.booking).status, "pending")
+
+    def test_changed_amount_updates_the_same_intent(self):
+        secret = self._checkout()
+        self.booking.price = Decimal("4000.00")
+        self.booking.save()
+
+        self.assertEqual(self._checkout(), secret)
+        self.assertEqual(self.gateway.calls, ["create_payment_intent", "update_payment_intent"])
+        payment = Payment.objects.get(booking=self.booking)
+        self.assertEqual(payment.amount, Decimal("80.00"))
+        self.assertEqual(self.gateway.intents[payment.stripe_payment_intent_id]["amount"], 8000)
+
+    def _set_intent_status(self, status):
+        payment = Payment.objects.get(booking=self.booking)
+        self.gateway.intents[payment.stripe_payment_intent_id]["status"] = status
+        return payment
+
+    def test_checkout_is_refused_while_the_intent_is_processing(self):
+        self._checkout()
+        self._set_intent_status("processing")
+        self.booking.price = Decimal("4000.00")
+        self.booking.save()
+
+        response = self.client.post(reverse("create-payment-intent"), {"booking_id": self.booking.id})
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["error"], "Payment already in progress.")
+        self.assertEqual(Payment.objects.filter(booking=self.booking).count(), 1)
+
+    def test_succeeded_intent_is_not_replaced(self):
+        self._checkout()
+        self._set_intent_status("succeeded")
+        from django.core.cache import cache
+        cache.clear()
+
+        response = self.client.post(reverse("create-payment-intent"), {"booking_id": self.booking.id})
+        self.assertEqual(response.status_code, 409)
+        self.assertNotIn("create_payment_intent", self.gateway.calls[1:])
+
+    def test_canceled_intent_is_replaced(self):
+        secret = self._checkout()
+        self._set_intent_status("canceled")
+        self.booking.price = Decimal("4000.00")
+        self.booking.save()
+
+        self.assertNotEqual(self._checkout(), secret)
+        self.assertEqual(Payment.objects.filter(booking=self.booking).count(), 2)
@@ -4,7 +4,7 @@ from .views import CreatePaymentIntent, WalletPay
 from .webhooks import stripe_webhook
 
 urlpatterns = [
-    path("create-payment-intent/", CreatePaymentIntent.as_view()),
+    path("create-payment-intent/", CreatePaymentIntent.as_view(), name="create-payment-intent"),
     path("wallet-pay/", WalletPay.as_view(), name="wallet-pay"),
     path("webhook/", stripe_webhook, name="stripe-webhook"),
 ]
\ No newline at end of file
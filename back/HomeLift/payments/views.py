@@ -1,16 +1,19 @@
 # payments/views.py
+import logging
 import stripe
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from django.conf import settings
 from django.shortcuts import get_object_or_404
 
-stripe.api_key = settings.STRIPE_SECRET_KEY
-
 from rest_framework.permissions import IsAuthenticated
 from django.db import transaction
-from wallet.models import Wallet, WalletTransaction
+from wallet.models import Wallet
+from wallet.services import InsufficientFunds, post_entry
 from bookings.models import Booking
+from payments.intents import PaymentInProgress, checkout_intent
+from payments.services import settle_payment
+
+logger = logging.getLogger(__name__)
 
 class CreatePaymentIntent(APIView):
     permission_classes = [IsAuthenticated]
@@ -29,36 +32,32 @@ class CreatePaymentIntent(APIView):
         if payment_type == "advance":
             if booking.is_advance_paid:
                 return Response({"error": "Advance already paid."}, status=400)
-            amount = int(booking.advance * 100)
+            amount = booking.advance
         elif payment_type == "remaining":
             if not booking.is_advance_paid:
                 return Response({"error": "Advance must be paid first."}, status=400)
-            # 1. First check if it's already paid by looking for a successful payment
-            from payments.models import Payment
-            if Payment.objects.filter(booking=booking, status='succeeded', metadata__payment_type='remaining').exists():
+            # 1. First check if it's already paid
+            if booking.is_fully_paid:
                 return Response({"error": "Remaining balance already paid."}, status=400)
             
             # 2. Check price vs advance edge case
             if booking.price and booking.advance and (booking.price - booking.advance) <= 0:
                 return Response({"error": "No remaining balance to pay."}, status=400)
-            remaining = booking.price - booking.advance
-            amount = int(remaining * 100)
+            amount = booking.price - booking.advance
         else:
             return Response({"error": "Invalid payment_type."}, status=400)
 
-        intent = stripe.PaymentIntent.create(
-            amount=amount,
-            currency="inr",
-            automatic_payment_methods={"enabled": True},
-            metadata={
-                "booking_id": booking.id,
-                "user_id": request.user.id,
-                "payment_type": payment_type
-            }
-        )
+        # Reuses the booking's open intent when there is one (payments/intents.py)
+        try:
+            client_secret = checkout_intent(booking, payment_type, amount)
+        except PaymentInProgress as e:
+            return Response({"error": str(e)}, status=409)
+        except stripe.error.StripeError as e:
+            logger.error(f"PaymentIntent for Booking #{booking.id} failed: {e}")
+            return Response({"error": "Payment service unavailable. Please try again."}, status=502)
 
         return Response({
-            "client_secret": intent.client_secret
+            "client_secret": client_secret
         })
 
 class WalletPay(APIView):
@@ -72,8 +71,8 @@ class WalletPay(APIView):
         if not booking_id:
             return Response({"error": "booking_id is required"}, status=400)
             
-        # Securely fetch the booking
-        booking = get_object_or_404(Booking, id=booking_id, user=request.user)
+        # Securely fetch the booking, locked so concurrent payments can't both pass the checks below
+        booking = get_object_or_404(Booking.objects.select_for_update(), id=booking_id, user=request.user)
         
         if payment_type == "advance":
             if booking.is_advance_paid:
@@ -83,8 +82,7 @@ class WalletPay(APIView):
             if not booking.is_advance_paid:
                 return Response({"error": "Advance must be paid first."}, status=400)
             
-            from payments.models import Payment
-            if Payment.objects.filter(booking=booking, status='succeeded', metadata__payment_type='remaining').exists():
+            if booking.is_fully_paid:
                 return Response({"error": "Remaining balance already paid."}, status=400)
             
             amount_to_deduct = booking.price - booking.advance
@@ -92,31 +90,23 @@ class WalletPay(APIView):
             return Response({"error": "Invalid payment_type."}, status=400)
             
         wallet, created = Wallet.objects.get_or_create(user=request.user, wallet_type='user')
-        
-        if wallet.balance < amount_to_deduct:
-            return Response({"error": f"Insufficient wallet balance. Need ₹{amount_to_deduct}."}, status=400)
 
-        # Proceed with payment
-        wallet.balance -= amount_to_deduct
-        wallet.save()
-
-        # Record the wallet transaction
-        WalletTransaction.objects.create(
-            wallet=wallet,
-            amount=amount_to_deduct,
-            transaction_type='debit',
-            description=f"{payment_type.capitalize()} payment for Booking #{booking.id}",
-            status='completed'
-        )
+        # Debit through the ledger: atomic, and refused if the balance is short
+        try:
+            post_entry(
+                wallet, amount_to_deduct, 'debit',
+                f"{payment_type.capitalize()} payment for Booking #{booking.id}",
+            )
+        except InsufficientFunds:
+            return Response({"error": f"Insufficient wallet balance. Need ₹{amount_to_deduct}."}, status=400)
 
-        # Record in Payment model for consistency (especially for remaining balance calculation)
-        from payments.models import Payment
+        # Record the payment and update the booking's payment state
         import uuid
-        Payment.objects.create(
-            booking=booking,
-            stripe_payment_intent_id=f"wallet_{booking.id}_{payment_type}_{uuid.uuid4().hex[:8]}", # Unique ID for wallet
-            amount=amount_to_deduct,
-            status="succeeded",
+        booking, advance_now_paid = settle_payment(
+            booking.id,
+            f"wallet_{booking.id}_{payment_type}_{uuid.uuid4().hex[:8]}", # Unique ID for wallet
+            amount_to_deduct,
+            payment_type,
             metadata={
                 "booking_id": booking.id,
                 "user_id": request.user.id,
@@ -125,12 +115,10 @@ class WalletPay(APIView):
             }
         )
 
-        # Update booking if it was advance
-        if payment_type == "advance":
-            booking.is_advance_paid = True
-            booking.save(update_fields=["is_advance_paid", "updated_at"])
-        else:
-            booking.save(update_fields=["updated_at"])
+        if advance_now_paid:
+            # Push the now-paid job to eligible providers
+            from bookings.dispatch import announce_new_job
+            announce_new_job(booking)
 
         return Response({
             "message": f"{payment_type.capitalize()} payment successful via wallet.",
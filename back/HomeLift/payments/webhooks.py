@@ -5,11 +5,18 @@ import logging
 from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
-from bookings.models import Booking
+
+from .events import store_event
+
 logger = logging.getLogger(__name__)
 
 @csrf_exempt
 def stripe_webhook(request):
+    """
+    Verify and store the event, then ack. Processing happens in the
+    `process_stripe_events` worker (payments/events.py); redelivered events
+    are deduplicated on their id.
+    """
     payload = request.body
     sig_header = request.META.get("HTTP_STRIPE_SIGNATURE")
     endpoint_secret = getattr(settings, "STRIPE_WEBHOOK_SECRET", None)
@@ -26,75 +33,10 @@ def stripe_webhook(request):
         logger.error(f"⚠️ Webhook signature verification failed: {e}")
         return HttpResponse(status=400)
 
-    if event["type"] == "payment_intent.succeeded":
-        intent = event["data"]["object"]
-        metadata = intent.get("metadata", {})
-        booking_id = metadata.get("booking_id")
-        user_id = metadata.get("user_id")
-        payment_type = metadata.get("payment_type", "advance")
-        
-        if booking_id:
-            try:
-                from payments.models import Payment
-                from notifications.utils import send_user_notification
-                booking = Booking.objects.get(id=booking_id)
-                
-                if payment_type == "remaining":
-                    booking.save(update_fields=["updated_at"])
-                else:
-                    booking.is_advance_paid = True
-                    booking.save(update_fields=["is_advance_paid", "updated_at"])
-                
-                # Record the payment
-                Payment.objects.update_or_create(
-                    stripe_payment_intent_id=intent["id"],
-                    defaults={
-                        "booking": booking,
-                        "amount": intent["amount"] / 100.0,
-                        "currency": intent["currency"],
-                        "status": "succeeded",
-                        "metadata": intent.get("metadata")
-                    }
-                )
-                
-                logger.info(f"✅ Booking #{booking_id} marked as paid.")
-                if user_id:
-                    send_user_notification(user_id, f"Payment of ₹{intent['amount']/100.0} was successful!")
-
-            except Booking.DoesNotExist:
-                logger.error(f"❌ Webhook error: Booking #{booking_id} not found.")
-
-    elif event["type"] == "payment_intent.payment_failed":
-        intent = event["data"]["object"]
-        error_message = intent.get("last_payment_error", {}).get("message", "Unknown error")
-        logger.error(f"❌ Payment failed for intent {intent['id']}: {error_message}")
-        
-        metadata = intent.get("metadata", {})
-        booking_id = metadata.get("booking_id")
-        
-        from payments.models import Payment
-        
-        if booking_id:
-            try:
-                booking = Booking.objects.get(id=booking_id)
-                Payment.objects.update_or_create(
-                    stripe_payment_intent_id=intent["id"],
-                    defaults={
-                        "booking": booking,
-                        "status": "failed",
-                        "metadata": metadata
-                    }
-                )
-            except Booking.DoesNotExist:
-                logger.error(f"❌ Webhook error on failure: Booking #{booking_id} not found.")
-        else:
-            logger.error(f"❌ Webhook error on failure: No booking_id in metadata for intent {intent['id']}")
-
-    elif event["type"] == "transfer.created":
-        # This handles the withdrawal to provider
-        transfer = event["data"]["object"]
-        metadata = transfer.get("metadata", {})
-        # Note: We don't always have user_id in transfer metadata unless we pass it specifically
-        logger.info(f"💰 Transfer Created: {transfer['id']} for {transfer['amount']/100.0}")
+    if not event.get("id") or not event.get("type"):
+        logger.error("⚠️ Webhook event without id/type ignored.")
+        return HttpResponse(status=400)
 
+    # construct_event returns a StripeObject; store the plain JSON
+    store_event(event.to_dict_recursive() if hasattr(event, "to_dict_recursive") else event)
     return HttpResponse(status=200)
@@ -0,0 +1,65 @@
+"""
+providers/service_index.py
+Service -> eligible provider index used to push new jobs.
+
+For each service the index holds the user ids of active providers approved
+for it, i.e. exactly the providers whose ProviderBookingsView would list a
+booking of that service. Entries live in Redis under `providers:service:<id>`,
+are built on first use with one query and dropped by the ProviderService,
+ProviderDetails.is_active and CustomUser.is_provider signals in
+providers/signals.py.
+"""
+import logging
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = "providers:service"
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _cache_key(service_id):
+    return f"{CACHE_KEY_PREFIX}:{service_id}"
+
+
+def build_service_providers(service_id):
+    """User ids of active providers approved for `service_id` (one query)."""
+    from .models import ProviderService
+
+    return list(
+        ProviderService.objects.filter(
+            service_id=service_id,
+            provider__is_active=True,
+            provider__user__is_provider=True,
+        ).values_list('provider__user_id', flat=True).distinct()
+    )
+
+
+def eligible_provider_ids(service_id):
+    """Cached `build_service_providers`; falls back to the database if Redis is unavailable."""
+    key = _cache_key(service_id)
+    try:
+        provider_ids = cache.get(key)
+    except Exception as e:
+        logger.warning("Provider index read failed (%s); resolving from the database.", e)
+        return build_service_providers(service_id)
+
+    if provider_ids is None:
+        provider_ids = build_service_providers(service_id)
+        try:
+            cache.set(key, provider_ids, CACHE_TIMEOUT)
+        except Exception as e:
+            logger.warning("Provider index write failed: %s", e)
+    return provider_ids
+
+
+def invalidate_service_providers(service_ids):
+    """Drop the index entries of `service_ids`; the next read rebuilds them."""
+    keys = [_cache_key(service_id) for service_id in set(service_ids)]
+    if not keys:
+        return
+    try:
+        cache.delete_many(keys)
+    except Exception as e:
+        logger.warning("Provider index invalidation failed: %s", e)
@@ -2,7 +2,7 @@
 import logging
 from django.apps import apps
 from django.conf import settings
-from django.db import IntegrityError, transaction
+from django.db import transaction
 from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
@@ -14,61 +14,13 @@ from .models import (
     ProviderService,
     ProviderServiceRequest,
 )
-from notifications.models import Notification
-from notifications.utils import send_user_notification
+from notifications.outbox import safe_create_notification
+from .service_index import invalidate_service_providers
 
 logger = logging.getLogger(__name__)
 User = apps.get_model(settings.AUTH_USER_MODEL)
 
 
-def get_system_user():
-    """Return a fallback system/admin user to receive system notifications."""
-    return User.objects.filter(is_superuser=True).first() or User.objects.filter(is_staff=True).first()
-
-
-def safe_create_notification(recipient, **kwargs):
-    """
-    Create Notification only if recipient exists. If recipient doesn't exist,
-    send to system user instead. Logs decisions.
-    """
-    try:
-        # If recipient is a user instance, check its existence in DB by PK
-        if recipient is not None:
-            if getattr(recipient, "pk", None) is None:
-                # No PK — treat as invalid
-                raise ValueError("recipient has no PK")
-            if not User.objects.filter(pk=recipient.pk).exists():
-                raise ValueError(f"recipient id={recipient.pk} does not exist")
-            # create notification for valid recipient
-            Notification.objects.create(recipient=recipient, **kwargs)
-            # Trigger WebSocket notification
-            send_user_notification(recipient.id, kwargs.get('message', ''))
-            return
-
-        # If recipient is None, route to system user
-        system_user = get_system_user()
-        if system_user:
-            Notification.objects.create(recipient=system_user, **kwargs)
-            logger.info("Routed notification to system_user because recipient was None.")
-            return
-
-        # No valid recipient at all — log and skip
-        logger.warning("No valid recipient found for notification; skipping. kwargs=%s", kwargs)
-
-    except (IntegrityError, ValueError) as exc:
-        # If DB integrity would be violated or recipient invalid, fallback to system user
-        logger.exception("Failed to create notification for recipient=%s: %s. Falling back to system user.", getattr(recipient, "pk", None), exc)
-        system_user = get_system_user()
-        if system_user:
-            try:
-                Notification.objects.create(recipient=system_user, **kwargs)
-                logger.info("Fallback notification created for system_user.")
-            except Exception:
-                logger.exception("Failed to create fallback notification for system_user.")
-        else:
-            logger.error("No system_user available to receive fallback notification.")
-
-
 @receiver(post_save, sender=ProviderApplication)
 def handle_provider_application_update(sender, instance, created, **kwargs):
     """
@@ -233,3 +185,37 @@ def reset_user_is_provider(sender, instance, **kwargs):
             "If this was unexpected, please investigate or contact support."
         )
     )
+
+
+# ---- SERVICE -> PROVIDER INDEX ----
+@receiver(post_save, sender=ProviderService)
+@receiver(post_delete, sender=ProviderService)
+def refresh_service_provider_index(sender, instance, **kwargs):
+    service_id = instance.service_id
+    transaction.on_commit(lambda: invalidate_service_providers([service_id]))
+
+
+@receiver(post_save, sender=ProviderDetails)
+def refresh_provider_service_index(sender, instance, created, **kwargs):
+    """Blocking/unblocking a provider changes eligibility for all of its services."""
+    if created or getattr(instance, '_old_is_active', None) == instance.is_active:
+        return
+    service_ids = list(instance.services.values_list('service_id', flat=True))
+    transaction.on_commit(lambda: invalidate_service_providers(service_ids))
+
+
+@receiver(post_save, sender=User)
+def refresh_index_on_provider_flag(sender, instance, created, update_fields=None, **kwargs):
+    """Promoting/demoting a user changes eligibility for all of their services."""
+    if update_fields is not None and 'is_provider' not in update_fields:
+        return
+    # Compared against the value loaded in CustomUser.from_db, so no extra query
+    old_is_provider = getattr(instance, '_loaded_is_provider', None)
+    instance._loaded_is_provider = instance.is_provider
+    if created or old_is_provider is None or old_is_provider == instance.is_provider:
+        return
+    service_ids = list(
+        ProviderService.objects.filter(provider__user=instance).values_list('service_id', flat=True)
+    )
+    if service_ids:
+        transaction.on_commit(lambda: invalidate_service_providers(service_ids))
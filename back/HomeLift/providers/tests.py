@@ -1,3 +1,46 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
-# Create your tests here.
+from bookings.tests.factories import create_service, create_user
+from providers.models import ProviderDetails, ProviderService
+from providers.service_index import eligible_provider_ids
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ServiceProviderIndexTests(TestCase):
+    """The cached service -> provider index follows changes to provider eligibility."""
+
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.service = create_service()
+        self.provider = create_user("pro", is_provider=True)
+        details = ProviderDetails.objects.create(user=self.provider)
+        with self.captureOnCommitCallbacks(execute=True):
+            ProviderService.objects.create(provider=details, service=self.service)
+
+    def test_demoted_provider_leaves_the_index(self):
+        self.assertEqual(eligible_provider_ids(self.service.id), [self.provider.id])
+
+        self.provider.is_provider = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.provider.save(update_fields=['is_provider'])
+
+        self.assertEqual(eligible_provider_ids(self.service.id), [])
+
+    def test_reloaded_user_demotion_is_noticed(self):
+        self.assertEqual(eligible_provider_ids(self.service.id), [self.provider.id])
+
+        user = type(self.provider).objects.get(pk=self.provider.pk)
+        user.is_provider = False
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+
+        self.assertEqual(eligible_provider_ids(self.service.id), [])
+
+    def test_profile_save_does_not_reread_the_user(self):
+        user = type(self.provider).objects.get(pk=self.provider.pk)
+        user.first_name = "Pat"
+        # The profile-picture check (users/signals.py) and the UPDATE; the flag is
+        # compared against the value loaded above
+        with self.assertNumQueries(2):
+            user.save()
@@ -18,7 +18,7 @@ from .serializers import (
     ProviderServiceRequestSerializer,
 )
 from core.permissions import IsNormalUser, IsAdminUserCustom, IsProviderUser
-from bookings.models import Booking, Review
+from bookings.models import Booking, DailyBookingStats, Review
 from services.models import Service
 
 logger = logging.getLogger(__name__)
@@ -126,6 +126,7 @@ class ProviderApplicationListAPIView(APIView):
     def get(self, request, *args, **kwargs):
         try:
             from core.pagination import StandardResultsSetPagination
+            from users.search import people_filter
             applications = ProviderApplication.objects.all().order_by('-created_at')
 
             # Status filter (default: all statuses)
@@ -136,13 +137,7 @@ class ProviderApplicationListAPIView(APIView):
             # Search by name / email / phone
             search = request.query_params.get('search')
             if search:
-                applications = applications.filter(
-                    Q(user__username__icontains=search) |
-                    Q(user__email__icontains=search) |
-                    Q(user__first_name__icontains=search) |
-                    Q(user__last_name__icontains=search) |
-                    Q(user__phone_number__icontains=search)
-                )
+                applications = applications.filter(people_filter(search, 'user__'))
 
             paginator = StandardResultsSetPagination()
             result_page = paginator.paginate_queryset(applications, request)
@@ -203,17 +198,12 @@ class ProvidersListAPIView(APIView):
     def get(self, request, *args, **kwargs):
         try:
             from core.pagination import StandardResultsSetPagination
+            from users.search import people_filter
             providers = ProviderDetails.objects.all().select_related('user').order_by('-created_at')
 
             search_query = request.query_params.get('search')
             if search_query:
-                providers = providers.filter(
-                    Q(user__username__icontains=search_query) |
-                    Q(user__email__icontains=search_query) |
-                    Q(user__first_name__icontains=search_query) |
-                    Q(user__last_name__icontains=search_query) |
-                    Q(user__phone_number__icontains=search_query)
-                )
+                providers = providers.filter(people_filter(search_query, 'user__'))
 
             status_filter = request.query_params.get('status')
             if status_filter == 'active':
@@ -449,6 +439,7 @@ class AdminServiceRequestListView(APIView):
     def get(self, request, *args, **kwargs):
         try:
             from core.pagination import StandardResultsSetPagination
+            from users.search import people_filter
             qs = ProviderServiceRequest.objects \
                 .select_related('provider__user', 'service', 'service__category') \
                 .order_by('-created_at')
@@ -458,13 +449,11 @@ class AdminServiceRequestListView(APIView):
             if status_param in ('pending', 'approved', 'rejected'):
                 qs = qs.filter(status=status_param)
 
-            # Search by provider name / email
+            # Search by provider name / email / phone, or service name
             search = request.query_params.get('search')
             if search:
                 qs = qs.filter(
-                    Q(provider__user__username__icontains=search) |
-                    Q(provider__user__email__icontains=search) |
-                    Q(provider__user__first_name__icontains=search) |
+                    people_filter(search, 'provider__user__') |
                     Q(service__name__icontains=search)
                 )
 
@@ -557,16 +546,22 @@ class ProviderDashboardView(APIView):
                 from datetime import timedelta
                 date_filter = now - timedelta(days=365)
 
+            # Counts and revenue come from the daily rollup (bookings/stats.py),
+            # applied at day granularity
+            stats_qs = DailyBookingStats.objects.filter(provider_user_id=provider_user.id)
             bookings_qs = Booking.objects.filter(provider=provider_user)
             if date_filter:
+                stats_qs = stats_qs.filter(day__gte=timezone.localdate(date_filter))
                 bookings_qs = bookings_qs.filter(created_at__gte=date_filter)
             if end_date_filter:
+                stats_qs = stats_qs.filter(day__lte=timezone.localdate(end_date_filter))
                 bookings_qs = bookings_qs.filter(created_at__lte=end_date_filter)
 
-            total_bookings = bookings_qs.count()
-            completed_qs = bookings_qs.filter(status='completed')
-            total_revenue = completed_qs.aggregate(Sum('price'))['price__sum'] or Decimal('0')
+            status_counts = list(stats_qs.values('status').annotate(total=Sum('count')).filter(total__gt=0))
+            total_bookings = sum(s['total'] for s in status_counts)
+            total_revenue = stats_qs.filter(status='completed').aggregate(Sum('revenue'))['revenue__sum'] or Decimal('0')
             your_earnings = total_revenue * Decimal('0.93')
+            # Distinct customers aren't in the rollup; bounded by this provider's bookings
             active_customers = bookings_qs.values('user').distinct().count()
 
             avg_rating = Review.objects.filter(
@@ -574,12 +569,12 @@ class ProviderDashboardView(APIView):
             ).aggregate(Avg('rating'))['rating__avg'] or 0.0
             avg_rating = round(float(avg_rating), 1)
 
-            monthly_stats = bookings_qs.annotate(
-                month=TruncMonth('created_at')
+            monthly_stats = stats_qs.annotate(
+                month=TruncMonth('day')
             ).values('month').annotate(
-                bookings=Count('id'),
-                revenue=Sum('price')
-            ).order_by('month')[:6]
+                bookings=Sum('count'),
+                revenue=Sum('revenue')
+            ).filter(bookings__gt=0).order_by('month')[:6]
 
             formatted_monthly = [
                 {
@@ -590,9 +585,8 @@ class ProviderDashboardView(APIView):
                 for s in monthly_stats
             ]
 
-            status_counts = bookings_qs.values('status').annotate(count=Count('status'))
             role_data = [
-                {"name": s['status'].replace('_', ' ').capitalize(), "value": s['count']}
+                {"name": s['status'].replace('_', ' ').capitalize(), "value": s['total']}
                 for s in status_counts
             ]
 
@@ -0,0 +1,117 @@
+"""
+services/catalog.py
+Precomputed, versioned snapshot of the public service catalog.
+
+The snapshot is built once (three queries: categories, services, offers),
+stored in Redis and served from there until an admin changes a Category,
+Service or Offer; those saves bump the catalog version and rebuild it on
+commit (see services/signals.py). It holds:
+
+- body / etag: the active category -> service tree (with resolved icons and
+  active offers) as ready-to-send JSON bytes and its strong ETag,
+- categories / services: the flat serializer output of every category and
+  service, used by the no_pagination list endpoints.
+
+Snapshots are keyed per day because offer resolution depends on the date.
+"""
+import hashlib
+import logging
+
+from django.core.cache import cache
+from django.db.models import Prefetch
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = "catalog:version"
+SNAPSHOT_KEY_PREFIX = "catalog:snapshot"
+SNAPSHOT_TIMEOUT = 60 * 60 * 24
+
+
+def _snapshot_key(day=None):
+    day = day or timezone.localtime(timezone.now()).date()
+    return f"{SNAPSHOT_KEY_PREFIX}:{day.isoformat()}"
+
+
+def _current_version():
+    try:
+        return cache.get_or_set(VERSION_KEY, 1, None)
+    except Exception:
+        return 0
+
+
+def build_snapshot(version=None):
+    """Serialize the whole catalog from the database."""
+    from offers.resolver import build_offer_map
+    from .models import Category, Service
+    from .serializers import CategorySerializer, ServiceSerializer
+
+    version = _current_version() if version is None else version
+    # Built straight from the database: the cached offer map may not have been invalidated yet
+    context = {'offer_map': build_offer_map()}
+
+    categories = list(
+        Category.objects.order_by('name').prefetch_related(
+            Prefetch('services', queryset=Service.objects.order_by('name'))
+        )
+    )
+    services = sorted(
+        (service for category in categories for service in category.services.all()),
+        key=lambda s: (s.name, s.id),
+    )
+
+    category_data = CategorySerializer(categories, many=True).data
+    service_data = ServiceSerializer(services, many=True, context=context).data
+    services_by_category = {}
+    for item in service_data:
+        services_by_category.setdefault(item['category'], []).append(item)
+
+    tree = [
+        {**category, 'services': [s for s in services_by_category.get(category['id'], []) if s['is_active']]}
+        for category in category_data if category['is_active']
+    ]
+    body = JSONRenderer().render({'version': version, 'categories': tree})
+
+    return {
+        'version': version,
+        'etag': f'"{version}-{hashlib.sha256(body).hexdigest()[:32]}"',
+        'body': body,
+        'categories': [dict(c) for c in category_data],
+        'services': [dict(s) for s in service_data],
+    }
+
+
+def get_snapshot():
+    """Return the current snapshot, building and caching it on a miss."""
+    key = _snapshot_key()
+    try:
+        snapshot = cache.get(key)
+    except Exception as e:
+        logger.warning("Catalog cache read failed (%s); building from the database.", e)
+        return build_snapshot()
+
+    if snapshot is None:
+        snapshot = build_snapshot()
+        try:
+            cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+        except Exception as e:
+            logger.warning("Catalog cache write failed: %s", e)
+    return snapshot
+
+
+def rebuild_snapshot():
+    """Bump the catalog version and store a fresh snapshot for today."""
+    try:
+        try:
+            version = cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.add(VERSION_KEY, 1, None)
+            version = cache.incr(VERSION_KEY)
+        cache.set(_snapshot_key(), build_snapshot(version), SNAPSHOT_TIMEOUT)
+    except Exception as e:
+        logger.warning("Catalog snapshot rebuild failed: %s", e)
+        try:
+            cache.delete(_snapshot_key())
+        except Exception:
+            pass
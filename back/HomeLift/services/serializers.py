@@ -1,7 +1,5 @@
 from rest_framework import serializers
 from .models import Category, Service
-from django.utils import timezone
-from django.db.models import Q
 
 class CategorySerializer(serializers.ModelSerializer):
     icon = serializers.ImageField(required=False, allow_null=True)
@@ -35,20 +33,10 @@ class ServiceSerializer(serializers.ModelSerializer):
         ]
 
     def get_active_offer(self, obj):
-        from offers.models import Offer
-        from offers.serializers import OfferSerializer
-        # Use localtime to ensure we match the current day in the project's locality
-        now = timezone.localtime(timezone.now()).date()
-
-        # Priority: 1. Service-specific offer, 2. Global offer (service is null)
-        # We order by -discount_value to give the customer the best deal if multiple apply
-        offer = Offer.objects.filter( 
-            Q(service=obj) | Q(service__isnull=True), 
-            is_active=True,
-            start_date__lte=now,
-            end_date__gte=now
-        ).order_by('-discount_value').first()
-
-        if offer:
-            return OfferSerializer(offer).data
-        return None
\ No newline at end of file
+        from offers.resolver import best_offer_for, get_offer_map
+        # Best of the service-specific and global offers, read from the cached
+        # offer map (or one passed in context); loaded once per serializer so
+        # a list costs one cache read.
+        if not hasattr(self, '_offer_map'):
+            self._offer_map = self.context.get('offer_map') or get_offer_map()
+        return best_offer_for(obj.id, self._offer_map)
\ No newline at end of file
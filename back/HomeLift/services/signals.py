@@ -1,6 +1,9 @@
-from django.db.models.signals import post_delete, pre_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from cloudinary.uploader import destroy
+from offers.models import Offer
+from .catalog import rebuild_snapshot
 from .models import Category, Service
 
 
@@ -45,3 +48,15 @@ def update_service_icon(sender, instance, **kwargs):
         return
     if old_instance.icon and not is_same_file(old_instance.icon, instance.icon) and old_instance.icon != instance.icon:
         destroy(old_instance.icon.public_id)
+
+
+# ---- CATALOG SNAPSHOT ----
+# Any catalog edit bumps the snapshot version and rebuilds it once committed.
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+def refresh_catalog_snapshot(sender, instance, **kwargs):
+    transaction.on_commit(rebuild_snapshot)
@@ -1,3 +1,46 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from bookings.tests.factories import create_service
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class PublicCatalogTests(TestCase):
+    """The public catalog is served from its snapshot and revalidated by ETag."""
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service = create_service(name="Deep clean")
+        self.client = APIClient()
+        self.url = reverse('public-catalog')
+
+    def _service_names(self, response):
+        body = json.loads(response.content)
+        return [s['name'] for c in body['categories'] for s in c['services']]
+
+    def test_matching_etag_is_not_modified(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(self._service_names(first), ["Deep clean"])
+
+        with self.assertNumQueries(0):
+            again = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again['ETag'], first['ETag'])
+
+    def test_service_change_rebuilds_the_snapshot(self):
+        first = self.client.get(self.url)
+
+        self.service.name = "Kitchen clean"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.service.save()
+
+        stale = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(stale.status_code, 200)
+        self.assertNotEqual(stale['ETag'], first['ETag'])
+        self.assertEqual(self._service_names(stale), ["Kitchen clean"])
@@ -2,7 +2,8 @@
 from django.urls import path
 from .views import (
     CategoryListCreateView, CategoryDetailView,
-    ServiceListCreateView, ServiceDetailView
+    ServiceListCreateView, ServiceDetailView,
+    PublicCatalogView,
 )
 
 urlpatterns = [
@@ -11,4 +12,6 @@ urlpatterns = [
 
     path('services/', ServiceListCreateView.as_view(), name='service-list-create'),
     path('services/<int:pk>/', ServiceDetailView.as_view(), name='service-detail'),
+
+    path('catalog/', PublicCatalogView.as_view(), name='public-catalog'),
 ]
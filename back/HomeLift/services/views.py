@@ -5,6 +5,63 @@ from .models import Category, Service
 from .serializers import CategorySerializer, ServiceSerializer
 from core.permissions import IsAdminUserCustom,AllowAnyCustom
 
+
+def _snapshot_listing(request, kind):
+    """
+    Serve an unfiltered `no_pagination` listing straight from the catalog
+    snapshot (no database queries). Returns None when the request needs the
+    queryset (search, category filter or pagination).
+    """
+    params = request.query_params
+    if params.get('no_pagination', 'false').lower() != 'true':
+        return None
+    if params.get('search') or params.get('category') not in (None, '', 'all'):
+        return None
+
+    from .catalog import get_snapshot
+    snapshot = get_snapshot()
+    rows = snapshot[kind]
+    status_filter = params.get('status')
+    if status_filter == 'active':
+        rows = [row for row in rows if row['is_active']]
+    elif status_filter == 'inactive':
+        rows = [row for row in rows if not row['is_active']]
+
+    response = Response(rows)
+    response['X-Catalog-Version'] = str(snapshot['version'])
+    return response
+
+
+# ---------------- Public Catalog ----------------
+class PublicCatalogView(APIView):
+    """
+    Active category -> service tree with resolved offers, served from the
+    precomputed snapshot in Redis. Supports conditional GETs via a strong ETag.
+    """
+    permission_classes = [AllowAnyCustom]
+    authentication_classes = []
+
+    def get(self, request):
+        from django.http import HttpResponse, HttpResponseNotModified
+        from django.utils.http import parse_etags
+        from .catalog import get_snapshot
+
+        snapshot = get_snapshot()
+        etag = snapshot['etag']
+        headers = {
+            'ETag': etag,
+            'Cache-Control': 'public, max-age=0, must-revalidate',
+            'X-Catalog-Version': str(snapshot['version']),
+        }
+
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            tags = parse_etags(if_none_match)
+            if '*' in tags or etag in tags:
+                return HttpResponseNotModified(headers=headers)
+
+        return HttpResponse(snapshot['body'], content_type='application/json', headers=headers)
+
 # ---------------- Category Views ----------------
 class CategoryListCreateView(APIView):
     permission_classes = [AllowAnyCustom]
@@ -12,6 +69,10 @@ class CategoryListCreateView(APIView):
     def get(self, request):
         from core.pagination import StandardResultsSetPagination
         from django.db.models import Q
+        cached = _snapshot_listing(request, 'categories')
+        if cached is not None:
+            return cached
+
         categories = Category.objects.all().order_by('name')
 
         # Search
@@ -90,6 +151,10 @@ class ServiceListCreateView(APIView):
     def get(self, request):
         from core.pagination import StandardResultsSetPagination
         from django.db.models import Q
+        cached = _snapshot_listing(request, 'services')
+        if cached is not None:
+            return cached
+
         services = Service.objects.all().select_related('category').order_by('name')
 
         # Search
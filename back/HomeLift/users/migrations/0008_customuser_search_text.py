@@ -0,0 +1,40 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:28
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+# Trigram index for people search (users/search.py). PostgreSQL only; other
+# backends scan search_text.
+CREATE_INDEX_SQL = """
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS customuser_search_text_trgm_idx
+    ON users_customuser USING gin (search_text gin_trgm_ops);
+"""
+
+DROP_INDEX_SQL = "DROP INDEX IF EXISTS customuser_search_text_trgm_idx;"
+
+
+def add_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_INDEX_SQL)
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_INDEX_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_alter_customuser_profile_picture'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='search_text',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.functions.text.Lower(django.db.models.functions.text.Concat('username', models.Value(' '), 'email', models.Value(' '), 'first_name', models.Value(' '), 'last_name', models.Value(' '), 'phone', output_field=models.TextField())), output_field=models.TextField()),
+        ),
+        migrations.RunPython(add_trigram_index, drop_trigram_index),
+    ]
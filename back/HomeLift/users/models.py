@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Concat, Lower
 from phonenumber_field.modelfields import PhoneNumberField
 from cloudinary.models import CloudinaryField
 from core.validators import validate_image_size
@@ -17,6 +18,25 @@ class CustomUser(AbstractUser):
     )
     is_provider = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
+    # Everything admin people search matches against (users/search.py); maintained
+    # by the database and trigram-indexed on PostgreSQL
+    search_text = models.GeneratedField(
+        expression=Lower(Concat(
+            'username', models.Value(' '), 'email', models.Value(' '),
+            'first_name', models.Value(' '), 'last_name', models.Value(' '), 'phone',
+            output_field=models.TextField(),
+        )),
+        output_field=models.TextField(),
+        db_persist=True,
+    )
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        # Stored flag, so saves can spot a promotion/demotion without re-reading
+        # the row (providers/signals.py); None when the field was deferred
+        user._loaded_is_provider = user.__dict__.get('is_provider')
+        return user
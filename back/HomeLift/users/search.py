@@ -0,0 +1,36 @@
+"""
+users/search.py
+People search shared by the admin lists of users, providers, provider
+applications and service requests.
+
+CustomUser.search_text is a stored generated column: username, email, first
+and last name and phone, lower-cased and space-separated, kept current by the
+database on every write. On PostgreSQL it has a pg_trgm GIN index (users
+0008), so each word of the query is answered from that one index instead of
+scanning five columns of every user row:
+
+- substring / prefix: "jo" finds john@…, "+9198" finds a phone number,
+- fuzzy (words of FUZZY_MIN_LENGTH+ characters): trigram word similarity,
+  so "jonh" or "smiht" still find "john smith".
+
+Every word has to match. Other databases only do substring matching.
+"""
+from django.db import connection
+from django.db.models import Q
+
+FUZZY_MIN_LENGTH = 4
+
+
+def people_filter(query, path=''):
+    """
+    Q object matching the users described by `query`. `path` is the relation
+    from the queried model to CustomUser, e.g. 'user__' or 'provider__user__'.
+    """
+    fuzzy = connection.vendor == 'postgresql'
+    condition = Q()
+    for word in query.lower().split():
+        word_match = Q(**{f'{path}search_text__contains': word})
+        if fuzzy and len(word) >= FUZZY_MIN_LENGTH:
+            word_match |= Q(**{f'{path}search_text__trigram_word_similar': word})
+        condition &= word_match
+    return condition
@@ -1,3 +1,48 @@
+import unittest
+
+from django.db import connection
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from bookings.tests.factories import create_user
+from providers.models import ProviderDetails
+
+
+class PeopleSearchTests(TestCase):
+    """Admin people search matches every word against name, email and phone."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(create_user("admin", is_staff=True))
+        self.john = create_user("jsmith", first_name="John", last_name="Smith", phone="+919876543210")
+        self.jane = create_user("jdoe", first_name="Jane", last_name="Doe")
+        self.provider = create_user("fixit", first_name="John", last_name="Carpenter", is_provider=True)
+        self.details = ProviderDetails.objects.create(user=self.provider)
+
+    def _search(self, url, query):
+        response = self.client.get(url, {"search": query})
+        self.assertEqual(response.status_code, 200)
+        return {row["id"] for row in response.data["results"]}
+
+    def _users(self, query):
+        return self._search("/user/manage/", query)
+
+    def test_words_match_partially_and_all_must_match(self):
+        self.assertEqual(self._users("JOHN"), {self.john.id, self.provider.id})
+        self.assertEqual(self._users("john smi"), {self.john.id})
+        self.assertEqual(self._users("jdoe@example"), {self.jane.id})
+        self.assertEqual(self._users("+9198765"), {self.john.id})
+        self.assertEqual(self._users("jane smith"), set())
+
+    def test_provider_list_searches_the_provider_user(self):
+        self.assertEqual(self._search("/provider/list/", "carpenter"), {self.details.id})
+        self.assertEqual(self._search("/provider/list/", "smith"), set())
+
+    def test_search_text_follows_profile_edits(self):
+        self.jane.last_name = "Fernandes"
+        self.jane.save()
+        self.assertEqual(self._users("fernandes"), {self.jane.id})
 
-# Create your tests here.
+    @unittest.skipUnless(connection.vendor == "postgresql", "fuzzy matching needs pg_trgm")
+    def test_misspelt_words_still_match(self):
+        self.assertEqual(self._users("jonh smiht"), {self.john.id})
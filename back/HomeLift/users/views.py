@@ -478,21 +478,15 @@ class UserManageView(APIView):
     permission_classes = [IsAdminUserCustom]
 
     def get(self, request):
-        from core.pagination import StandardResultsSetPagination
-        from django.db.models import Q
+        from core.pagination import UserKeysetPagination
+        from users.search import people_filter
         
         users = CustomUser.objects.filter(is_staff=False).order_by('-id')
         
         # Search functionality
         search_query = request.query_params.get('search')
         if search_query:
-            users = users.filter(
-                Q(username__icontains=search_query) |
-                Q(email__icontains=search_query) |
-                Q(phone_number__icontains=search_query) |
-                Q(first_name__icontains=search_query) |
-                Q(last_name__icontains=search_query)
-            )
+            users = users.filter(people_filter(search_query))
 
         # Status filter (active / inactive)
         status_filter = request.query_params.get('status')
@@ -501,7 +495,7 @@ class UserManageView(APIView):
         elif status_filter == 'inactive':
             users = users.filter(is_active=False)
 
-        paginator = StandardResultsSetPagination()
+        paginator = UserKeysetPagination()
         result_page = paginator.paginate_queryset(users, request)
         serializer = UserSerializer(result_page, many=True)
         return paginator.get_paginated_response(serializer.data)
@@ -1,18 +1,40 @@
 from django.contrib import admin
-from .models import Wallet, WalletTransaction
+from .models import PayoutBatch, PayoutItem, Wallet, WalletSnapshot, WalletTransaction
 
 @admin.register(Wallet)
 class WalletAdmin(admin.ModelAdmin):
     list_display = ('user', 'balance', 'created_at', 'updated_at')
     list_filter = ('created_at', 'updated_at')
     search_fields = ('user__email', 'user__phone_number')
-    readonly_fields = ('created_at', 'updated_at')
+    # Balances only change through ledger entries (wallet/services.py)
+    readonly_fields = ('balance', 'last_sequence', 'created_at', 'updated_at')
 
 @admin.register(WalletTransaction)
 class WalletTransactionAdmin(admin.ModelAdmin):
-    list_display = ('wallet', 'amount', 'transaction_type', 'status', 'created_at')
+    list_display = ('wallet', 'amount', 'transaction_type', 'status', 'sequence', 'balance_after', 'created_at')
     list_filter = ('transaction_type', 'status', 'created_at')
     search_fields = ('wallet__user__email', 'wallet__user__username', 'transaction_id')
-    readonly_fields = ('transaction_id', 'created_at')
+    readonly_fields = ('transaction_id', 'sequence', 'balance_after', 'created_at')
     date_hierarchy = 'created_at'
     ordering = ('-created_at',)
+
+@admin.register(WalletSnapshot)
+class WalletSnapshotAdmin(admin.ModelAdmin):
+    list_display = ('wallet', 'sequence', 'balance', 'created_at')
+    search_fields = ('wallet__user__email',)
+    readonly_fields = ('wallet', 'sequence', 'balance', 'created_at')
+    ordering = ('-created_at',)
+
+class PayoutItemInline(admin.TabularInline):
+    model = PayoutItem
+    extra = 0
+    can_delete = False
+    readonly_fields = ('withdrawal', 'amount', 'status', 'stripe_transfer_id', 'error', 'processed_at')
+
+@admin.register(PayoutBatch)
+class PayoutBatchAdmin(admin.ModelAdmin):
+    list_display = ('id', 'status', 'total', 'succeeded', 'failed', 'created_by', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    readonly_fields = ('created_by', 'status', 'total', 'succeeded', 'failed', 'created_at', 'updated_at', 'started_at', 'finished_at')
+    inlines = (PayoutItemInline,)
+    ordering = ('-created_at',)
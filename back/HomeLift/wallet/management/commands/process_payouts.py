@@ -0,0 +1,40 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+
+from wallet.payouts import DEFAULT_CONCURRENCY, process_payout_batches
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Pay out queued withdrawal batches, several Stripe transfers at a time."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+            help="Maximum number of transfers in flight at once."
+        )
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help="Keep running and poll for queued batches every N seconds. 0 (default) runs them once, for cron."
+        )
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options['concurrency'])
+        interval = options['interval']
+
+        while True:
+            try:
+                count = process_payout_batches(concurrency=concurrency)
+                if count or not interval:
+                    self.stdout.write(f"Ran {count} payout batch(es).")
+            except Exception as e:
+                logger.exception("process_payouts run failed: %s", e)
+                if not interval:
+                    raise
+
+            if not interval:
+                return
+            time.sleep(interval)
@@ -0,0 +1,42 @@
+import logging
+
+from django.core.management.base import BaseCommand
+from django.db.models import F, Max, Value
+from django.db.models.functions import Coalesce
+
+from wallet.models import Wallet
+from wallet.services import snapshot_wallet
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = "Checkpoint wallet balances and verify them against the ledger (run nightly)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help="Check every wallet, not only those with entries since their last snapshot."
+        )
+        parser.add_argument(
+            '--repair', action='store_true',
+            help="Reset balances that drifted from the ledger to the ledger value."
+        )
+
+    def handle(self, *args, **options):
+        wallets = Wallet.objects.order_by('pk')
+        if not options['all']:
+            wallets = wallets.annotate(
+                snapshot_sequence=Coalesce(Max('snapshots__sequence'), Value(0))
+            ).filter(last_sequence__gt=F('snapshot_sequence'))
+
+        checked = drifted = 0
+        for wallet in wallets.iterator():
+            try:
+                if snapshot_wallet(wallet, repair=options['repair']):
+                    drifted += 1
+            except Exception as e:
+                logger.exception("Snapshot of wallet %s failed: %s", wallet.pk, e)
+            checked += 1
+
+        self.stdout.write(f"Checked {checked} wallet(s); {drifted} differed from their ledger.")
@@ -0,0 +1,85 @@
+# Generated by Django 5.2.4 on 2026-10-18 01:34
+
+import django.db.models.deletion
+import re
+
+from django.db import migrations, models
+
+
+def open_ledgers(apps, schema_editor):
+    """
+    Give every existing wallet an opening snapshot of its current balance at
+    sequence 0, and link pending withdrawal entries to their requests.
+    Earlier entries stay as unsequenced history.
+    """
+    Wallet = apps.get_model('wallet', 'Wallet')
+    WalletSnapshot = apps.get_model('wallet', 'WalletSnapshot')
+    WalletTransaction = apps.get_model('wallet', 'WalletTransaction')
+    WithdrawalRequest = apps.get_model('wallet', 'WithdrawalRequest')
+
+    WalletSnapshot.objects.bulk_create(
+        (WalletSnapshot(wallet_id=pk, sequence=0, balance=balance)
+         for pk, balance in Wallet.objects.values_list('pk', 'balance').iterator()),
+        batch_size=1000,
+    )
+
+    pending = WalletTransaction.objects.filter(status='pending', description__startswith='Withdrawal Request #')
+    withdrawal_ids = set(WithdrawalRequest.objects.values_list('pk', flat=True))
+    for txn in pending:
+        match = re.match(r'Withdrawal Request #(\d+)', txn.description)
+        if match and int(match.group(1)) in withdrawal_ids:
+            txn.withdrawal_id = int(match.group(1))
+            txn.save(update_fields=['withdrawal'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wallet', '0003_withdrawalrequest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveBigIntegerField()),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='wallet',
+            name='last_sequence',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='wallettransaction',
+            name='balance_after',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='wallettransaction',
+            name='sequence',
+            field=models.PositiveBigIntegerField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='wallettransaction',
+            name='withdrawal',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='transactions', to='wallet.withdrawalrequest'),
+        ),
+        migrations.AddConstraint(
+            model_name='wallettransaction',
+            constraint=models.UniqueConstraint(fields=('wallet', 'sequence'), name='wallettxn_wallet_sequence_uniq'),
+        ),
+        migrations.AddField(
+            model_name='walletsnapshot',
+            name='wallet',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='wallet.wallet'),
+        ),
+        migrations.AddConstraint(
+            model_name='walletsnapshot',
+            constraint=models.UniqueConstraint(fields=('wallet', 'sequence'), name='walletsnapshot_wallet_seq_uniq'),
+        ),
+        migrations.RunPython(open_ledgers, migrations.RunPython.noop),
+    ]
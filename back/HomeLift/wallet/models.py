@@ -13,7 +13,10 @@ class Wallet(models.Model):
         related_name='wallets'
     )
     wallet_type = models.CharField(max_length=10, choices=WALLET_TYPES, default='user')
+    # Running balance, maintained only by wallet/services.py together with the ledger
     balance = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
+    # Sequence number of the last ledger entry applied to the balance
+    last_sequence = models.PositiveBigIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -44,19 +47,56 @@ class WalletTransaction(models.Model):
     transaction_type = models.CharField(max_length=10, choices=TRANSACTION_TYPES)
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='completed')
     description = models.CharField(max_length=255)
+    # Set when the entry is applied to the balance (status 'completed'):
+    # its position in the wallet's ledger and the balance right after it
+    sequence = models.PositiveBigIntegerField(null=True, blank=True, editable=False)
+    balance_after = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True, editable=False)
+    withdrawal = models.ForeignKey(
+        'WithdrawalRequest',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='transactions'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['wallet', 'sequence'], name='wallettxn_wallet_sequence_uniq'),
+        ]
+
     def __str__(self):
         return f"{self.transaction_type.capitalize()} - {self.amount} - {self.wallet.user.email}"
+
+    @property
+    def signed_amount(self):
+        return self.amount if self.transaction_type == 'credit' else -self.amount
     
     @property
     def user(self):
         return self.wallet.user
 
 
+class WalletSnapshot(models.Model):
+    """Checkpoint of a wallet's ledger: the balance after entry `sequence`."""
+    wallet = models.ForeignKey(Wallet, on_delete=models.CASCADE, related_name='snapshots')
+    sequence = models.PositiveBigIntegerField()
+    balance = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['wallet', 'sequence'], name='walletsnapshot_wallet_seq_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Snapshot #{self.sequence} of wallet {self.wallet_id}: {self.balance}"
+
+
 class WithdrawalRequest(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
+        ('processing', 'Processing'),
         ('completed', 'Completed'),
         ('failed', 'Failed'),
     ]
@@ -69,8 +109,70 @@ class WithdrawalRequest(models.Model):
     amount = models.DecimalField(max_digits=12, decimal_places=2)
     stripe_transfer_id = models.CharField(max_length=255, null=True, blank=True)
     status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='pending')
+    # Part of the transfer's idempotency key; bumped when Stripe refuses a transfer (wallet/payouts.py)
+    transfer_attempt = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return f"Withdrawal - {self.amount} - {self.provider.email} [{self.status}]"
+
+
+class PayoutBatch(models.Model):
+    """
+    A set of withdrawal requests approved together and paid out by the
+    `process_payouts` worker (wallet/payouts.py). Counters track progress.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+    ]
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='+'
+    )
+    status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='pending')
+    total = models.PositiveIntegerField(default=0)
+    succeeded = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Refreshed with every processed item: a 'running' batch that stops moving was abandoned
+    updated_at = models.DateTimeField(auto_now=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='payoutbatch_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"Payout batch #{self.pk} [{self.status}] {self.succeeded + self.failed}/{self.total}"
+
+
+class PayoutItem(models.Model):
+    """One withdrawal in a payout batch and the result of paying it out."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('succeeded', 'Succeeded'),
+        ('failed', 'Failed'),
+    ]
+    batch = models.ForeignKey(PayoutBatch, on_delete=models.CASCADE, related_name='items')
+    withdrawal = models.ForeignKey(WithdrawalRequest, on_delete=models.CASCADE, related_name='payout_items')
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='pending')
+    stripe_transfer_id = models.CharField(max_length=255, null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['batch', 'withdrawal'], name='payoutitem_batch_withdrawal_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Payout item #{self.pk} - withdrawal #{self.withdrawal_id} [{self.status}]"
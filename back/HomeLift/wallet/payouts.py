@@ -0,0 +1,338 @@
+"""
+wallet/payouts.py
+Paying out provider withdrawal requests, one at a time or in batches.
+
+`approve_withdrawal()` pays one request in three steps, so no row lock is
+held while Stripe is called:
+1. A short transaction locks the request, settles its ledger hold
+   (wallet/services.py) and marks it 'processing'.
+2. The Stripe transfer is created outside any transaction, with the
+   idempotency key `withdrawal-<id>-<attempt>`.
+3. A second short transaction records the result. A refused transfer gives
+   the money back to the wallet, puts the hold back, returns the request to
+   'pending' and bumps its attempt number, so a later approval makes a fresh
+   request instead of replaying Stripe's cached error.
+If Stripe can't be reached or has an internal error, the outcome is unknown:
+the request stays 'processing' and the next approval retries the transfer
+with the same key, so it can't be paid twice. AdminWithdrawalActionView uses
+`approve_withdrawal()` for single approvals.
+
+A PayoutBatch queues many requests, either the ones an admin selected or
+every eligible one. The `process_payouts` worker claims queued batches and
+pays their items on a thread pool of at most `concurrency` transfers at a
+time:
+- Every item is claimed ('processing') before it is paid, so two workers
+  can't pay the same item.
+- The result is recorded on the item (transfer id or error) and added to the
+  batch counters.
+- An item whose transfer had an unknown outcome goes back to 'pending', and
+  the batch stays running until it is resumed as abandoned (STALE_AFTER) and
+  the item is retried.
+- Progress is pushed to every connected admin socket as 'payout_progress'.
+
+Failed items leave their withdrawal pending, so a later batch can include it
+again.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import stripe
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from notifications.fanout import ADMIN_GROUP, fan_out_sync
+from notifications.utils import send_user_notification
+from payments.gateway import get_gateway
+from providers.models import ProviderDetails
+from .models import PayoutBatch, PayoutItem, WalletTransaction, WithdrawalRequest
+from .services import InsufficientFunds, post_entry, settle_entry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 8
+# A running batch with no progress for this long is considered abandoned and resumed
+STALE_AFTER = timedelta(minutes=10)
+
+
+# Stripe failures where the transfer may or may not have happened; retried with the same key
+TRANSIENT_STRIPE_ERRORS = (
+    stripe.error.APIConnectionError, stripe.error.APIError,
+    stripe.error.RateLimitError, stripe.error.IdempotencyError,
+)
+
+
+class PayoutError(Exception):
+    """A withdrawal can't be paid out. The message is shown to the admin."""
+
+
+class PayoutUnavailable(PayoutError):
+    """Stripe couldn't be reached or failed; the withdrawal can be retried."""
+
+
+def transfer_idempotency_key(withdrawal):
+    """The Stripe idempotency key of the withdrawal's current transfer attempt."""
+    return f"withdrawal-{withdrawal.pk}-{withdrawal.transfer_attempt}"
+
+
+def pending_withdrawal_entry(withdrawal):
+    """The pending ledger hold of a withdrawal request (older requests are matched by amount)."""
+    return (
+        withdrawal.transactions.filter(status='pending').first()
+        or WalletTransaction.objects.filter(
+            wallet=withdrawal.wallet, amount=withdrawal.amount, status='pending',
+            transaction_type='debit', withdrawal__isnull=True,
+        ).first()
+    )
+
+
+def _start_transfer(withdrawal_id):
+    """
+    Settle a pending withdrawal's hold and mark it 'processing'. A request
+    already 'processing' (its last transfer had an unknown outcome) is
+    returned as it is. Returns (withdrawal, provider's Stripe account id).
+    """
+    with transaction.atomic():
+        try:
+            # Locked so two admins (or an admin and a batch) can't both settle it
+            withdrawal = WithdrawalRequest.objects.select_for_update().get(pk=withdrawal_id)
+        except WithdrawalRequest.DoesNotExist:
+            raise PayoutError('Withdrawal record not found')
+        if withdrawal.status not in ('pending', 'processing'):
+            raise PayoutError('Can only modify pending withdrawals.')
+
+        provider_details = ProviderDetails.objects.filter(user_id=withdrawal.provider_id).first()
+        if provider_details is None:
+            raise PayoutError('Provider profile not found.')
+        if not provider_details.stripe_account_id:
+            raise PayoutError('Provider has not connected a Stripe account.')
+
+        if withdrawal.status == 'pending':
+            # Deduct balance ONLY now: settle the pending ledger entry
+            # (refused if the balance no longer covers it)
+            description = f'Withdrawal Request #{withdrawal.id} Approved'
+            txn = pending_withdrawal_entry(withdrawal)
+            try:
+                if txn:
+                    settle_entry(txn, 'completed', description)
+                else:
+                    post_entry(withdrawal.wallet, withdrawal.amount, 'debit', description, withdrawal=withdrawal)
+            except InsufficientFunds:
+                raise PayoutError('Insufficient balance at time of approval.')
+            withdrawal.status = 'processing'
+            withdrawal.save(update_fields=['status', 'updated_at'])
+    return withdrawal, provider_details.stripe_account_id
+
+
+def _fail_transfer(withdrawal, error):
+    """Undo a refused attempt: refund the wallet, put the hold back and reopen the request."""
+    with transaction.atomic():
+        locked = WithdrawalRequest.objects.select_for_update().get(pk=withdrawal.pk)
+        if locked.status != 'processing' or locked.transfer_attempt != withdrawal.transfer_attempt:
+            return  # Already recorded by whoever else retried it
+        post_entry(
+            locked.wallet, locked.amount, 'credit',
+            f'Withdrawal Request #{locked.id} transfer failed, refunded', withdrawal=locked,
+        )
+        post_entry(
+            locked.wallet, locked.amount, 'debit', f'Withdrawal Request #{locked.id} (Pending Approval)',
+            status='pending', withdrawal=locked,
+        )
+        locked.status = 'pending'
+        locked.transfer_attempt = F('transfer_attempt') + 1
+        locked.save(update_fields=['status', 'transfer_attempt', 'updated_at'])
+    logger.warning("Transfer for withdrawal %s refused: %s", withdrawal.pk, error)
+
+
+def approve_withdrawal(withdrawal_id):
+    """
+    Settle a pending withdrawal's ledger hold and transfer the amount to the
+    provider's Stripe account. Returns the completed WithdrawalRequest.
+    Raises PayoutError, leaving the request pending, if it can't be paid, and
+    PayoutUnavailable, leaving it processing, if the outcome is unknown.
+    """
+    withdrawal, destination = _start_transfer(withdrawal_id)
+
+    if settings.DEBUG and destination.startswith("acct_MOCK"):
+        transfer_id = "tr_MOCK_ADMIN_APPROVED"
+    else:
+        try:
+            transfer = get_gateway().create_transfer(
+                amount=int(withdrawal.amount * 100),
+                currency='inr',
+                destination=destination,
+                description=f"Withdrawal request #{withdrawal.id} for provider #{withdrawal.provider_id}",
+                idempotency_key=transfer_idempotency_key(withdrawal),
+            )
+        except TRANSIENT_STRIPE_ERRORS as e:
+            raise PayoutUnavailable(f'Stripe Error: {e.user_message or str(e)}')
+        except stripe.error.StripeError as e:
+            _fail_transfer(withdrawal, e)
+            raise PayoutError(f'Stripe Error: {e.user_message or str(e)}')
+        transfer_id = transfer["id"]
+
+    WithdrawalRequest.objects.filter(pk=withdrawal.pk, status='processing').update(
+        status='completed', stripe_transfer_id=transfer_id, updated_at=timezone.now()
+    )
+    withdrawal.refresh_from_db()
+    return withdrawal
+
+
+# ---- batches ----
+
+def eligible_withdrawals():
+    """Pending requests from providers with a Stripe account, not already queued in a batch."""
+    return (
+        WithdrawalRequest.objects.filter(status='pending')
+        .exclude(provider__provider_details__stripe_account_id__isnull=True)
+        .exclude(provider__provider_details__stripe_account_id='')
+        .exclude(payout_items__status__in=('pending', 'processing'))
+    )
+
+
+def create_batch(admin, withdrawal_ids=None):
+    """
+    Queue the given pending withdrawals (or, with no ids, every eligible one)
+    for payout. Requests that aren't eligible are skipped. Returns the batch,
+    or None if nothing was eligible.
+    """
+    withdrawals = eligible_withdrawals()
+    if withdrawal_ids is not None:
+        withdrawals = withdrawals.filter(pk__in=withdrawal_ids)
+    rows = list(withdrawals.order_by('created_at').values_list('pk', 'amount'))
+    if not rows:
+        return None
+
+    with transaction.atomic():
+        batch = PayoutBatch.objects.create(created_by=admin, total=len(rows))
+        PayoutItem.objects.bulk_create(
+            [PayoutItem(batch=batch, withdrawal_id=pk, amount=amount) for pk, amount in rows],
+            batch_size=500,
+        )
+    return batch
+
+
+def _progress_event(batch_id, item=None):
+    batch = PayoutBatch.objects.values('id', 'status', 'total', 'succeeded', 'failed').get(pk=batch_id)
+    payload = {'batch_id': batch.pop('id'), **batch}
+    if item is not None:
+        payload['item'] = {
+            'id': item.pk,
+            'withdrawal_id': item.withdrawal_id,
+            'status': item.status,
+            'error': item.error,
+        }
+    return {'type': 'payout_progress', 'payload': payload}
+
+
+def _report(batch_id, item=None):
+    try:
+        fan_out_sync([(ADMIN_GROUP, _progress_event(batch_id, item))])
+    except Exception as e:
+        logger.warning("Payout progress for batch %s not sent: %s", batch_id, e)
+
+
+def pay_item(item_id):
+    """
+    Pay one batch item and record the result. Returns the item, or None if it
+    was already handled (or is being handled by another worker). An item
+    whose transfer had an unknown outcome is returned pending again.
+    """
+    # Claimed in its own statement: no lock is held while Stripe is called
+    if not PayoutItem.objects.filter(pk=item_id, status='pending').update(status='processing'):
+        return None
+    item = PayoutItem.objects.get(pk=item_id)
+
+    try:
+        withdrawal = approve_withdrawal(item.withdrawal_id)
+        item.status = 'succeeded'
+        item.stripe_transfer_id = withdrawal.stripe_transfer_id
+    except PayoutUnavailable as e:
+        logger.warning("Payout item %s left pending for retry: %s", item.pk, e)
+        item.status = 'pending'
+        item.error = str(e)
+    except PayoutError as e:
+        item.status = 'failed'
+        item.error = str(e)
+    except Exception as e:
+        logger.exception("Payout item %s failed unexpectedly", item.pk)
+        item.status = 'failed'
+        item.error = repr(e)
+
+    with transaction.atomic():
+        if item.status == 'pending':
+            item.save(update_fields=['status', 'error'])
+        else:
+            item.processed_at = timezone.now()
+            item.save(update_fields=['status', 'stripe_transfer_id', 'error', 'processed_at'])
+            counter = 'succeeded' if item.status == 'succeeded' else 'failed'
+            PayoutBatch.objects.filter(pk=item.batch_id).update(
+                **{counter: F(counter) + 1}, updated_at=timezone.now()
+            )
+
+    if item.status == 'succeeded':
+        send_user_notification(withdrawal.provider_id, f"Your withdrawal of ₹{withdrawal.amount} has been approved and processed!")
+    _report(item.batch_id, item)
+    return item
+
+
+def _pay_item_in_thread(item_id):
+    try:
+        return pay_item(item_id)
+    finally:
+        # Pool threads each open their own connection
+        connection.close()
+
+
+def run_batch(batch, concurrency=DEFAULT_CONCURRENCY):
+    """
+    Pay every pending item of `batch`, `concurrency` transfers at a time. The
+    batch is completed unless some items were left pending for retry.
+    """
+    item_ids = list(batch.items.filter(status='pending').order_by('pk').values_list('pk', flat=True))
+    logger.info("Paying out batch %s: %s item(s), concurrency %s", batch.pk, len(item_ids), concurrency)
+
+    if concurrency <= 1:
+        for item_id in item_ids:
+            pay_item(item_id)
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='payout') as pool:
+            for future in [pool.submit(_pay_item_in_thread, item_id) for item_id in item_ids]:
+                future.result()
+
+    if not batch.items.filter(status='pending').exists():
+        PayoutBatch.objects.filter(pk=batch.pk).update(status='completed', finished_at=timezone.now())
+    _report(batch.pk)
+
+
+def claim_batch():
+    """Mark the oldest queued (or abandoned running) batch as running and return it, or None."""
+    stale = timezone.now() - STALE_AFTER
+    with transaction.atomic():
+        queued = PayoutBatch.objects.select_for_update(skip_locked=True).order_by('created_at')
+        batch = (
+            queued.filter(status='pending').first()
+            or queued.filter(status='running', updated_at__lt=stale).first()
+        )
+        if batch is None:
+            return None
+        batch.status = 'running'
+        batch.started_at = batch.started_at or timezone.now()
+        batch.save(update_fields=['status', 'started_at', 'updated_at'])
+        # Items claimed by a worker that died; their withdrawals resume with the same key
+        batch.items.filter(status='processing').update(status='pending')
+    return batch
+
+
+def process_payout_batches(concurrency=DEFAULT_CONCURRENCY):
+    """Run queued batches until none are left. Returns the number run."""
+    count = 0
+    while True:
+        batch = claim_batch()
+        if batch is None:
+            return count
+        _report(batch.pk)
+        run_batch(batch, concurrency)
+        count += 1
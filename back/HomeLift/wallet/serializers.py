@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import Wallet, WalletTransaction, WithdrawalRequest
+from .models import PayoutBatch, PayoutItem, Wallet, WalletTransaction, WithdrawalRequest
 
 class WithdrawalRequestSerializer(serializers.ModelSerializer):
     provider_email = serializers.EmailField(source='provider.email', read_only=True)
@@ -24,3 +24,27 @@ class WalletSerializer(serializers.ModelSerializer):
     def get_recent_transactions(self, obj):
         transactions = obj.transactions.all().order_by('-created_at')[:10]
         return TransactionSerializer(transactions, many=True).data
+
+class PayoutItemSerializer(serializers.ModelSerializer):
+    provider_email = serializers.EmailField(source='withdrawal.provider.email', read_only=True)
+
+    class Meta:
+        model = PayoutItem
+        fields = ['id', 'withdrawal', 'provider_email', 'amount', 'status', 'stripe_transfer_id', 'error', 'processed_at']
+
+class PayoutBatchSerializer(serializers.ModelSerializer):
+    created_by_email = serializers.EmailField(source='created_by.email', read_only=True, default=None)
+
+    class Meta:
+        model = PayoutBatch
+        fields = ['id', 'created_by', 'created_by_email', 'status', 'total', 'succeeded', 'failed', 'created_at', 'started_at', 'finished_at']
+
+class PayoutBatchDetailSerializer(PayoutBatchSerializer):
+    items = serializers.SerializerMethodField()
+
+    class Meta(PayoutBatchSerializer.Meta):
+        fields = PayoutBatchSerializer.Meta.fields + ['items']
+
+    def get_items(self, obj):
+        items = obj.items.select_related('withdrawal__provider').order_by('pk')
+        return PayoutItemSerializer(items, many=True).data
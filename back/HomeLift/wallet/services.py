@@ -0,0 +1,164 @@
+"""
+wallet/services.py
+Wallet ledger engine. The only code that changes a wallet's balance.
+
+WalletTransaction is an append-only ledger. An entry is posted with
+`post_entry()` and, once 'completed', applied to Wallet.balance by a
+single conditional UPDATE (`balance = balance ± amount`, and for debits
+`WHERE balance >= amount`), in the same transaction as the entry insert.
+The UPDATE takes the wallet's row lock until commit, so concurrent credits
+and debits serialize on the row instead of overwriting each other's
+read-modify-write, and no debit can overdraw the wallet.
+
+Each applied entry gets the wallet's next `sequence` number and the
+`balance_after` it produced. Pending entries (withdrawal holds) have no effect
+until `settle_entry()` completes or fails them. That is the only change an
+entry ever sees.
+
+Every SNAPSHOT_EVERY entries, and whenever `snapshot_wallets` runs, a
+WalletSnapshot checkpoints the balance at a sequence. `ledger_balance()`
+recomputes a balance from the ledger as the latest snapshot plus the entries
+after it: never a SUM over the whole history.
+"""
+import logging
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Sum, When
+from django.utils import timezone
+
+from .models import Wallet, WalletSnapshot, WalletTransaction
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_EVERY = 100
+
+
+class InsufficientFunds(Exception):
+    """A debit would take the wallet's balance below zero."""
+
+
+def _apply(wallet, signed_amount, allow_overdraft=False):
+    """
+    Add `signed_amount` to the wallet balance and advance its sequence.
+    Returns (sequence, balance_after). Must run inside transaction.atomic().
+    """
+    rows = Wallet.objects.filter(pk=wallet.pk)
+    if signed_amount < 0 and not allow_overdraft:
+        rows = rows.filter(balance__gte=-signed_amount)
+    updated = rows.update(
+        balance=F('balance') + signed_amount,
+        last_sequence=F('last_sequence') + 1,
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        raise InsufficientFunds(f"Insufficient wallet balance. Need ₹{-signed_amount}.")
+
+    # The row is locked by our UPDATE until commit, so this read is exact
+    sequence, balance = Wallet.objects.filter(pk=wallet.pk).values_list('last_sequence', 'balance').get()
+    wallet.last_sequence, wallet.balance = sequence, balance
+    return sequence, balance
+
+
+def post_entry(wallet, amount, transaction_type, description,
+               status='completed', withdrawal=None, allow_overdraft=False):
+    """
+    Append a ledger entry to `wallet`. A 'completed' entry is applied to the
+    balance at once (debits raise InsufficientFunds rather than overdraw);
+    'pending' entries wait for settle_entry(). Returns the WalletTransaction;
+    `wallet.balance` is refreshed in place.
+    """
+    amount = Decimal(str(amount))
+    if amount <= 0:
+        raise ValueError("Ledger amounts must be positive.")
+    if transaction_type not in dict(WalletTransaction.TRANSACTION_TYPES):
+        raise ValueError(f"Unknown transaction type {transaction_type!r}.")
+
+    entry = WalletTransaction(
+        wallet=wallet, amount=amount, transaction_type=transaction_type,
+        status=status, description=description, withdrawal=withdrawal,
+    )
+    with transaction.atomic():
+        if status == 'completed':
+            entry.sequence, entry.balance_after = _apply(wallet, entry.signed_amount, allow_overdraft)
+        entry.save()
+        _maybe_snapshot(wallet, entry.sequence)
+    return entry
+
+
+def settle_entry(entry, status, description=None, allow_overdraft=False):
+    """
+    Move a pending entry to 'completed' (applying it to the balance) or
+    'failed'. Returns False if it was no longer pending, so concurrent or
+    repeated settlements apply it at most once.
+    """
+    if status not in ('completed', 'failed'):
+        raise ValueError("Entries can only be settled as 'completed' or 'failed'.")
+
+    with transaction.atomic():
+        changes = {'status': status}
+        if description is not None:
+            changes['description'] = description
+        if not WalletTransaction.objects.filter(pk=entry.pk, status='pending').update(**changes):
+            return False
+        for field, value in changes.items():
+            setattr(entry, field, value)
+
+        if status == 'completed':
+            entry.sequence, entry.balance_after = _apply(entry.wallet, entry.signed_amount, allow_overdraft)
+            WalletTransaction.objects.filter(pk=entry.pk).update(
+                sequence=entry.sequence, balance_after=entry.balance_after
+            )
+            _maybe_snapshot(entry.wallet, entry.sequence)
+    return True
+
+
+# ---- snapshots ----
+
+def _signed_sum(entries):
+    return entries.aggregate(total=Sum(Case(
+        When(transaction_type='credit', then=F('amount')),
+        default=-F('amount'),
+        output_field=DecimalField(max_digits=14, decimal_places=2),
+    )))['total'] or Decimal('0')
+
+
+def ledger_balance(wallet, up_to=None):
+    """
+    Balance recomputed from the ledger after entry `up_to` (default: the
+    wallet's last applied entry): latest snapshot at or before it, plus the
+    entries applied since.
+    """
+    up_to = wallet.last_sequence if up_to is None else up_to
+    snapshot = wallet.snapshots.filter(sequence__lte=up_to).order_by('-sequence').first()
+    base_sequence, base_balance = (snapshot.sequence, snapshot.balance) if snapshot else (0, Decimal('0'))
+    return base_balance + _signed_sum(
+        wallet.transactions.filter(sequence__gt=base_sequence, sequence__lte=up_to)
+    )
+
+
+def _maybe_snapshot(wallet, sequence):
+    if sequence and sequence % SNAPSHOT_EVERY == 0:
+        WalletSnapshot.objects.create(wallet=wallet, sequence=sequence, balance=wallet.balance)
+
+
+def snapshot_wallet(wallet, repair=False):
+    """
+    Checkpoint `wallet` at its current sequence and check the running balance
+    against the ledger. Returns the drift (running - ledger). With `repair`,
+    a drifted running balance is reset to the ledger value.
+    """
+    with transaction.atomic():
+        wallet = Wallet.objects.select_for_update().get(pk=wallet.pk)
+        expected = ledger_balance(wallet)
+        drift = wallet.balance - expected
+        if drift:
+            logger.error(
+                "Wallet %s balance %s differs from its ledger (%s) at sequence %s",
+                wallet.pk, wallet.balance, expected, wallet.last_sequence,
+            )
+            if repair:
+                Wallet.objects.filter(pk=wallet.pk).update(balance=expected, updated_at=timezone.now())
+        if wallet.last_sequence and not wallet.snapshots.filter(sequence=wallet.last_sequence).exists():
+            WalletSnapshot.objects.create(wallet=wallet, sequence=wallet.last_sequence, balance=expected)
+    return drift
@@ -1,3 +1,210 @@
-from django.test import TestCase
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import stripe
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from bookings.tests.factories import create_user
+from payments.gateway import get_gateway
+from providers.models import ProviderDetails
+from wallet import services
+from wallet.models import PayoutBatch, Wallet, WalletSnapshot, WalletTransaction, WithdrawalRequest
+from wallet.payouts import STALE_AFTER, PayoutError, approve_withdrawal, process_payout_batches
+from wallet.services import InsufficientFunds, ledger_balance, post_entry, settle_entry, snapshot_wallet
+
+
+class WalletLedgerTests(TestCase):
+    """Balances only move through ledger entries and always match them."""
+
+    def setUp(self):
+        self.user = create_user("pro")
+        self.wallet = Wallet.objects.create(user=self.user, wallet_type='provider')
+
+    def test_entries_apply_in_sequence(self):
+        post_entry(self.wallet, Decimal("100.00"), 'credit', "Earnings")
+        entry = post_entry(self.wallet, Decimal("30.00"), 'debit', "Payment")
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("70.00"))
+        self.assertEqual(self.wallet.last_sequence, 2)
+        self.assertEqual((entry.sequence, entry.balance_after), (2, Decimal("70.00")))
+        self.assertEqual(ledger_balance(self.wallet), Decimal("70.00"))
+
+    def test_debit_cannot_overdraw(self):
+        post_entry(self.wallet, Decimal("10.00"), 'credit', "Earnings")
+        with self.assertRaises(InsufficientFunds):
+            post_entry(self.wallet, Decimal("10.01"), 'debit', "Payment")
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("10.00"))
+        self.assertEqual(WalletTransaction.objects.filter(wallet=self.wallet).count(), 1)
+
+    def test_pending_entry_applies_once_when_settled(self):
+        post_entry(self.wallet, Decimal("50.00"), 'credit', "Earnings")
+        withdrawal = WithdrawalRequest.objects.create(provider=self.user, wallet=self.wallet, amount=Decimal("20.00"))
+        hold = post_entry(self.wallet, Decimal("20.00"), 'debit', "Withdrawal", status='pending', withdrawal=withdrawal)
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("50.00"))
+        self.assertIsNone(hold.sequence)
+
+        self.assertTrue(settle_entry(hold, 'completed'))
+        self.assertFalse(settle_entry(hold, 'completed'))
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("30.00"))
+        self.assertEqual(ledger_balance(self.wallet), Decimal("30.00"))
+
+    def test_snapshots_bound_the_ledger_sum(self):
+        with mock.patch.object(services, 'SNAPSHOT_EVERY', 3):
+            for _ in range(7):
+                post_entry(self.wallet, Decimal("1.00"), 'credit', "Tip")
+
+        self.assertEqual(
+            list(WalletSnapshot.objects.filter(wallet=self.wallet).values_list('sequence', 'balance')),
+            [(3, Decimal("3.00")), (6, Decimal("6.00"))],
+        )
+        self.wallet.refresh_from_db()
+        self.assertEqual(ledger_balance(self.wallet), Decimal("7.00"))
+        self.assertEqual(ledger_balance(self.wallet, up_to=4), Decimal("4.00"))
+
+    def test_snapshot_reports_and_repairs_drift(self):
+        post_entry(self.wallet, Decimal("40.00"), 'credit', "Earnings")
+        Wallet.objects.filter(pk=self.wallet.pk).update(balance=Decimal("45.00"))
+
+        self.assertEqual(snapshot_wallet(self.wallet, repair=True), Decimal("5.00"))
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("40.00"))
+        self.assertEqual(snapshot_wallet(self.wallet), Decimal("0"))
+
+
+@override_settings(STRIPE_GATEWAY="payments.gateway.FakeStripeGateway")
+@mock.patch("wallet.payouts.send_user_notification")
+@mock.patch("wallet.payouts.fan_out_sync")
+class PayoutBatchTests(TestCase):
+    """Batched payouts pay each withdrawal once and record per-item results."""
+
+    def setUp(self):
+        self.gateway = get_gateway()
+        self.gateway.reset()
+        self.admin = create_user("admin", is_staff=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _withdrawal(self, name, amount, stripe_account_id="acct_1"):
+        user = create_user(name, is_provider=True)
+        ProviderDetails.objects.create(user=user, stripe_account_id=stripe_account_id)
+        wallet = Wallet.objects.create(user=user, wallet_type='provider')
+        post_entry(wallet, Decimal("500.00"), 'credit', "Earnings")
+        withdrawal = WithdrawalRequest.objects.create(provider=user, wallet=wallet, amount=Decimal(amount))
+        post_entry(wallet, withdrawal.amount, 'debit', "Withdrawal", status='pending', withdrawal=withdrawal)
+        return withdrawal
+
+    def test_all_eligible_batch_pays_and_reports_each_item(self, fan_out, notify):
+        paid = self._withdrawal("pro1", "100.00")
+        refused = self._withdrawal("pro2", "200.00", stripe_account_id="acct_closed")
+        unlinked = self._withdrawal("pro3", "300.00", stripe_account_id=None)
+
+        response = self.client.post(reverse("admin-payout-batches"), {"all_eligible": True}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["total"], 2)
+
+        real_transfer = self.gateway.create_transfer
+
+        def transfer(**kwargs):
+            if kwargs["destination"] == "acct_closed":
+                raise stripe.error.InvalidRequestError("Account closed", None)
+            return real_transfer(**kwargs)
+
+        with mock.patch.object(self.gateway, "create_transfer", side_effect=transfer):
+            self.assertEqual(process_payout_batches(concurrency=1), 1)
+
+        batch = PayoutBatch.objects.get()
+        self.assertEqual((batch.status, batch.succeeded, batch.failed), ("completed", 1, 1))
+        items = {item.withdrawal_id: item for item in batch.items.all()}
+        self.assertEqual(items[paid.pk].status, "succeeded")
+        self.assertIn("Account closed", items[refused.pk].error)
+        self.assertNotIn(unlinked.pk, items)
+
+        for withdrawal, status, balance in [(paid, "completed", "400.00"), (refused, "pending", "500.00")]:
+            withdrawal.refresh_from_db()
+            withdrawal.wallet.refresh_from_db()
+            self.assertEqual(withdrawal.status, status)
+            self.assertEqual(withdrawal.wallet.balance, Decimal(balance))
+        self.assertEqual(len(self.gateway.transfers), 1)
+
+        # Start, one event per item, finish
+        self.assertEqual(fan_out.call_count, 4)
+        self.assertEqual(fan_out.call_args[0][0][0][1]["payload"]["status"], "completed")
+
+    def test_queued_withdrawal_is_not_batched_twice(self, fan_out, notify):
+        withdrawal = self._withdrawal("pro1", "100.00")
+        url = reverse("admin-payout-batches")
+        self.assertEqual(self.client.post(url, {"withdrawal_ids": [withdrawal.pk]}, format="json").status_code, 201)
+        self.assertEqual(self.client.post(url, {"withdrawal_ids": [withdrawal.pk]}, format="json").status_code, 400)
+
+    @mock.patch("wallet.views.send_user_notification")
+    def test_lost_transfer_response_is_retried_with_the_same_key(self, view_notify, fan_out, notify):
+        withdrawal = self._withdrawal("pro1", "100.00")
+        self.client.post(reverse("admin-payout-batches"), {"all_eligible": True}, format="json")
+        real_transfer = self.gateway.create_transfer
+
+        def transfer_then_disconnect(**kwargs):
+            real_transfer(**kwargs)
+            raise stripe.error.APIConnectionError("Connection reset")
+
+        with mock.patch.object(self.gateway, "create_transfer", side_effect=transfer_then_disconnect):
+            process_payout_batches(concurrency=1)
+
+        batch = PayoutBatch.objects.get()
+        item = batch.items.get()
+        self.assertEqual((batch.status, item.status), ("running", "pending"))
+        self.assertIn("Connection reset", item.error)
+        withdrawal.refresh_from_db()
+        self.assertEqual(withdrawal.status, "processing")
+
+        # An admin approving it meanwhile gets the transfer Stripe already made
+        response = self.client.patch(
+            reverse("admin-withdrawals-action", args=[withdrawal.pk]), {"action": "approve"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.gateway.transfers), 1)
+
+        # The abandoned batch is resumed and finds the withdrawal already paid
+        PayoutBatch.objects.filter(pk=batch.pk).update(updated_at=timezone.now() - STALE_AFTER)
+        self.assertEqual(process_payout_batches(concurrency=1), 1)
+        batch.refresh_from_db()
+        self.assertEqual((batch.status, batch.succeeded, batch.failed), ("completed", 0, 1))
+        self.assertEqual(len(self.gateway.transfers), 1)
+        withdrawal.wallet.refresh_from_db()
+        self.assertEqual(withdrawal.wallet.balance, Decimal("400.00"))
+
+    def test_refused_transfer_is_retried_with_a_new_key(self, fan_out, notify):
+        withdrawal = self._withdrawal("pro1", "100.00")
+        real_transfer = self.gateway.create_transfer
+        keys = []
+
+        def transfer(**kwargs):
+            keys.append(kwargs["idempotency_key"])
+            if len(keys) == 1:
+                raise stripe.error.InvalidRequestError("Insufficient platform balance", None)
+            return real_transfer(**kwargs)
+
+        with mock.patch.object(self.gateway, "create_transfer", side_effect=transfer):
+            with self.assertRaises(PayoutError):
+                approve_withdrawal(withdrawal.pk)
+            withdrawal.refresh_from_db()
+            withdrawal.wallet.refresh_from_db()
+            self.assertEqual((withdrawal.status, withdrawal.transfer_attempt), ("pending", 1))
+            self.assertEqual(withdrawal.wallet.balance, Decimal("500.00"))
+            self.assertEqual(withdrawal.transactions.filter(status="pending").count(), 1)
+
+            self.assertEqual(approve_withdrawal(withdrawal.pk).status, "completed")
+
+        self.assertEqual(keys, [f"withdrawal-{withdrawal.pk}-0", f"withdrawal-{withdrawal.pk}-1"])
+        withdrawal.wallet.refresh_from_db()
+        self.assertEqual(withdrawal.wallet.balance, Decimal("400.00"))
+        self.assertEqual(snapshot_wallet(withdrawal.wallet), Decimal("0"))
@@ -4,7 +4,9 @@ from .views import (
     WalletWithdrawalView, 
     StripeConnectLinkView,
     AdminWithdrawalListView,
-    AdminWithdrawalActionView
+    AdminWithdrawalActionView,
+    AdminPayoutBatchView,
+    AdminPayoutBatchDetailView,
 )
 
 urlpatterns = [
@@ -15,4 +17,6 @@ urlpatterns = [
     # Admin Withdrawal Endpoints
     path('admin/withdrawals/', AdminWithdrawalListView.as_view(), name='admin-withdrawals'),
     path('admin/withdrawals/<int:pk>/action/', AdminWithdrawalActionView.as_view(), name='admin-withdrawals-action'),
+    path('admin/payout-batches/', AdminPayoutBatchView.as_view(), name='admin-payout-batches'),
+    path('admin/payout-batches/<int:pk>/', AdminPayoutBatchDetailView.as_view(), name='admin-payout-batch-detail'),
 ]
@@ -6,8 +6,10 @@ from django.db import transaction
 from decimal import Decimal
 import stripe
 from django.conf import settings
-from .models import Wallet, WalletTransaction, WithdrawalRequest
-from .serializers import WalletSerializer, WithdrawalRequestSerializer, TransactionSerializer
+from .models import PayoutBatch, Wallet, WithdrawalRequest
+from .serializers import PayoutBatchSerializer, PayoutBatchDetailSerializer, WalletSerializer, WithdrawalRequestSerializer, TransactionSerializer
+from .services import post_entry, settle_entry
+from .payouts import PayoutError, approve_withdrawal, create_batch, pending_withdrawal_entry
 from providers.models import ProviderDetails
 from notifications.utils import send_user_notification
 from core.permissions import IsAdminUserCustom
@@ -68,18 +70,21 @@ class WalletWithdrawalView(APIView):
         except Wallet.DoesNotExist:
             return Response({'detail': 'Provider wallet not found.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        from django.db.models import Sum
-        pending_total = WithdrawalRequest.objects.filter(
-            provider=request.user, 
-            status='pending'
-        ).aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
-
-        if (wallet.balance - pending_total) < amount:
-            return Response({'detail': f'Insufficient available balance. (Pending: ₹{pending_total})'}, status=status.HTTP_400_BAD_REQUEST)
-
         # 3. Process Withdrawal Request (Atomic)
         try:
             with transaction.atomic():
+                # Lock the wallet so concurrent requests can't both pass the available-balance check
+                wallet = Wallet.objects.select_for_update().get(pk=wallet.pk)
+
+                from django.db.models import Sum
+                pending_total = WithdrawalRequest.objects.filter(
+                    provider=request.user, 
+                    status='pending'
+                ).aggregate(Sum('amount'))['amount__sum'] or Decimal('0.00')
+
+                if (wallet.balance - pending_total) < amount:
+                    return Response({'detail': f'Insufficient available balance. (Pending: ₹{pending_total})'}, status=status.HTTP_400_BAD_REQUEST)
+
                 # a. Create Withdrawal Record
                 withdrawal = WithdrawalRequest.objects.create(
                     provider=request.user,
@@ -89,12 +94,9 @@ class WalletWithdrawalView(APIView):
                 )
                 
                 # b. Record Pending Transaction (Balance remains intact for now)
-                WalletTransaction.objects.create(
-                    wallet=wallet,
-                    amount=amount,
-                    transaction_type='debit',
-                    status='pending',
-                    description=f'Withdrawal Request #{withdrawal.id} (Pending Approval)'
+                post_entry(
+                    wallet, amount, 'debit', f'Withdrawal Request #{withdrawal.id} (Pending Approval)',
+                    status='pending', withdrawal=withdrawal,
                 )
 
                 # Send real-time notification
@@ -196,6 +198,53 @@ class AdminWithdrawalListView(APIView):
         return paginator.get_paginated_response(serializer.data)
 
 
+class AdminPayoutBatchView(APIView):
+    """
+    GET: payout batches, newest first.
+    POST: queue pending withdrawals for payout, either the selected
+    {"withdrawal_ids": [...]} or {"all_eligible": true}. The
+    `process_payouts` worker pays them and reports progress over the admin
+    socket ('payout_progress').
+    """
+    permission_classes = [IsAdminUserCustom]
+
+    def get(self, request):
+        from core.pagination import StandardResultsSetPagination
+        batches = PayoutBatch.objects.select_related('created_by').order_by('-created_at')
+        paginator = StandardResultsSetPagination()
+        result_page = paginator.paginate_queryset(batches, request)
+        return paginator.get_paginated_response(PayoutBatchSerializer(result_page, many=True).data)
+
+    def post(self, request):
+        withdrawal_ids = request.data.get('withdrawal_ids')
+        if request.data.get('all_eligible'):
+            withdrawal_ids = None
+        elif not isinstance(withdrawal_ids, list) or not withdrawal_ids:
+            return Response({'detail': 'Provide withdrawal_ids or all_eligible.'}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            try:
+                withdrawal_ids = [int(pk) for pk in withdrawal_ids]
+            except (TypeError, ValueError):
+                return Response({'detail': 'withdrawal_ids must be a list of ids.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        batch = create_batch(request.user, withdrawal_ids)
+        if batch is None:
+            return Response({'detail': 'No eligible pending withdrawals.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(PayoutBatchSerializer(batch).data, status=status.HTTP_201_CREATED)
+
+
+class AdminPayoutBatchDetailView(APIView):
+    """GET a payout batch with the result of every item."""
+    permission_classes = [IsAdminUserCustom]
+
+    def get(self, request, pk):
+        try:
+            batch = PayoutBatch.objects.select_related('created_by').get(pk=pk)
+        except PayoutBatch.DoesNotExist:
+            return Response({'detail': 'Payout batch not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(PayoutBatchDetailSerializer(batch).data)
+
+
 class AdminWithdrawalActionView(APIView):
     """PATCH to approve or reject a withdrawal."""
     permission_classes = [IsAdminUserCustom]
@@ -206,88 +255,39 @@ class AdminWithdrawalActionView(APIView):
         except WithdrawalRequest.DoesNotExist:
             return Response({'detail': 'Withdrawal record not found'}, status=status.HTTP_404_NOT_FOUND)
 
-        if withdrawal.status != 'pending':
-            return Response({'detail': 'Can only modify pending withdrawals.'}, status=status.HTTP_400_BAD_REQUEST)
-
         action = request.data.get('action') # 'approve' or 'reject'
         if action not in ['approve', 'reject']:
             return Response({'detail': 'Action must be approve or reject.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        wallet = withdrawal.wallet
-        try:
-            provider_details = ProviderDetails.objects.get(user=withdrawal.provider)
-        except ProviderDetails.DoesNotExist:
-            return Response({'detail': 'Provider profile not found.'}, status=status.HTTP_400_BAD_REQUEST)
+        # A 'processing' request (transfer outcome unknown) can only be approved again
+        if withdrawal.status != 'pending' and not (action == 'approve' and withdrawal.status == 'processing'):
+            return Response({'detail': 'Can only modify pending withdrawals.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        if action == 'approve':
+            # Ledger settlement, then the Stripe transfer outside the transaction (wallet/payouts.py)
+            try:
+                withdrawal = approve_withdrawal(withdrawal.pk)
+            except PayoutError as e:
+                return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            send_user_notification(withdrawal.provider.id, f"Your withdrawal of ₹{withdrawal.amount} has been approved and processed!")
+            return Response(WithdrawalRequestSerializer(withdrawal).data)
 
         try:
             with transaction.atomic():
-                if action == 'approve':
-                    # 1. Deduct balance ONLY now
-                    if wallet.balance < withdrawal.amount:
-                         return Response({'detail': 'Insufficient balance at time of approval.'}, status=status.HTTP_400_BAD_REQUEST)
-                    
-                    wallet.balance -= withdrawal.amount
-                    wallet.save()
-
-                    # 2. Update/Create Transaction
-                    # Find the pending transaction and mark it completed
-                    txn = WalletTransaction.objects.filter(
-                        wallet=wallet, 
-                        amount=withdrawal.amount, 
-                        status='pending',
-                        transaction_type='debit'
-                    ).first()
-                    if txn:
-                        txn.status = 'completed'
-                        txn.description = f'Withdrawal Request #{withdrawal.id} Approved'
-                        txn.save()
-                    else:
-                        WalletTransaction.objects.create(
-                            wallet=wallet,
-                            amount=withdrawal.amount,
-                            transaction_type='debit',
-                            status='completed',
-                            description=f'Withdrawal Request #{withdrawal.id} Approved'
-                        )
-
-                    # 3. Admin Process (Stripe etc)
-                    if settings.DEBUG and provider_details.stripe_account_id.startswith("acct_MOCK"):
-                        withdrawal.stripe_transfer_id = "tr_MOCK_ADMIN_APPROVED"
-                        withdrawal.status = 'completed'
-                    else:
-                        try:
-                            transfer = stripe.Transfer.create(
-                                amount=int(withdrawal.amount * 100),
-                                currency='inr',
-                                destination=provider_details.stripe_account_id,
-                                description=f"Withdrawal request #{withdrawal.id} for {withdrawal.provider.email}"
-                            )
-                            withdrawal.stripe_transfer_id = transfer.id
-                            withdrawal.status = 'completed'
-                        except stripe.error.StripeError as e:
-                            # Rollback DB if Stripe fails
-                            raise Exception(f'Stripe Error: {e.user_message or str(e)}')
-                    
-                    withdrawal.save()
-                    send_user_notification(withdrawal.provider.id, f"Your withdrawal of ₹{withdrawal.amount} has been approved and processed!")
-
-                elif action == 'reject':
-                    withdrawal.status = 'failed'
-                    withdrawal.save()
-                    
-                    # Update pending transaction to failed
-                    txn = WalletTransaction.objects.filter(
-                        wallet=wallet, 
-                        amount=withdrawal.amount, 
-                        status='pending',
-                        transaction_type='debit'
-                    ).first()
-                    if txn:
-                        txn.status = 'failed'
-                        txn.description = f'Withdrawal Request #{withdrawal.id} Rejected'
-                        txn.save()
-
-                    send_user_notification(withdrawal.provider.id, f"Your withdrawal request of ₹{withdrawal.amount} was rejected.")
+                # Lock the request so two admins can't both act on it
+                withdrawal = WithdrawalRequest.objects.select_for_update().get(pk=withdrawal.pk)
+                if withdrawal.status != 'pending':
+                    return Response({'detail': 'Can only modify pending withdrawals.'}, status=status.HTTP_400_BAD_REQUEST)
+
+                withdrawal.status = 'failed'
+                withdrawal.save()
+
+                # Update pending transaction to failed
+                txn = pending_withdrawal_entry(withdrawal)
+                if txn:
+                    settle_entry(txn, 'failed', f'Withdrawal Request #{withdrawal.id} Rejected')
+
+                send_user_notification(withdrawal.provider.id, f"Your withdrawal request of ₹{withdrawal.amount} was rejected.")
 
             return Response(WithdrawalRequestSerializer(withdrawal).data)
         except Exception as e:
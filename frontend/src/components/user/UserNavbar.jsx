@@ -44,7 +44,7 @@ const UserNavbar = () => {
   useEffect(() => {
     if (user) {
       dispatch(fetchBookings());
-      dispatch(fetchNotifications(1));  // load page 1 to get unread count immediately
+      dispatch(fetchNotifications());  // load the first page to get unread count immediately
       dispatch(fetchChatRooms());       // load chat rooms to get unread chat count
     }
   }, [dispatch, user]);
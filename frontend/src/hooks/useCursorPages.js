@@ -0,0 +1,37 @@
+import { useCallback, useState } from 'react';
+import { linkParams } from '../utils/pagination';
+
+/**
+ * Page navigation for lists paged with cursors (KeysetPagination on the
+ * backend), which can't be fetched by page number.
+ * Page N + 1 is fetched through page N's `next` link, so the list moves
+ * forward one page at a time and back to any page it has already shown.
+ * `pageCount` is the number of pages reachable so far.
+ *
+ * @returns {{ page, pageCount, params, onPageChange, onResponse, reset }}
+ *   `params` go into the list request, `onResponse` takes its response data,
+ *   `reset` starts over from page 1 (call it when the search or filters change).
+ */
+function useCursorPages() {
+  const [page, setPage] = useState(1);
+  // known[i]: request params of page i + 1
+  const [known, setKnown] = useState([{}]);
+
+  const onResponse = useCallback((data) => {
+    const next = linkParams(data?.next);
+    setKnown((pages) => (next ? [...pages.slice(0, page), next] : pages.slice(0, page)));
+  }, [page]);
+
+  const onPageChange = useCallback((_, value) => {
+    if (value <= known.length) setPage(value);
+  }, [known.length]);
+
+  const reset = useCallback(() => {
+    setPage(1);
+    setKnown([{}]);
+  }, []);
+
+  return { page, pageCount: known.length, params: known[page - 1] || {}, onPageChange, onResponse, reset };
+}
+
+export default useCursorPages;
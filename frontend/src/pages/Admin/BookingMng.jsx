@@ -21,6 +21,7 @@ import { toast } from "react-toastify";
 import ConfirmModal from "../../components/common/Confirm";
 import { bookingService, providerService } from "../../services/apiServices";
 import AssignProviderModal from "../../components/admin/modal/AssignProviderModal";
+import useCursorPages from "../../hooks/useCursorPages";
 
 // ── Constants ──────────────────────────────────────────────────────────────
 const getStatusColor = (s) => {
@@ -141,7 +142,7 @@ export default function BookingMng() {
   const [statusFilter, setStatusFilter] = useState("all");
   const [dateFrom, setDateFrom]         = useState("");
   const [dateTo, setDateTo]             = useState("");
-  const [page, setPage]                 = useState(1);
+  const { page, pageCount, params: pageParams, onPageChange, onResponse, reset } = useCursorPages();
   const rowsPerPage                     = 10;
 
   // Confirmation modal
@@ -162,14 +163,14 @@ export default function BookingMng() {
   // ── Fetch ──────────────────────────────────────────────────────────────────
   useEffect(() => {
     const params = {
-      page,
+      ...pageParams,
       search:     searchTerm || undefined,
       status:     statusFilter !== "all" ? statusFilter : undefined,
       date_from:  dateFrom || undefined,
       date_to:    dateTo   || undefined,
     };
-    dispatch(fetchAdminBookings(params));
-  }, [dispatch, page, searchTerm, statusFilter, dateFrom, dateTo]);
+    dispatch(fetchAdminBookings(params)).unwrap().then(onResponse).catch(() => {});
+  }, [dispatch, pageParams, onResponse, searchTerm, statusFilter, dateFrom, dateTo]);
 
   // ── Derived Stats ──────────────────────────────────────────────────────────
   // Counts across the CURRENT page for a quick summary
@@ -179,7 +180,7 @@ export default function BookingMng() {
   }, {});
 
   // ── Handlers ───────────────────────────────────────────────────────────────
-  const resetPage = () => setPage(1);
+  const resetPage = reset;
 
   const handleStatusClick = async (booking, newStatus) => {
     if (newStatus === booking.status) return;
@@ -418,9 +419,9 @@ export default function BookingMng() {
         rows={bookings || []}
         loading={loading}
         emptyMessage="No bookings found."
-        count={Math.ceil(totalCount / rowsPerPage)}
+        count={pageCount}
         page={page}
-        onPageChange={(_, p) => setPage(p)}
+        onPageChange={onPageChange}
         totalItems={totalCount}
         rowsPerPage={rowsPerPage}
       />
@@ -12,6 +12,7 @@ import apiEndpoints from "../../API/apiEndpoints";
 import { ShowToast } from "../../components/common/Toast";
 import Pagination from '../../components/common/Pagination';
 import SearchBarWithFilter from "../../components/admin/SearchBar";
+import useCursorPages from "../../hooks/useCursorPages";
 
 const STATUS_COLOR = { open: "warning", resolved: "success", closed: "default" };
 const TYPES = [
@@ -56,14 +57,14 @@ export default function Reports() {
   const [saving, setSaving]       = useState({});
 
   // Pagination
-  const [page, setPage] = useState(1);
+  const { page, pageCount, params: pageParams, onPageChange, onResponse, reset } = useCursorPages();
   const [totalCount, setTotalCount] = useState(0);
   const rowsPerPage = 10;
 
   const fetchTickets = async () => {
     setLoading(true);
     try {
-      const params = { page };
+      const params = { ...pageParams };
       if (statusFilter && statusFilter !== "all") params.status = statusFilter;
       if (typeFilter && typeFilter !== "all")     params.ticket_type = typeFilter;
       if (searchQuery)                            params.search = searchQuery;
@@ -71,6 +72,7 @@ export default function Reports() {
       const { data } = await api.get(apiEndpoints.tickets.adminList, { params });
       setTickets(data.results || []);
       setTotalCount(data.count || 0);
+      onResponse(data);
     } catch {
       ShowToast("Failed to load tickets", "error");
     } finally {
@@ -78,7 +80,7 @@ export default function Reports() {
     }
   };
 
-  useEffect(() => { fetchTickets(); }, [statusFilter, typeFilter, searchQuery, page]);
+  useEffect(() => { fetchTickets(); }, [statusFilter, typeFilter, searchQuery, pageParams]);
 
   // Derived stats (page-level, as full backend aggregation isn't available right here)
   const openCount     = useMemo(() => tickets.filter(t => t.status === "open").length, [tickets]);
@@ -129,14 +131,14 @@ export default function Reports() {
         <Box sx={{ flex: 1, minWidth: 250 }}>
           <SearchBarWithFilter
             placeholder="Search by subject, description, or user..."
-            onSearch={(val) => { setSearchQuery(val); setPage(1); }}
+            onSearch={(val) => { setSearchQuery(val); reset(); }}
             showFilter={false} // Disable SearchBar's internal filter
           />
         </Box>
         
         <FormControl size="small" sx={{ minWidth: 160, bgcolor: 'white', '& .MuiOutlinedInput-root': { borderRadius: 2 } }}>
           <InputLabel>Status</InputLabel>
-          <Select label="Status" value={statusFilter} onChange={e => { setStatusFilter(e.target.value); setPage(1); }}>
+          <Select label="Status" value={statusFilter} onChange={e => { setStatusFilter(e.target.value); reset(); }}>
             <MenuItem value="all">All Statuses</MenuItem>
             <MenuItem value="open">Open</MenuItem>
             <MenuItem value="resolved">Resolved</MenuItem>
@@ -146,7 +148,7 @@ export default function Reports() {
         
         <FormControl size="small" sx={{ minWidth: 180, bgcolor: 'white', '& .MuiOutlinedInput-root': { borderRadius: 2 } }}>
           <InputLabel>Type</InputLabel>
-          <Select label="Type" value={typeFilter} onChange={e => { setTypeFilter(e.target.value); setPage(1); }}>
+          <Select label="Type" value={typeFilter} onChange={e => { setTypeFilter(e.target.value); reset(); }}>
             {TYPES.map(t => <MenuItem key={t.value} value={t.value}>{t.label}</MenuItem>)}
           </Select>
         </FormControl>
@@ -246,9 +248,9 @@ export default function Reports() {
           {totalCount > rowsPerPage && (
             <Box display="flex" justifyContent="center">
               <Pagination
-                count={Math.ceil(totalCount / rowsPerPage)}
+                count={pageCount}
                 page={page}
-                onChange={(_, p) => setPage(p)}
+                onChange={onPageChange}
                 totalCount={totalCount}
                 pageSize={rowsPerPage}
               />
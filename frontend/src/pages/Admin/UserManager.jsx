@@ -14,6 +14,7 @@ import {
   toggleCustomerActive,
   selectTotalCustomersCount,
 } from "../../redux/slices/adminCustomerSlice";
+import useCursorPages from "../../hooks/useCursorPages";
 
 // ── Constants ────────────────────────────────────────────────────────────────
 const USER_FILTER_OPTIONS = [
@@ -102,7 +103,7 @@ export default function UserManager() {
 
   const [searchTerm, setSearchTerm] = useState("");
   const [filter, setFilter]         = useState("all");
-  const [page, setPage]             = useState(1);
+  const { page, pageCount, params: pageParams, onPageChange, onResponse, reset } = useCursorPages();
   const rowsPerPage                 = 10;
 
   // Confirm modal
@@ -116,11 +117,11 @@ export default function UserManager() {
   // ── Fetch ──────────────────────────────────────────────────────────────────
   useEffect(() => {
     dispatch(fetchCustomers({
-      page,
+      ...pageParams,
       search: searchTerm || undefined,
       status: filter !== "all" ? filter : undefined,
-    }));
-  }, [dispatch, page, searchTerm, filter]);
+    })).unwrap().then(onResponse).catch(() => {});
+  }, [dispatch, pageParams, onResponse, searchTerm, filter]);
 
   // ── Derived Stats ──────────────────────────────────────────────────────────
   const activeCount   = useMemo(() => (customers || []).filter((u) =>  u.is_active).length, [customers]);
@@ -229,8 +230,8 @@ export default function UserManager() {
       {/* Search + Filter */}
       <SearchBarWithFilter
         placeholder="Search by username, email or phone..."
-        onSearch={(val) => { setSearchTerm(val); setPage(1); }}
-        onFilterChange={(val) => { setFilter(val); setPage(1); }}
+        onSearch={(val) => { setSearchTerm(val); reset(); }}
+        onFilterChange={(val) => { setFilter(val); reset(); }}
         filterOptions={USER_FILTER_OPTIONS}
       />
 
@@ -240,9 +241,9 @@ export default function UserManager() {
         rows={customers || []}
         loading={loading}
         emptyMessage="No customers found."
-        count={Math.ceil(totalCount / rowsPerPage)}
+        count={pageCount}
         page={page}
-        onPageChange={(_, p) => setPage(p)}
+        onPageChange={onPageChange}
         totalItems={totalCount}
         rowsPerPage={rowsPerPage}
       />
@@ -16,11 +16,13 @@ import {
   CircularProgress,
   Badge,
   ListItemButton,
+  Button,
 } from "@mui/material";
 import SendIcon from "@mui/icons-material/Send";
 import {
   fetchChatRooms,
   fetchMessages,
+  fetchOlderMessages,
   sendMessage,
   setActiveRoom,
 } from "../../redux/slices/chatSlice";
@@ -30,7 +32,7 @@ export default function ChatPage() {
   const dispatch = useDispatch();
   const location = useLocation();
   const { user } = useSelector((state) => state.auth);
-  const { rooms, messages, activeRoomId, loading } = useSelector((state) => state.chat);
+  const { rooms, messages, nextBefore, activeRoomId, loading } = useSelector((state) => state.chat);
 
   const [messageInput, setMessageInput] = useState("");
   const messagesEndRef = useRef(null);
@@ -45,7 +47,8 @@ export default function ChatPage() {
     }
   }, [dispatch, location.state]);
 
-  // Scroll to bottom on new messages
+  // Scroll to bottom on new messages (not when older history is prepended)
+  const lastMessageId = messages[activeRoomId]?.at(-1)?.id;
   useEffect(() => {
     if (containerRef.current) {
       containerRef.current.scrollTo({
@@ -53,7 +56,12 @@ export default function ChatPage() {
         behavior: "smooth"
       });
     }
-  }, [messages, activeRoomId]);
+  }, [lastMessageId, activeRoomId]);
+
+  const handleLoadOlder = () => {
+    if (!activeRoomId || !nextBefore[activeRoomId]) return;
+    dispatch(fetchOlderMessages({ roomId: activeRoomId, before: nextBefore[activeRoomId] }));
+  };
 
   const handleRoomClick = (roomId) => {
     dispatch(setActiveRoom(roomId));
@@ -160,6 +168,11 @@ export default function ChatPage() {
               ref={containerRef}
               sx={{ flexGrow: 1, overflowY: "auto", p: { xs: 2, md: 3 }, bgcolor: "#f8f9fa" }}
             >
+              {nextBefore[activeRoomId] && (
+                <Box sx={{ display: "flex", justifyContent: "center", mb: 2 }}>
+                  <Button size="small" onClick={handleLoadOlder}>Load earlier messages</Button>
+                </Box>
+              )}
               {messages[activeRoomId] ? (
                 messages[activeRoomId].map((msg, index) => {
                   const senderId = msg?.sender?.id || msg?.sender || msg?.sender_id;
@@ -3,8 +3,8 @@ import { useNavigate } from "react-router-dom";
 import { useDispatch, useSelector } from "react-redux";
 import { bookingService } from "../../services/apiServices";
 import { fetchMyAppointments } from "../../redux/slices/provider/providerJobSlice";
-import { selectMyAppointmentsTotalCount } from "../../redux/slices/provider/providerJobSlice";
 import useDebounce from "../../hooks/useDebounce";
+import useCursorPages from "../../hooks/useCursorPages";
 import {
   Box, Typography, Grid, Paper, Chip, Divider, Dialog, DialogTitle,
   DialogContent, DialogActions, Button, Avatar, Stack, IconButton,
@@ -380,20 +380,19 @@ const HistorySkeleton = () => (
 const History = () => {
   const dispatch = useDispatch();
   const { myAppointments, myAppointmentsLoading } = useSelector((state) => state.providerJobs);
-  const totalCount = useSelector(selectMyAppointmentsTotalCount);
   const PAGE_SIZE = 12;
 
   const [search, setSearch]           = useState("");
   const [selectedJob, setSelectedJob] = useState(null);
   const [filter, setFilter]           = useState("all");  // all | completed | cancelled
   const [starFilter, setStarFilter]   = useState("all");
-  const [page, setPage]               = useState(1);
+  const { page, pageCount, params: pageParams, onPageChange, onResponse, reset } = useCursorPages();
 
   const debouncedSearch = useDebounce(search, 500);
 
   useEffect(() => {
     const params = {
-      page,
+      ...pageParams,
       page_size: PAGE_SIZE,
       search: debouncedSearch || undefined,
     };
@@ -404,12 +403,12 @@ const History = () => {
       // default: history = completed + cancelled
       params.status = "completed,cancelled";
     }
-    dispatch(fetchMyAppointments(params));
-  }, [dispatch, debouncedSearch, filter, page]);
+    dispatch(fetchMyAppointments(params)).unwrap().then(onResponse).catch(() => {});
+  }, [dispatch, debouncedSearch, filter, pageParams, onResponse]);
 
   // Reset to page 1 whenever search or filter changes
-  const handleSearch = (val) => { setSearch(val); setPage(1); };
-  const handleFilter = (val) => { setFilter(val); setPage(1); };
+  const handleSearch = (val) => { setSearch(val); reset(); };
+  const handleFilter = (val) => { setFilter(val); reset(); };
 
   // Only star-rating filter remains client-side (backend has no star param)
   const filtered = (myAppointments || []).filter((j) => {
@@ -426,7 +425,6 @@ const History = () => {
     ? (completed.reduce((s, j) => s + (j.review?.rating || 0), 0) / completed.filter((j) => j.review).length).toFixed(1)
     : "—";
 
-  const pageCount = Math.ceil(totalCount / PAGE_SIZE);
 
   return (
     <Box sx={{ minHeight: "100vh", bgcolor: "#f8f9fc", py: 4 }}>
@@ -539,7 +537,7 @@ const History = () => {
             <Pagination
               count={pageCount}
               page={page}
-              onChange={(_, val) => { setPage(val); window.scrollTo({ top: 0, behavior: "smooth" }); }}
+              onChange={(e, val) => { onPageChange(e, val); window.scrollTo({ top: 0, behavior: "smooth" }); }}
               color="primary"
               shape="rounded"
               size="large"
@@ -46,7 +46,7 @@ import { toast } from "react-toastify";
 
 const Notifications = () => {
   const dispatch = useDispatch();
-  const { list, loading, error, hasMore, page } = useSelector((state) => state.notifications);
+  const { list, loading, error, hasMore, nextCursor } = useSelector((state) => state.notifications);
 
   const [filter, setFilter] = useState("all");
   const [sortOrder, setSortOrder] = useState("newest");
@@ -61,16 +61,16 @@ const Notifications = () => {
     if (observer.current) observer.current.disconnect();
     observer.current = new IntersectionObserver(entries => {
       if (entries[0].isIntersecting && hasMore) {
-        dispatch(fetchNotifications(page + 1));
+        dispatch(fetchNotifications(nextCursor));
       }
     });
     if (node) observer.current.observe(node);
-  }, [loading, hasMore, page, dispatch]);
+  }, [loading, hasMore, nextCursor, dispatch]);
 
   useEffect(() => {
     // Initial fetch
     dispatch(clearNotifications());
-    dispatch(fetchNotifications(1));
+    dispatch(fetchNotifications());
   }, [dispatch]);
 
   const handleOpenModal = (note) => {
@@ -25,6 +25,18 @@ export const fetchMessages = createAsyncThunk(
     }
 );
 
+export const fetchOlderMessages = createAsyncThunk(
+    'chat/fetchOlderMessages',
+    async ({ roomId, before }, { rejectWithValue }) => {
+        try {
+            const response = await api.get(`/chat/rooms/${roomId}/messages/`, { params: { before } });
+            return { roomId, data: response.data };
+        } catch (error) {
+            return rejectWithValue(error.response?.data || 'Failed to fetch older messages');
+        }
+    }
+);
+
 export const sendMessage = createAsyncThunk(
     'chat/sendMessage',
     async ({ roomId, content }, { rejectWithValue }) => {
@@ -42,6 +54,7 @@ const chatSlice = createSlice({
     initialState: {
         rooms: [],
         messages: {}, // { [roomId]: [messages] }
+        nextBefore: {}, // { [roomId]: id of the oldest loaded message, or null when history is complete }
         activeRoomId: null,
         loading: false,
         error: null,
@@ -101,10 +114,16 @@ const chatSlice = createSlice({
             })
             .addCase(fetchMessages.fulfilled, (state, action) => {
                 const { roomId, data } = action.payload;
-                state.messages[roomId] = data;
+                state.messages[roomId] = data.results;
+                state.nextBefore[roomId] = data.next_before;
                 // Since fetching messages marks them as read on backend, we update local too
                 const room = state.rooms.find(r => r.id === roomId);
                 if (room) room.unread_count = 0;
+            })
+            .addCase(fetchOlderMessages.fulfilled, (state, action) => {
+                const { roomId, data } = action.payload;
+                state.messages[roomId] = [...data.results, ...(state.messages[roomId] || [])];
+                state.nextBefore[roomId] = data.next_before;
             });
     }
 });
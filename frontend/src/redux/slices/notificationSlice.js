@@ -1,14 +1,15 @@
 // redux/slices/notificationSlice.js
 import { createSlice, createAsyncThunk } from '@reduxjs/toolkit';
 import { notificationService } from '../../services/apiServices';
+import { linkParams } from '../../utils/pagination';
 
-// Fetch paginated notifications
+// Fetch notifications: the newest page, or the one after `cursor` (infinite scroll)
 export const fetchNotifications = createAsyncThunk(
   'notifications/fetchNotifications',
-  async (page = 1, { rejectWithValue }) => {
+  async (cursor = null, { rejectWithValue }) => {
     try {
-      const data = await notificationService.list({ page });
-      return { ...data, page };
+      const data = await notificationService.list(cursor ? { cursor } : {});
+      return { ...data, cursor };
     } catch (err) {
       return rejectWithValue(err.response?.data || err.message);
     }
@@ -61,7 +62,7 @@ const notificationSlice = createSlice({
     list: [],
     loading: false,
     hasMore: true,
-    page: 1,
+    nextCursor: null,
     unreadCount: 0,
     error: null,
   },
@@ -70,7 +71,7 @@ const notificationSlice = createSlice({
       state.list = [];
       state.loading = false;
       state.hasMore = true;
-      state.page = 1;
+      state.nextCursor = null;
       state.unreadCount = 0;
       state.error = null;
     },
@@ -89,13 +90,13 @@ const notificationSlice = createSlice({
       })
       .addCase(fetchNotifications.fulfilled, (state, action) => {
         state.loading = false;
-        const { results, next, page, unread_count } = action.payload;
+        const { results, next, cursor, unread_count } = action.payload;
         
         if (unread_count !== undefined) {
           state.unreadCount = unread_count;
         }
 
-        if (page === 1) {
+        if (!cursor) {
           state.list = results;
         } else {
           // Filter out any duplicates if they exist
@@ -105,7 +106,7 @@ const notificationSlice = createSlice({
         }
 
         state.hasMore = !!next;
-        state.page = page;
+        state.nextCursor = linkParams(next)?.cursor || null;
       })
       .addCase(fetchNotifications.rejected, (state, action) => {
         state.loading = false;
@@ -0,0 +1,12 @@
+/**
+ * Query params that fetch the page a paginated response's `next` (or
+ * `previous`) link points at: `{ cursor }` for keyset-paginated lists,
+ * `{ page }` for numbered ones. Null when there is no such page.
+ * @param {string|null} url - The `next` / `previous` link of a list response.
+ * @returns {object|null}
+ */
+export const linkParams = (url) => {
+  if (!url) return null;
+  const query = new URL(url, window.location.origin).searchParams;
+  return query.has('cursor') ? { cursor: query.get('cursor') } : { page: query.get('page') };
+};